@@ -1,80 +1,90 @@
-import time
 import logging
+import argparse
 from dotenv import load_dotenv
 import os
-from classes.innovaro import Innovaro
-from classes.download_xmls import Download_XML
-from classes.drive_xml import Drive
+from classes.backfill import executar_backfill, ler_data
+from classes.orquestrador import executar_tenants
+from classes.pipeline import PipelineUpload
 
 load_dotenv()
 
+
+def ler_argumentos():
+    parser = argparse.ArgumentParser(description="Robô de download dos XMLs manifestados do Innovaro para o Google Drive.")
+    parser.add_argument("--inicio", help="Data inicial do backfill (aaaa-mm-dd ou dd/mm/aaaa). Sem ela, baixa só o dia anterior.")
+    parser.add_argument("--fim", help="Data final do backfill (padrão: a data inicial).")
+    parser.add_argument("--janela", choices=["dia", "semana"], default="dia", help="Tamanho de cada janela do backfill.")
+    parser.add_argument("--workers", type=int, default=2, help="Navegadores em paralelo no backfill.")
+    parser.add_argument("--tentativas", type=int, default=2, help="Tentativas por janela no backfill.")
+    parser.add_argument("--tenants", help="Arquivo JSON com as empresas/filiais (credenciais e pasta do Drive de cada uma).")
+    parser.add_argument("--max-navegadores", type=int, default=2, help="Máximo de navegadores simultâneos com --tenants.")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
     
     # Configura o logging
     logging.basicConfig(level=logging.INFO)
 
-    # 1. Cria uma instância da classe
-    # O __init__ será chamado, o navegador abrirá e o login será feito.
-    try:
-        bot = Innovaro(usuario=os.environ.get('USUARIO'), senha=os.environ.get('SENHA'))
-
-        # 2. Usa os métodos da classe
-        
-        # Clica no menu principal
-        bot.menu_innovaro()
-        time.sleep(2)
-
-        # Clica em um item de menu (exemplo)
-        bot.listar_menu_click("Fiscal e Regulamentação")
-        time.sleep(2)
-        
-        # Clica em um sub-item (exemplo)
-        bot.listar_menu_click("Consultas")
-        time.sleep(2)
-
-        bot.listar_menu_click("Auxiliares Fiscais")
-        time.sleep(2)
-
-        bot.listar_menu_click("Manifestação (C)")
-        time.sleep(2)
-
-        bot.listar_menu_click("99003 Download de XML Manifestados (C)")
-        time.sleep(2)
+    args = ler_argumentos()
 
-        # ... aqui você faria suas ações dentro do iframe ...
-        print("Executando ações dentro do iframe...")
-        bot.carregamento()
-
-        download_xmls = Download_XML(bot.nav)
-
-        download_xmls.preencher_variaveis_manifesto()
-
-        time.sleep(1)
-
-        bot.botao_e()
-
-        bot.carregamento()
+    try:
+        if args.tenants:
+            # Várias empresas/filiais, cada uma com as suas credenciais e pasta do Drive
+            executar_tenants(args.tenants, max_navegadores=args.max_navegadores)
 
-        time.sleep(1)
-        
-        pasta_local_dos_xmls = download_xmls.download_xml_manifestados()
-        bot.carregamento()
-        
-        # --- 2. NOVA ETAPA: UPLOAD PARA O DRIVE ---
-        if pasta_local_dos_xmls:
-            print("\n--- Iniciando integração com Google Drive ---")
-            drive_uploader = Drive()
-            drive_uploader.upload_files(local_folder_path=pasta_local_dos_xmls)
+        elif not args.inicio and os.environ.get("PIPELINE_UPLOAD", "1") != "0":
+            # Execução normal em pipeline: o Drive autentica enquanto o
+            # navegador trabalha e cada XML extraído já vai para o upload
+            print("\n--- Iniciando integração com Google Drive (em paralelo) ---")
+            pipeline = PipelineUpload()
+            # Importado aqui: o selenium só carrega quando o navegador vai ser usado
+            # (o googleapiclient carrega na thread do Drive)
+            from classes.fluxo import baixar_xmls_innovaro
+            pasta_local_dos_xmls = baixar_xmls_innovaro(
+                usuario=os.environ.get('USUARIO'), senha=os.environ.get('SENHA'),
+                ao_extrair=pipeline.enfileirar
+            )
+            pipeline.finalizar()
+            drive_uploader = pipeline.get_drive()
+            # Pendências de execuções anteriores que ficaram na pasta
+            if pasta_local_dos_xmls and drive_uploader and drive_uploader.target_folder_id:
+                drive_uploader.upload_files(local_folder_path=pasta_local_dos_xmls)
             print("--- Integração com Google Drive finalizada ---")
+
         else:
-            print("Nenhuma pasta local de XMLs foi processada. Pulando upload para o Drive.")
+            if args.inicio:
+                # Backfill: período dividido em janelas, vários navegadores em paralelo
+                inicio = ler_data(args.inicio)
+                fim = ler_data(args.fim) if args.fim else inicio
+                pasta_local_dos_xmls = executar_backfill(
+                    inicio, fim,
+                    usuario=os.environ.get('USUARIO'), senha=os.environ.get('SENHA'),
+                    tamanho_janela=args.janela, workers=args.workers, tentativas=args.tentativas,
+                )
+                novos_xmls = None
+            else:
+                # Execução normal: o navegador abre, faz o login e baixa o dia anterior
+                novos_xmls = []
+                from classes.fluxo import baixar_xmls_innovaro
+                pasta_local_dos_xmls = baixar_xmls_innovaro(
+                    usuario=os.environ.get('USUARIO'), senha=os.environ.get('SENHA'),
+                    ao_extrair=novos_xmls.append
+                )
+
+            # --- 2. NOVA ETAPA: UPLOAD PARA O DRIVE ---
+            if pasta_local_dos_xmls:
+                print("\n--- Iniciando integração com Google Drive ---")
+                from classes.drive_xml import Drive
+                drive_uploader = Drive()
+                # Só o manifesto desta execução; no backfill, a pasta (só com pendentes)
+                drive_uploader.upload_files(local_folder_path=pasta_local_dos_xmls, arquivos=novos_xmls)
+                # Pendências de execuções anteriores que ficaram na pasta
+                if novos_xmls is not None and drive_uploader.target_folder_id:
+                    drive_uploader.upload_files(local_folder_path=pasta_local_dos_xmls)
+                print("--- Integração com Google Drive finalizada ---")
+            else:
+                print("Nenhuma pasta local de XMLs foi processada. Pulando upload para o Drive.")
         
     except Exception as e:
         print(f"Um erro principal ocorreu na automação: {e}")
-    
-    finally:
-        # 3. Fecha o navegador
-        # É importante fazer isso no 'finally' para garantir
-        # que o navegador feche mesmo se ocorrer um erro.
-        if 'bot' in locals() and bot.nav:
-            bot.fechar_navegador()
\ No newline at end of file
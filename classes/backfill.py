@@ -0,0 +1,201 @@
+# Em: classes/backfill.py
+
+import os
+import time
+import shutil
+import logging
+import multiprocessing
+from datetime import datetime, timedelta
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Formato de data digitado nos campos do Innovaro
+FORMATO_INNOVARO = "%d/%m/%Y"
+
+# Pasta base onde cada janela baixa os seus XMLs antes da mesclagem
+PASTA_BACKFILL_PADRAO = Path.home() / "XML- Robô Innovaro/backfill"
+PASTA_DESTINO_PADRAO = Path.home() / "XML- Robô Innovaro/arquivos-xmls"
+# Cookies de cada vaga de navegador do backfill (fora das pastas das
+# janelas, que são apagadas a cada tentativa)
+PASTA_SESSOES_BACKFILL_PADRAO = Path.home() / "XML- Robô Innovaro/backfill-sessoes"
+
+TAMANHOS_JANELA = {'dia': 1, 'semana': 7}
+
+# Vaga (0..workers-1) do processo atual no pool do backfill
+_vaga = None
+
+
+def _ocupar_vaga(vagas):
+    """
+    Inicializador dos processos do pool: cada um pega uma vaga fixa, da
+    qual saem o perfil do Chrome e o arquivo de cookies. Assim as sessões
+    são reaproveitadas entre janelas e execuções, e dois processos nunca
+    usam os mesmos arquivos.
+    """
+    global _vaga
+    _vaga = vagas.get()
+
+
+def ler_data(texto):
+    """
+    Aceita 'aaaa-mm-dd' ou 'dd/mm/aaaa'.
+    """
+    for formato in ("%Y-%m-%d", FORMATO_INNOVARO):
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Data inválida: '{texto}' (use aaaa-mm-dd ou dd/mm/aaaa).")
+
+
+def gerar_janelas(inicio, fim, tamanho_janela='dia'):
+    """
+    Divide o período [inicio, fim] em janelas de um dia ou de uma semana.
+    Retorna uma lista de tuplas (data_inicial, data_final).
+    """
+    if fim < inicio:
+        raise ValueError("A data final é anterior à data inicial.")
+    dias = TAMANHOS_JANELA[tamanho_janela]
+    janelas = []
+    atual = inicio
+    while atual <= fim:
+        final_janela = min(atual + timedelta(days=dias - 1), fim)
+        janelas.append((atual, final_janela))
+        atual = final_janela + timedelta(days=1)
+    return janelas
+
+
+def _executar_janela(tarefa):
+    """
+    Executado num processo separado: um navegador próprio, uma pasta de
+    download própria e até 'tentativas' execuções do fluxo para a janela.
+    """
+    # Importado aqui para que o processo principal não precise do Selenium
+    from classes.fluxo import baixar_xmls_innovaro
+
+    inicio, fim = tarefa['inicio'], tarefa['fim']
+    pasta_janela = Path(tarefa['pasta_base']) / f"{inicio:%Y%m%d}-{fim:%Y%m%d}"
+    # Cada vaga tem o seu perfil do Chrome (o Chrome trava o diretório) e os seus cookies
+    vaga = _vaga or 0
+    perfil_base = os.environ.get("INNOVARO_PERFIL_DIR")
+    perfil_dir = f"{perfil_base}-backfill-{vaga}" if perfil_base else None
+    caminho_cookies = Path(tarefa['pasta_sessoes']) / f"vaga-{vaga}" / "sessao_cookies.json"
+
+    resultado = {
+        'inicio': inicio, 'fim': fim, 'pasta': str(pasta_janela),
+        'ok': False, 'tentativas': 0, 'arquivos': 0, 'duracao': 0.0, 'erro': None,
+    }
+    comeco = time.perf_counter()
+    for tentativa in range(1, tarefa['tentativas'] + 1):
+        resultado['tentativas'] = tentativa
+        # Começa sempre de uma pasta vazia: restos de uma tentativa falha não contam
+        shutil.rmtree(pasta_janela, ignore_errors=True)
+        os.makedirs(pasta_janela, exist_ok=True)
+        print(f"[{inicio:%d/%m/%Y} a {fim:%d/%m/%Y}] Tentativa {tentativa}/{tarefa['tentativas']}...")
+        try:
+            pasta = baixar_xmls_innovaro(
+                tarefa['usuario'], tarefa['senha'], url=tarefa.get('url'),
+                data_inicial=inicio.strftime(FORMATO_INNOVARO),
+                data_final=fim.strftime(FORMATO_INNOVARO),
+                download_path=pasta_janela,
+                modo_download=tarefa.get('modo_download'),
+                headless=tarefa.get('headless'),
+                perfil_dir=perfil_dir,
+                caminho_cookies=caminho_cookies,
+                concorrencia=tarefa.get('concorrencia', 1),
+            )
+        except Exception as e:
+            pasta = None
+            resultado['erro'] = str(e)
+        if pasta:
+            resultado['ok'] = True
+            resultado['erro'] = None
+            resultado['arquivos'] = sum(1 for nome in os.listdir(pasta_janela) if nome.endswith('.xml'))
+            break
+        resultado['erro'] = resultado['erro'] or "Fluxo do navegador não retornou a pasta dos XMLs."
+    resultado['duracao'] = time.perf_counter() - comeco
+    return resultado
+
+
+def _mesclar(pasta_janela, destino, existentes):
+    """
+    Move os XMLs da janela para o destino, descartando os que já existem lá.
+    Retorna (novos, duplicados).
+    """
+    novos = duplicados = 0
+    for entrada in os.scandir(pasta_janela):
+        if not entrada.is_file() or not entrada.name.endswith('.xml'):
+            continue
+        if entrada.name in existentes:
+            os.remove(entrada.path)
+            duplicados += 1
+        else:
+            os.replace(entrada.path, Path(destino) / entrada.name)
+            existentes.add(entrada.name)
+            novos += 1
+    shutil.rmtree(pasta_janela, ignore_errors=True)
+    return novos, duplicados
+
+
+def executar_backfill(inicio, fim, usuario, senha, tamanho_janela='dia', workers=2, tentativas=2,
+                      destino=None, pasta_base=None, url=None, modo_download=None, headless=None):
+    """
+    Baixa um período inteiro dividido em janelas, com 'workers' navegadores
+    em paralelo (um processo por janela em execução), e mescla tudo no
+    destino sem duplicar arquivos.
+    Retorna o caminho do destino (str) se ao menos uma janela deu certo.
+    """
+    destino = Path(destino or PASTA_DESTINO_PADRAO)
+    pasta_base = Path(pasta_base or PASTA_BACKFILL_PADRAO)
+    os.makedirs(destino, exist_ok=True)
+    os.makedirs(pasta_base, exist_ok=True)
+
+    janelas = gerar_janelas(inicio, fim, tamanho_janela)
+    print(f"Backfill de {inicio:%d/%m/%Y} a {fim:%d/%m/%Y}: {len(janelas)} janela(s) por {tamanho_janela}, {workers} navegador(es) em paralelo.")
+
+    tarefas = [
+        {
+            'inicio': ini, 'fim': fi, 'usuario': usuario, 'senha': senha, 'url': url,
+            'pasta_base': str(pasta_base), 'pasta_sessoes': str(PASTA_SESSOES_BACKFILL_PADRAO),
+            'tentativas': tentativas,
+            'modo_download': modo_download, 'headless': headless,
+            'concorrencia': workers,
+        }
+        for ini, fi in janelas
+    ]
+
+    # Uma leitura só do destino; a mesclagem acontece no processo principal
+    existentes = set(os.listdir(destino))
+    resultados = []
+    comeco = time.perf_counter()
+    vagas = multiprocessing.Queue()
+    for vaga in range(workers):
+        vagas.put(vaga)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_ocupar_vaga, initargs=(vagas,)) as executor:
+        futuros = [executor.submit(_executar_janela, tarefa) for tarefa in tarefas]
+        for futuro in as_completed(futuros):
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                logging.error(f"Processo de backfill falhou: {e}")
+                continue
+            resultado['novos'] = resultado['duplicados'] = 0
+            if resultado['ok']:
+                resultado['novos'], resultado['duplicados'] = _mesclar(resultado['pasta'], destino, existentes)
+            resultados.append(resultado)
+
+    resultados.sort(key=lambda r: r['inicio'])
+    sucesso = [r for r in resultados if r['ok']]
+
+    print("="*30)
+    print("Relatório de Backfill:")
+    for r in resultados:
+        status = "OK" if r['ok'] else f"FALHOU ({r['erro']})"
+        print(f"  {r['inicio']:%d/%m/%Y} a {r['fim']:%d/%m/%Y}: {status} | tentativas: {r['tentativas']} | "
+              f"arquivos: {r['arquivos']} | novos: {r['novos']} | duplicados: {r['duplicados']} | {r['duracao']:.1f}s")
+    print(f"Janelas com sucesso: {len(sucesso)}/{len(janelas)}")
+    print(f"XMLs novos no destino: {sum(r['novos'] for r in resultados)}")
+    print(f"Tempo total: {time.perf_counter() - comeco:.1f}s")
+    print("="*30)
+
+    return str(destino) if sucesso else None
@@ -0,0 +1,123 @@
+# Em: classes/benchmark_inicializacao.py
+
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+# Raiz do projeto (onde está o app.py): os processos medidos rodam a partir dela
+RAIZ_PROJETO = Path(__file__).resolve().parent.parent
+
+# Módulos cuja importação é medida, cada um num processo novo (cache de
+# módulos vazio, como numa execução agendada)
+MODULOS_PADRAO = [
+    'app',
+    'classes.fluxo',
+    'classes.drive_xml',
+    'selenium.webdriver',
+    'googleapiclient.discovery',
+]
+
+CODIGO_IMPORTACAO = """
+import time
+inicio = time.perf_counter()
+import {modulo}
+print(time.perf_counter() - inicio)
+"""
+
+# Primeira ação de cada etapa, medida desde o início do processo
+CODIGO_DRIVE = """
+import time
+inicio = time.perf_counter()
+from classes.drive_xml import Drive
+drive = Drive()
+print(time.perf_counter() - inicio if drive.target_folder_id else -1)
+"""
+
+CODIGO_NAVEGADOR = """
+import time
+inicio = time.perf_counter()
+from classes.sessao import SessaoNavegador
+nav = SessaoNavegador(headless=True).criar_driver()
+print(time.perf_counter() - inicio)
+nav.quit()
+"""
+
+
+def _medir(codigo, repeticoes):
+    """
+    Executa 'codigo' em 'repeticoes' processos novos e devolve os tempos
+    (a última linha impressa por cada um), ou None se algum falhar.
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        resultado = subprocess.run(
+            [sys.executable, '-c', codigo], cwd=RAIZ_PROJETO, capture_output=True, text=True
+        )
+        linhas = resultado.stdout.strip().splitlines()
+        if resultado.returncode != 0 or not linhas:
+            erro = resultado.stderr.strip().splitlines()
+            print(f"    falhou: {erro[-1] if erro else resultado.returncode}")
+            return None
+        tempo = float(linhas[-1])
+        if tempo < 0:
+            print("    falhou: a etapa não chegou à primeira ação")
+            return None
+        tempos.append(tempo)
+    return tempos
+
+
+def _resumo(tempos):
+    return {'mediana': statistics.median(tempos), 'minimo': min(tempos), 'maximo': max(tempos)}
+
+
+def executar_benchmark(modulos=None, repeticoes=5, drive=False, navegador=False):
+    """
+    Mede o tempo de importação de cada módulo e, opcionalmente, o tempo
+    até a primeira ação do Drive (serviço montado e pasta verificada) e do
+    navegador (Chrome aberto). Retorna um dict com mediana, mínimo e máximo
+    (em segundos) de cada medida.
+    """
+    resultados = {'importacao': {}, 'primeira_acao': {}}
+
+    print(f"Tempo de importação ({repeticoes} processos novos por módulo):")
+    for modulo in modulos or MODULOS_PADRAO:
+        tempos = _medir(CODIGO_IMPORTACAO.format(modulo=modulo), repeticoes)
+        if tempos:
+            resultados['importacao'][modulo] = _resumo(tempos)
+            print(f"  {modulo}: mediana {statistics.median(tempos):.3f}s "
+                  f"(mín {min(tempos):.3f}s, máx {max(tempos):.3f}s)")
+
+    etapas = [('drive', CODIGO_DRIVE, drive), ('navegador', CODIGO_NAVEGADOR, navegador)]
+    if drive or navegador:
+        print("Tempo até a primeira ação:")
+    for nome, codigo, ativo in etapas:
+        if not ativo:
+            continue
+        tempos = _medir(codigo, repeticoes)
+        if tempos:
+            resultados['primeira_acao'][nome] = _resumo(tempos)
+            print(f"  {nome}: mediana {statistics.median(tempos):.3f}s "
+                  f"(mín {min(tempos):.3f}s, máx {max(tempos):.3f}s)")
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da inicialização do robô (importações e primeira ação).")
+    parser.add_argument("--modulos", nargs="+", help="Módulos a medir (padrão: app e as dependências pesadas).")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Processos novos por medida.")
+    parser.add_argument("--drive", action="store_true", help="Mede também a autenticação e a verificação da pasta do Drive.")
+    parser.add_argument("--navegador", action="store_true", help="Mede também a abertura do Chrome.")
+    parser.add_argument("--saida", help="Arquivo JSON com os resultados.")
+    args = parser.parse_args()
+
+    resultados = executar_benchmark(args.modulos, max(1, args.repeticoes), args.drive, args.navegador)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# Em: classes/download_http.py
+
+import io
+import os
+import time
+import logging
+import tempfile
+from pathlib import Path
+from urllib.parse import urljoin
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Tamanho do bloco lido da resposta HTTP
+TAMANHO_BLOCO_HTTP = 256 * 1024
+
+# Limite do .zip baixado (o .zip precisa estar inteiro antes da extração
+# para que o diretório central, gravado no final do arquivo, possa ser lido)
+LIMITE_DOWNLOAD_HTTP_PADRAO = int(os.environ.get("DOWNLOAD_HTTP_LIMITE_MB", "1024")) * 1024 * 1024
+# Até este tamanho o .zip fica na memória; acima, vai para um arquivo
+# temporário no disco (com backfill e tenants há vários downloads ao mesmo tempo)
+LIMITE_MEMORIA_HTTP_PADRAO = int(os.environ.get("DOWNLOAD_HTTP_MEMORIA_MB", "32")) * 1024 * 1024
+
+
+class SessaoExpirada(Exception):
+    pass
+
+
+class LeitorMemoria(io.RawIOBase):
+    """
+    Arquivo somente leitura (com seek) sobre um buffer em memória, sem
+    copiá-lo: só o trecho pedido em cada leitura é copiado. Cada worker
+    da extração abre o seu sobre o mesmo .zip baixado.
+    """
+
+    def __init__(self, dados):
+        super().__init__()
+        self._dados = memoryview(dados)
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._dados)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def readinto(self, buffer):
+        n = max(0, min(len(buffer), len(self._dados) - self._pos))
+        buffer[:n] = self._dados[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+
+class DownloadHTTP:
+    """
+    Baixa a exportação do Innovaro direto por HTTP, sem passar pelo
+    gerenciador de downloads do Chrome.
+    Os cookies da sessão autenticada são copiados do navegador para um
+    requests.Session com pool de conexões (keep-alive), reaproveitado por
+    todas as exportações da execução. Um .zip pequeno vai direto para a
+    memória e é entregue ao extrator sem passar pelo disco; um grande vai
+    para um .zip temporário em 'pasta_temporaria'.
+    """
+
+    def __init__(self, nav=None, session=None, tamanho_pool=4, timeout=(10, 300), limite_bytes=None,
+                 limite_memoria=None, pasta_temporaria=None):
+        self.nav = nav
+        self.timeout = timeout
+        self.limite_bytes = limite_bytes or LIMITE_DOWNLOAD_HTTP_PADRAO
+        self.limite_memoria = LIMITE_MEMORIA_HTTP_PADRAO if limite_memoria is None else limite_memoria
+        self.pasta_temporaria = pasta_temporaria
+        self.session = session or self._criar_sessao(tamanho_pool)
+        if nav is not None:
+            self.sincronizar_cookies()
+
+    def _criar_sessao(self, tamanho_pool):
+        session = requests.Session()
+        retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504], allowed_methods=["GET"])
+        adapter = HTTPAdapter(pool_connections=tamanho_pool, pool_maxsize=tamanho_pool, max_retries=retries)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def sincronizar_cookies(self):
+        """
+        Copia os cookies (e o User-Agent) do navegador logado para a sessão HTTP.
+        Chamar de novo se o navegador renovar a sessão.
+        """
+        for cookie in self.nav.get_cookies():
+            self.session.cookies.set(
+                cookie['name'], cookie['value'],
+                domain=cookie.get('domain'), path=cookie.get('path', '/')
+            )
+        try:
+            self.session.headers['User-Agent'] = self.nav.execute_script("return navigator.userAgent")
+        except Exception as e:
+            logging.info(f"User-Agent do navegador não obtido: {e}")
+
+    def url_do_link(self, elemento):
+        """
+        URL absoluta do link de exportação, ou None se o link só
+        funcionar via JavaScript (nesse caso o clique no navegador é necessário).
+        """
+        href = (elemento.get_attribute('href') or '').strip()
+        if not href or href.startswith(('javascript:', '#')):
+            return None
+        return urljoin(self.nav.current_url, href)
+
+    def baixar(self, url):
+        """
+        Faz o GET da exportação em streaming. Retorna o .zip num bytearray
+        (abra-o com LeitorMemoria) se ele couber em 'limite_memoria', ou o
+        caminho (Path) do .zip temporário gravado em 'pasta_temporaria';
+        o extrator aceita os dois e apaga o temporário depois de extrair.
+        """
+        print(f"Baixando exportação via HTTP: {url}")
+        inicio = time.perf_counter()
+        dados = bytearray()
+        arquivo = caminho = None
+        total = 0
+        try:
+            with self.session.get(url, stream=True, timeout=self.timeout) as resposta:
+                resposta.raise_for_status()
+                tipo = resposta.headers.get('Content-Type', '')
+                if 'text/html' in tipo:
+                    # O Innovaro devolve a tela de login quando a sessão não vale mais
+                    raise SessaoExpirada(f"Resposta HTML em vez do .zip (Content-Type: {tipo}).")
+
+                for bloco in resposta.iter_content(chunk_size=TAMANHO_BLOCO_HTTP):
+                    total += len(bloco)
+                    if total > self.limite_bytes:
+                        raise Exception(f"Download maior que o limite de {self.limite_bytes} bytes.")
+                    if arquivo is None and total > self.limite_memoria:
+                        # Passou do limite da memória: o que já veio vai para o disco
+                        descritor, nome = tempfile.mkstemp(prefix="exportacao-", suffix=".zip",
+                                                           dir=self.pasta_temporaria)
+                        caminho = Path(nome)
+                        arquivo = os.fdopen(descritor, 'wb')
+                        arquivo.write(dados)
+                        dados = None
+                    if arquivo is None:
+                        dados.extend(bloco)
+                    else:
+                        arquivo.write(bloco)
+            if arquivo is not None:
+                arquivo.close()
+        except BaseException:
+            if arquivo is not None:
+                arquivo.close()
+                os.remove(caminho)
+            raise
+
+        duracao = time.perf_counter() - inicio
+        velocidade = total / duracao if duracao > 0 else 0.0
+        destino = f"em {caminho}" if caminho else "na memória"
+        print(f"Download HTTP concluído: {total} bytes {destino} em {duracao:.2f}s ({velocidade / 1024:.1f} KB/s)")
+        return caminho or dados
+
+    def fechar(self):
+        self.session.close()
@@ -1,24 +1,93 @@
 import time
+import hashlib
 import logging
 import os 
-import glob
+import threading
 import zipfile
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from classes.monitor_download import MonitorDownload
+from classes.espera import Espera, valor_confirmado, foco_saiu
+from classes.download_http import DownloadHTTP, LeitorMemoria
+from classes.indice_hash import IndiceHash, USAR_INDICE_HASH_PADRAO, chave_pasta
+
+# Tamanho do bloco usado para copiar cada arquivo do .zip para o disco
+TAMANHO_BLOCO_EXTRACAO = 1024 * 1024
+
+# Limites de segurança na descompactação (proteção contra "zip bombs")
+LIMITE_DESCOMPACTADO_PADRAO = int(os.environ.get("ZIP_LIMITE_DESCOMPACTADO_MB", "2048")) * 1024 * 1024
+LIMITE_TAXA_COMPRESSAO_PADRAO = float(os.environ.get("ZIP_LIMITE_TAXA_COMPRESSAO", "100"))
+
+# 'navegador' (clique + pasta de download) ou 'http' (requests com os cookies da sessão)
+MODO_DOWNLOAD_PADRAO = os.environ.get("DOWNLOAD_MODO", "navegador")
+
+# Workers de extração em paralelo (1 = extração sequencial)
+WORKERS_EXTRACAO_PADRAO = int(os.environ.get("ZIP_WORKERS_EXTRACAO", "1"))
+
+
+class LimiteDescompactacaoExcedido(Exception):
+    pass
+
+
+class _OrcamentoDescompactacao:
+    """
+    Contador, compartilhado entre os workers, do total já descompactado.
+    """
+
+    def __init__(self, limite):
+        self.limite = limite
+        self.consumido = 0
+        self._lock = threading.Lock()
+
+    def consumir(self, quantidade):
+        with self._lock:
+            self.consumido += quantidade
+            if self.consumido > self.limite:
+                raise LimiteDescompactacaoExcedido(
+                    f"Limite total de descompactação ({self.limite} bytes) excedido."
+                )
+
 
 class Download_XML:
 
-    def __init__(self, nav, wait_time=20):
+    def __init__(self, nav, wait_time=20, limite_descompactado=None, limite_taxa_compressao=None,
+                 workers_extracao=None, espera=None, download_path=None, ao_extrair=None, usar_indice_hash=None,
+                 indexador=None, caminho_indice_hash=None):
         """
         Construtor da classe. Recebe o navegador já logado.
         Configura e cria as pastas de download.
+        'ao_extrair', se informado, é chamado com o caminho de cada XML novo
+        assim que ele é gravado (ex: para enfileirar o upload).
+        Com o índice de conteúdo (XML_INDICE_HASH, ativo por padrão) a
+        deduplicação é feita pelo SHA-256 de cada XML, e não só pelo nome.
+        'indexador' (IndexadorNotas) recebe cada XML novo ou alterado para
+        o índice de metadados das notas.
+        'caminho_indice_hash' troca o arquivo global do índice de conteúdo
+        (ex: um por tenant).
         """
         self.nav = nav
+        self.ao_extrair = ao_extrair
+        self.indexador = indexador
+        # Manifesto da execução: caminhos dos XMLs novos gravados pelo extrator
+        self.arquivos_importados = []
+        if usar_indice_hash is None:
+            usar_indice_hash = USAR_INDICE_HASH_PADRAO
+        self.indice_hash = IndiceHash(caminho_indice_hash) if usar_indice_hash else None
+        self.limite_descompactado = limite_descompactado or LIMITE_DESCOMPACTADO_PADRAO
+        self.limite_taxa_compressao = limite_taxa_compressao or LIMITE_TAXA_COMPRESSAO_PADRAO
+        self.workers_extracao = max(1, workers_extracao or WORKERS_EXTRACAO_PADRAO)
         self.wait = WebDriverWait(self.nav, wait_time)
-        self.download_path = Path.home() / "XML- Robô Innovaro/arquivos-xmls"
+        # Compartilha o ajudante de espera do Innovaro, para um relatório único
+        self.espera = espera or Espera(self.nav, timeout=wait_time)
+        # Motor HTTP (criado no primeiro uso e reaproveitado: keep-alive)
+        self.download_http = None
+        self.download_path = Path(download_path) if download_path else Path.home() / "XML- Robô Innovaro/arquivos-xmls"
         os.makedirs(self.download_path, exist_ok=True)
         try:
             print(f"Configurando pasta de download do Chrome para: {self.download_path}")
@@ -35,89 +104,230 @@ class Download_XML:
         print(f"Arquivos XML serão salvos em: {self.pasta_destino_drive}")
 
     
-    def preencher_variaveis_manifesto(self):
+    def _preencher_campo_data(self, xpath, valor, descricao):
+        """
+        Preenche um campo de data e espera o valor ficar registrado.
+        Antes eram sleep(2) depois do clique e sleep(2) depois de digitar.
+        """
+        campo = self.espera.ate(
+            EC.element_to_be_clickable((By.XPATH, xpath)), f"{descricao}: campo", orcamento_antigo=0
+        )
+        campo.click()
+        campo.send_keys(Keys.CONTROL, 'a')
+        campo.send_keys(valor)
+        self.espera.ate(valor_confirmado(campo, valor), f"{descricao}: valor digitado", orcamento_antigo=4)
+        return campo
+
+    def preencher_variaveis_manifesto(self, data_inicial='-1', data_final='-1'):
+        """
+        Preenche o período da consulta. Aceita o formato do Innovaro
+        ('-1' = ontem) ou datas 'dd/mm/aaaa'.
+        Retorna True se os dois campos foram preenchidos.
+        """
         try:
             # --- Data Inicial ---
             print("Preenchendo Data Inicial...")
             xpath_data_inicial = '//*[@id="vars"]/tbody/tr[1]/td[1]/table/tbody/tr/td/table/tbody/tr[1]/td[2]/table/tbody/tr/td[1]/input'
-            campo_data_inicial = self.wait.until(
-                EC.element_to_be_clickable((By.XPATH, xpath_data_inicial))
-            )
-            campo_data_inicial.click()
-            time.sleep(2)
-            campo_data_inicial.send_keys(Keys.CONTROL, 'a')
-            campo_data_inicial.send_keys('-1')
-            time.sleep(2)
+            self._preencher_campo_data(xpath_data_inicial, data_inicial, "Data Inicial")
             
             # --- Data Final ---
             print("Preenchendo Data Final...")
             xpath_data_final = '//*[@id="vars"]/tbody/tr[1]/td[1]/table/tbody/tr/td/table/tbody/tr[3]/td[2]/table/tbody/tr/td[1]/input'
-            campo_data_final = self.wait.until(
-                EC.element_to_be_clickable((By.XPATH, xpath_data_final))
-            )
-            campo_data_final.click()
-            time.sleep(2)
-            campo_data_final.send_keys(Keys.CONTROL, 'a')
-            campo_data_final.send_keys('-1')
-            time.sleep(2)
+            campo_data_final = self._preencher_campo_data(xpath_data_final, data_final, "Data Final")
             campo_data_final.send_keys(Keys.TAB)
-            time.sleep(2)
+            # Antes: sleep(2) após o TAB e sleep(1) no app.py
+            self.espera.ate(foco_saiu(campo_data_final), "Data Final: valor confirmado (TAB)", orcamento_antigo=3)
             
-            print("Datas preenchidas com '-1'.")
+            print(f"Datas preenchidas: '{data_inicial}' a '{data_final}'.")
+            return True
 
         except Exception as e:
             print(f"Ocorreu um erro durante o preenchimento da data inicial e final: {e}")
             logging.error(f"Ocorreu um erro durante o preenchimento da data inicial e final: {e}")
+            return False
     
     
-    def _esperar_download_concluir(self, timeout=60):
+    def _esperar_download_concluir(self, monitor, timeout=60):
         """
         Método auxiliar para esperar o download ser concluído.
-        Verifica a pasta de download por arquivos .zip e .crdownload.
-        """
-        print(f"Aguardando download na pasta: {self.download_path}")
-        end_time = time.time() + timeout
-        
-        while time.time() < end_time:
-            # Converte self.download_path para string para o os.path.join
-            path_str = str(self.download_path)
-            
-            # Procura por arquivos .crdownload (download em andamento do Chrome)
-            crdownload_files = glob.glob(os.path.join(path_str, "*.crdownload"))
-            
-            if not crdownload_files:
-                # Se não houver .crdownload, procura por .zip
-                zip_files = glob.glob(os.path.join(path_str, "*.zip"))
-                if zip_files:
-                    # Encontrou um .zip e nenhum download em andamento
-                    arquivo_zip_path = zip_files[0] # Pega o primeiro .zip encontrado
-                    
-                    time.sleep(2) # Espera extra para o S.O. liberar o arquivo
-                    print(f"Download concluído: {arquivo_zip_path}")
-                    return arquivo_zip_path
-            
-            time.sleep(1) # Espera 1 segundo antes de verificar novamente
-            
-        raise Exception(f"Tempo esgotado ({timeout}s). Nenhum arquivo .zip concluído foi encontrado.")
+        O monitor (iniciado antes do clique) identifica o arquivo exato
+        deste download e retorna assim que ele termina.
+        """
+        return monitor.aguardar(timeout=timeout)
 
     
-    def _descompactar_zip(self, arquivo_zip_path):
+    def _extrair_membro(self, zip_ref, file_info, caminho_destino_completo, orcamento):
+        """
+        Copia um arquivo do .zip para o disco em blocos, sem carregá-lo inteiro
+        na memória. Escreve num arquivo temporário e renomeia ao final, para que
+        um arquivo pela metade nunca apareça com o nome definitivo.
+        O CRC-32 é conferido pelo próprio zipfile ao terminar a leitura;
+        um arquivo corrompido gera BadZipFile e o temporário é descartado.
+        SHA-256 e MD5 são calculados na mesma passada pelos bytes.
+        Retorna (bytes_escritos, sha256, md5).
+        """
+        caminho_temporario = caminho_destino_completo.with_name(caminho_destino_completo.name + ".part")
+        bytes_escritos = 0
+        sha256 = hashlib.sha256()
+        md5 = hashlib.md5()
+        try:
+            with zip_ref.open(file_info) as f_in, open(caminho_temporario, 'wb') as f_out:
+                while True:
+                    bloco = f_in.read(TAMANHO_BLOCO_EXTRACAO)
+                    if not bloco:
+                        break
+                    bytes_escritos += len(bloco)
+                    # O tamanho declarado no .zip pode ser falso; confere o real
+                    orcamento.consumir(len(bloco))
+                    sha256.update(bloco)
+                    md5.update(bloco)
+                    f_out.write(bloco)
+            os.replace(caminho_temporario, caminho_destino_completo)
+        except BaseException:
+            if os.path.exists(caminho_temporario):
+                os.remove(caminho_temporario)
+            raise
+        return bytes_escritos, sha256.hexdigest(), md5.hexdigest()
+
+    def _classificar(self, pasta, nome, file_info, sha256, md5, ja_existia):
+        """
+        Compara o conteúdo recém-extraído (já gravado no disco) com o índice
+        de conteúdo da pasta: 'novo', 'alterado' (mesmo nome, outro
+        conteúdo), 'identico' (o arquivo já estava na pasta com o mesmo
+        conteúdo) ou 'duplicado' (mesmo conteúdo já registrado com outro
+        nome). Um XML que sumiu da pasta (enviado e arquivado, ou pasta
+        apagada) volta como 'novo'. Novos e alterados são registrados.
+        """
+        if not self.indice_hash:
+            return 'novo'
+        registro = self.indice_hash.buscar(pasta, nome)
+        if registro and registro['sha256'] == sha256:
+            situacao = 'identico' if ja_existia else 'novo'
+        elif registro:
+            situacao = 'alterado'
+        elif not ja_existia and self.indice_hash.nome_com_sha(pasta, sha256):
+            situacao = 'duplicado'
+        else:
+            situacao = 'novo'
+        if situacao in ('novo', 'alterado'):
+            self.indice_hash.registrar(pasta, nome, sha256, md5, file_info.file_size, file_info.CRC)
+        return situacao
+
+    def _extrair_lista(self, zip_ref, membros, orcamento):
+        """
+        Extrai uma lista de (file_info, caminho_destino, ja_existia) usando o
+        handle recebido ('ja_existia': o destino já estava na pasta).
+        Um membro corrompido é registrado e a extração segue com os demais.
+        Retorna (importados, corrompidos, bytes_escritos, situacoes), onde
+        'situacoes' conta novos, alterados, idênticos e duplicados.
+        """
+        importados = []
+        corrompidos = []
+        bytes_escritos = 0
+        situacoes = Counter()
+        pasta = chave_pasta(self.pasta_destino_drive) if self.indice_hash else None
+        for file_info, caminho_destino_completo, ja_existia in membros:
+            nome = caminho_destino_completo.name
+            try:
+                escritos, sha256, md5 = self._extrair_membro(zip_ref, file_info, caminho_destino_completo, orcamento)
+                bytes_escritos += escritos
+            except (zipfile.BadZipFile, zlib.error, EOFError) as e:
+                print(f"  -> ERRO em '{file_info.filename}': arquivo corrompido no .zip ({e}).")
+                logging.error(f"Membro corrompido '{file_info.filename}': {e}")
+                corrompidos.append(file_info.filename)
+                continue
+
+            situacao = self._classificar(pasta, nome, file_info, sha256, md5, ja_existia)
+            situacoes[situacao] += 1
+            if situacao == 'duplicado':
+                # Só chega aqui um arquivo que não existia antes desta extração
+                os.remove(caminho_destino_completo)
+                print(f"  -> Ignorando '{nome}': mesmo conteúdo de um XML já importado com outro nome.")
+                continue
+            if situacao == 'identico':
+                print(f"  -> Ignorando '{nome}': conteúdo idêntico ao já importado.")
+                continue
+            if situacao == 'alterado':
+                print(f"  -> Importado '{nome}': conteúdo alterado.")
+            else:
+                print(f"  -> Importado '{nome}': Novo arquivo.")
+            importados.append(caminho_destino_completo)
+            # Indexa antes de enfileirar o upload, que pode arquivar o XML
+            if self.indexador:
+                try:
+                    self.indexador.enviar(caminho_destino_completo)
+                except Exception as e:
+                    # O índice de notas é acessório: nunca interrompe a extração nem o upload
+                    logging.warning(f"Falha ao indexar '{nome}': {e}")
+            if self.ao_extrair:
+                self.ao_extrair(caminho_destino_completo)
+        return importados, corrompidos, bytes_escritos, situacoes
+
+    @staticmethod
+    def _tamanho_no_disco(caminho):
+        try:
+            return os.stat(caminho).st_size
+        except OSError:
+            return None
+
+    @staticmethod
+    def _abrir_origem(origem):
+        """
+        O .zip pode vir de um arquivo no disco (caminho) ou da memória
+        (bytes baixados pelo DownloadHTTP). Cada chamada devolve um handle
+        independente, para que cada worker tenha o seu, sem copiar o buffer.
+        """
+        if isinstance(origem, (bytes, bytearray, memoryview)):
+            return LeitorMemoria(origem)
+        return origem
+
+    def _extrair_faixa(self, arquivo_zip_path, membros, orcamento):
+        """
+        Worker da extração paralela: abre o seu próprio ZipFile (handles de
+        zipfile não podem ser compartilhados entre threads) e extrai a faixa.
+        """
+        with zipfile.ZipFile(self._abrir_origem(arquivo_zip_path), 'r') as zip_ref:
+            return self._extrair_lista(zip_ref, membros, orcamento)
+
+    def _descompactar_zip(self, arquivo_zip_path, workers=None):
         """
         Método auxiliar para descompactar arquivos .zip, pulando os que já existem.
         Informa a contagem de arquivos totais e importados.
+        Os caminhos dos XMLs novos são acrescentados a 'self.arquivos_importados'.
+        'arquivo_zip_path' pode ser o caminho do .zip ou os bytes dele.
+        A extração é feita em streaming e respeita os limites de tamanho total
+        descompactado e de taxa de compressão. Com workers > 1, faixas
+        disjuntas de arquivos são extraídas em paralelo.
         """
+        if workers is None:
+            workers = self.workers_extracao
+        em_memoria = isinstance(arquivo_zip_path, (bytes, bytearray, memoryview))
+        descricao_zip = f"<download HTTP em memória, {len(arquivo_zip_path)} bytes>" if em_memoria else arquivo_zip_path
         try:
-            print(f"Processando '{arquivo_zip_path}' para '{self.pasta_destino_drive}'...")
+            print(f"Processando '{descricao_zip}' para '{self.pasta_destino_drive}'...")
+            inicio = time.perf_counter()
             
             # --- NOVOS CONTADORES ---
             total_arquivos_no_zip = 0
-            arquivos_importados = 0
+            arquivos_recusados = 0
+            orcamento = _OrcamentoDescompactacao(self.limite_descompactado)
+
+            # Uma única leitura da pasta no início, em vez de um 'stat' por
+            # arquivo. Sem o índice de conteúdo, o nome na pasta decide; com
+            # ele, um arquivo que já está na pasta é comparado pelo conteúdo
+            arquivos_existentes = set(os.listdir(self.pasta_destino_drive))
+            pasta = chave_pasta(self.pasta_destino_drive) if self.indice_hash else None
+            # Nomes já decididos neste .zip (nomes repetidos em subpastas do .zip)
+            vistos = set()
+            identicos_crc = 0
             
-            with zipfile.ZipFile(arquivo_zip_path, 'r') as zip_ref:
+            with zipfile.ZipFile(self._abrir_origem(arquivo_zip_path), 'r') as zip_ref:
                 
                 # Pega a lista de todos os arquivos dentro do .zip
                 lista_de_arquivos = zip_ref.infolist()
-                
+
+                # 1. Decide o que será extraído (rápido, só olha o diretório do .zip)
+                a_extrair = []
                 for file_info in lista_de_arquivos:
                     # Pula diretórios (ex: pastas dentro do zip)
                     if file_info.is_dir():
@@ -130,65 +340,163 @@ class Download_XML:
                     # Ignora a estrutura de pastas de dentro do .zip
                     nome_arquivo = Path(file_info.filename).name
                     
-                    # Monta o caminho de destino final
-                    caminho_destino_completo = self.pasta_destino_drive / nome_arquivo
-                    
                     # --- LÓGICA DE VERIFICAÇÃO ---
-                    if caminho_destino_completo.exists():
+                    ja_existia = nome_arquivo in arquivos_existentes
+                    if nome_arquivo in vistos or (ja_existia and not self.indice_hash):
                         print(f"  -> Ignorando '{nome_arquivo}': Arquivo já existe.")
-                    else:
-                        print(f"  -> Importando '{nome_arquivo}': Novo arquivo.")
-                        
-                        # Extrai o arquivo individualmente
-                        # Lendo e escrevendo para "achatar" a estrutura do zip
-                        dados_do_arquivo = zip_ref.read(file_info.filename)
-                        with open(caminho_destino_completo, 'wb') as f_out:
-                            f_out.write(dados_do_arquivo)
-                            
-                        arquivos_importados += 1
+                        continue
+
+                    caminho_destino = self.pasta_destino_drive / nome_arquivo
+                    if ja_existia:
+                        # Mesmo nome, tamanho e CRC-32 do .zip, e o arquivo inteiro
+                        # na pasta: idêntico sem descompactar. Sem o arquivo no
+                        # disco o membro é sempre extraído.
+                        registro = self.indice_hash.buscar(pasta, nome_arquivo)
+                        if (registro and registro['crc32'] == file_info.CRC
+                                and registro['tamanho'] == file_info.file_size
+                                and self._tamanho_no_disco(caminho_destino) == file_info.file_size):
+                            print(f"  -> Ignorando '{nome_arquivo}': conteúdo idêntico ao já importado.")
+                            vistos.add(nome_arquivo)
+                            identicos_crc += 1
+                            continue
+
+                    taxa = file_info.file_size / max(file_info.compress_size, 1)
+                    if taxa > self.limite_taxa_compressao:
+                        print(f"  -> Recusando '{nome_arquivo}': taxa de compressão suspeita ({taxa:.0f}:1).")
+                        arquivos_recusados += 1
+                        continue
+
+                    # Monta o caminho de destino final
+                    a_extrair.append((file_info, caminho_destino, ja_existia))
+                    vistos.add(nome_arquivo)
+
+                # 2. Extrai
+                workers = max(1, min(workers, len(a_extrair)))
+                if workers == 1:
+                    importados, corrompidos, total_descompactado, situacoes = self._extrair_lista(zip_ref, a_extrair, orcamento)
+
+            if workers > 1:
+                print(f"Extraindo {len(a_extrair)} arquivos com {workers} workers...")
+                tamanho_faixa = -(-len(a_extrair) // workers)
+                faixas = [a_extrair[i:i + tamanho_faixa] for i in range(0, len(a_extrair), tamanho_faixa)]
+                importados, corrompidos, total_descompactado, situacoes = [], [], 0, Counter()
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    for imp, corr, total, sit in executor.map(
+                        lambda faixa: self._extrair_faixa(arquivo_zip_path, faixa, orcamento), faixas
+                    ):
+                        importados.extend(imp)
+                        corrompidos.extend(corr)
+                        total_descompactado += total
+                        situacoes.update(sit)
+
+            self.arquivos_importados.extend(importados)
+            arquivos_importados = len(importados)
+            duracao = time.perf_counter() - inicio
             
             # --- RELATÓRIO FINAL ---
             print("="*30)
             print("Relatório de Descompactação:")
             print(f"Total de arquivos no .zip: {total_arquivos_no_zip}")
-            print(f"Arquivos novos importados:  {arquivos_importados}")
-            print(f"Arquivos ignorados (já existem): {total_arquivos_no_zip - arquivos_importados}")
+            print(f"Arquivos novos importados:  {situacoes['novo']}")
+            if self.indice_hash:
+                print(f"Arquivos alterados (mesmo nome, conteúdo novo): {situacoes['alterado']}")
+                print(f"Arquivos idênticos: {identicos_crc + situacoes['identico']} "
+                      f"({identicos_crc} pelo CRC-32, sem descompactar)")
+                print(f"Arquivos duplicados (mesmo conteúdo, outro nome): {situacoes['duplicado']}")
+            print(f"Arquivos ignorados (já existem): {total_arquivos_no_zip - arquivos_importados - arquivos_recusados - len(corrompidos) - situacoes['duplicado']}")
+            if arquivos_recusados:
+                print(f"Arquivos recusados (taxa de compressão): {arquivos_recusados}")
+            if corrompidos:
+                print(f"Arquivos corrompidos (CRC/inflate): {len(corrompidos)}")
+                for nome in corrompidos:
+                    print(f"    - {nome}")
+            print(f"Total descompactado: {total_descompactado / (1024 * 1024):.1f} MB")
+            print(f"Tempo de descompactação: {duracao:.2f}s ({workers} worker(s))")
             print("="*30)
 
-            # Remove o arquivo .zip após descompactar
-            os.remove(arquivo_zip_path)
-            print(f"Arquivo .zip removido: {arquivo_zip_path}")
+            # Remove o arquivo .zip após descompactar (mantém para análise se houve corrompidos)
+            if em_memoria:
+                pass
+            elif corrompidos:
+                print(f"Arquivo .zip mantido para análise: {arquivo_zip_path}")
+            else:
+                os.remove(arquivo_zip_path)
+                print(f"Arquivo .zip removido: {arquivo_zip_path}")
             
             return str(self.pasta_destino_drive) # Retorna o caminho como string
 
         except zipfile.BadZipFile:
-            print(f"Erro: O arquivo '{arquivo_zip_path}' não é um ZIP válido ou está corrompido.")
-            logging.error(f"Erro de BadZipFile em {arquivo_zip_path}")
+            print(f"Erro: O arquivo '{descricao_zip}' não é um ZIP válido ou está corrompido.")
+            logging.error(f"Erro de BadZipFile em {descricao_zip}")
+        except LimiteDescompactacaoExcedido as e:
+            print(f"Erro: Descompactação interrompida. {e}")
+            logging.error(f"Limite de descompactação excedido em {descricao_zip}: {e}")
+            return None
         except Exception as e:
             print(f"Erro ao descompactar o arquivo: {e}")
             logging.error(f"Erro ao descompactar: {e}")
             return None
     
 
-    def download_xml_manifestados(self):
+    def _baixar_via_http(self, botao_download):
+        """
+        Baixa a exportação com o DownloadHTTP (sem o Chrome).
+        Retorna os bytes do .zip (ou o caminho do .zip temporário, se ele
+        for grande), ou None se o link não tiver URL direta.
+        """
+        if self.download_http is None:
+            self.download_http = DownloadHTTP(self.nav, pasta_temporaria=self.download_path)
+        else:
+            self.download_http.sincronizar_cookies()
+
+        url = self.download_http.url_do_link(botao_download)
+        if url is None:
+            print("O link de download não tem URL direta. Usando o navegador.")
+            return None
+        return self.download_http.baixar(url)
+
+    def download_xml_manifestados(self, modo=None):
         """
         Clica no botão de download, espera a conclusão e descompacta os arquivos.
+        Com modo='http' (ou DOWNLOAD_MODO=http), o .zip é baixado direto por
+        HTTP com os cookies da sessão e descompactado da memória (ou de um
+        .zip temporário, se for grande); se isso
+        falhar, volta para o download pelo navegador.
         """
+        if modo is None:
+            modo = MODO_DOWNLOAD_PADRAO
         try:
             # (CORREÇÃO: Corrigi o nome da variável, antes estava 'campo_data_final')
             xpath_download_button = '//*[@id="lid-0"]/tbody/tr[1]/td/a'
             
-            print("Clicando no botão de download...")
             botao_download = self.wait.until(
                 EC.element_to_be_clickable((By.XPATH, xpath_download_button))
             )
+
+            if modo == 'http':
+                try:
+                    conteudo_zip = self._baixar_via_http(botao_download)
+                except Exception as e:
+                    print(f"Falha no download via HTTP ({e}). Usando o navegador.")
+                    logging.warning(f"Falha no download via HTTP: {e}")
+                    conteudo_zip = None
+                if conteudo_zip is not None:
+                    pasta_dos_xmls = self._descompactar_zip(conteudo_zip)
+                    print(f"Processo finalizado. XMLs estão em: {pasta_dos_xmls}")
+                    return pasta_dos_xmls
+
+            print("Clicando no botão de download...")
+
+            # Foto da pasta antes do clique: só o arquivo deste download conta
+            monitor = MonitorDownload(self.nav, self.download_path)
+            monitor.iniciar()
             
             botao_download.click()
             
             # --- Lógica de Download e Extração ---
             
-            # 1. Espera o arquivo .zip aparecer na pasta (ex: C:\Users\TI\arquivos-xmls)
-            arquivo_zip_completo = self._esperar_download_concluir()
+            # 1. Espera o arquivo .zip deste download (ex: C:\Users\TI\arquivos-xmls)
+            arquivo_zip_completo = self._esperar_download_concluir(monitor)
             
             # 2. Descompacta o arquivo na mesma pasta
             pasta_dos_xmls = self._descompactar_zip(arquivo_zip_completo)
@@ -200,4 +508,4 @@ class Download_XML:
         except Exception as e:
             print(f"Ocorreu um erro durante o processo de download e extração: {e}")
             logging.error(f"Ocorreu um erro durante o processo de download e extração: {e}")
-            return None
\ No newline at end of file
+            return None
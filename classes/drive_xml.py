@@ -3,25 +3,170 @@
 import os.path
 from dotenv import load_dotenv
 import os
+import time
+import queue
+import logging
+import threading
+import zipfile
+from datetime import date, datetime
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from google.oauth2 import service_account # <-- MUDANÇA IMPORTANTE
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document
 from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
+from classes.indice_drive import IndiceDrive
+from classes.executor_drive import ExecutorDrive, ERROS_REDE, CONCORRENCIA_MAXIMA_PADRAO
+from classes.sessoes_upload import SessoesUpload, ConsultaSessao
+from classes.particao_drive import MapaPastas, particao_do_xml
+from classes.indice_hash import IndiceHash, USAR_INDICE_HASH_PADRAO
+from classes.pacote_xml import montar_pacote, ler_manifesto, ArquivoRemoto, MIME_PACOTE
 
 load_dotenv()
 
 # O Escopo continua o mesmo
 SCOPES = ['https://www.googleapis.com/auth/drive']
 
+# Threads de upload: por padrão tantas quanto o teto do LimitadorAdaptativo,
+# que decide quantas chamadas rodam de fato (começa em 2 e cresce enquanto
+# o Drive responde bem, cai pela metade a cada erro de cota)
+UPLOAD_WORKERS_PADRAO = int(os.environ.get("DRIVE_UPLOAD_WORKERS", str(CONCORRENCIA_MAXIMA_PADRAO)))
+
+# A partir deste tamanho o arquivo vai por upload retomável, em blocos
+# (o bloco precisa ser múltiplo de 256 KB); abaixo, um único request
+LIMITE_RETOMAVEL_PADRAO = int(float(os.environ.get("DRIVE_RETOMAVEL_MIN_MB", "5")) * 1024 * 1024)
+TAMANHO_BLOCO_UPLOAD_PADRAO = max(1, int(os.environ.get("DRIVE_BLOCO_UPLOAD_MB", "8"))) * 1024 * 1024
+
+# Consulta direcionada: quantos "name = '...'" vão em cada files().list
+NOMES_POR_CONSULTA = int(os.environ.get("DRIVE_NOMES_POR_CONSULTA", "40"))
+# No upload em pipeline, quanto tempo (s) esperar para juntar XMLs num lote de consulta
+ESPERA_LOTE_FILA = float(os.environ.get("DRIVE_ESPERA_LOTE", "0.2"))
+# Tamanho conhecido da pasta do Drive (sem índice local), para estimar o
+# custo da listagem completa; sem ele, a pasta é tratada como muito grande
+TAMANHO_PASTA_ESTIMADO = os.environ.get("DRIVE_TAMANHO_PASTA_ESTIMADO")
+
+# Layout particionado opcional: raiz/AAAA/MM/<CNPJ do emitente>, com as
+# subpastas criadas sob demanda e os IDs guardados num mapa local
+PARTICIONAR_PADRAO = os.environ.get("DRIVE_PARTICIONAR") == "1"
+MIME_PASTA = 'application/vnd.google-apps.folder'
+
+# Novas passadas, na mesma execução, pelos arquivos cujo upload falhou
+REPASSES_PADRAO = int(os.environ.get("DRIVE_REPASSES", "1"))
+
+# Índice local (SQLite) + Changes API no lugar da listagem completa da pasta
+USAR_INDICE_PADRAO = os.environ.get("DRIVE_INDICE", "1") != "0"
+
+# Campos pedidos à Changes API para manter o índice atualizado
+CAMPOS_ALTERACOES = 'nextPageToken, newStartPageToken, changes(fileId, removed, file(id, name, mimeType, parents, size, md5Checksum, trashed))'
+
+# Depois do upload os XMLs saem da pasta de trabalho e vão para um arquivo
+# particionado por data (arquivo/AAAA/MM/DD). Sem XML_PASTA_ARQUIVO, o
+# arquivo fica ao lado da pasta de trabalho (ex: 'XML- Robô Innovaro/arquivo').
+ARQUIVAR_PADRAO = os.environ.get("XML_ARQUIVAR", "1") != "0"
+PASTA_ARQUIVO_PADRAO = os.environ.get("XML_PASTA_ARQUIVO")
+
+# Modo de upload: 'arquivos' (um objeto no Drive por XML) ou 'pacote' (os
+# XMLs da execução, ou do dia com DRIVE_PACOTE_POR=dia, num único .zip com
+# manifesto). Sem DRIVE_PASTA_PACOTES, a cópia local dos pacotes fica ao
+# lado da pasta de trabalho (ex: 'XML- Robô Innovaro/pacotes').
+MODO_UPLOAD_PADRAO = os.environ.get("DRIVE_MODO_UPLOAD", "arquivos")
+PACOTE_POR_PADRAO = os.environ.get("DRIVE_PACOTE_POR", "execucao")
+PASTA_PACOTES_PADRAO = os.environ.get("DRIVE_PASTA_PACOTES")
+
+# Documento de descoberta da API do Drive: um JSON salvo (DRIVE_DISCOVERY_PATH)
+# ou o que acompanha o googleapiclient. É lido uma vez por processo e todos
+# os clientes (o principal e o de cada thread) são montados a partir dele,
+# sem buscar nada na rede.
+DISCOVERY_PATH_PADRAO = os.environ.get("DRIVE_DISCOVERY_PATH")
+_documento_descoberta = None
+_lock_descoberta = threading.Lock()
+
+
+def _carregar_documento_descoberta():
+    global _documento_descoberta
+    with _lock_descoberta:
+        if _documento_descoberta is None:
+            if DISCOVERY_PATH_PADRAO:
+                try:
+                    with open(DISCOVERY_PATH_PADRAO, 'r', encoding='utf-8') as f:
+                        _documento_descoberta = f.read()
+                except OSError as e:
+                    print(f"AVISO: documento de descoberta '{DISCOVERY_PATH_PADRAO}' ignorado: {e}")
+            if _documento_descoberta is None:
+                try:
+                    from googleapiclient.discovery_cache import get_static_doc
+                    _documento_descoberta = get_static_doc('drive', 'v3')
+                except ImportError:
+                    # Versão antiga do googleapiclient, sem os documentos embutidos
+                    pass
+        return _documento_descoberta
+
+
+def construir_servico_drive(credentials):
+    """
+    Cliente do Drive v3 montado a partir do documento de descoberta local.
+    Só se ele não estiver disponível o documento é buscado na rede.
+    """
+    documento = _carregar_documento_descoberta()
+    if documento is None:
+        return build('drive', 'v3', credentials=credentials, cache_discovery=False)
+    return build_from_document(documento, credentials=credentials)
+
 class Drive:
-    def __init__(self):
+    def __init__(self, usar_indice=None, folder_id=None, arquivar=None, pasta_arquivo=None, particionar=None,
+                 usar_indice_hash=None, modo_upload=None, pasta_estado=None, shared_drive_id=None):
         """
         Construtor da classe.
         Autentica no Google Drive usando um Service Account (via .env).
-        Verifica o acesso à pasta de destino usando o ID do .env.
+        Verifica o acesso à pasta de destino usando o ID recebido ou o do .env.
+        Com 'arquivar', cada XML enviado (ou que já estava no Drive) é movido
+        para 'pasta_arquivo'/AAAA/MM/DD, deixando na pasta local só o pendente.
+        Com 'particionar' (ou DRIVE_PARTICIONAR=1), cada XML vai para a
+        subpasta AAAA/MM/<CNPJ do emitente> da pasta de destino.
+        Com o índice de conteúdo (XML_INDICE_HASH), um XML cujo nome já
+        existe no Drive mas cujo MD5 difere do md5Checksum de lá é atualizado.
+        Com modo_upload='pacote' (ou DRIVE_MODO_UPLOAD=pacote), os XMLs vão
+        num único .zip por execução (ou por dia), veja upload_pacote.
+        Com 'pasta_estado', o índice do Drive, o índice de conteúdo, o mapa
+        de pastas e as sessões de upload ficam nessa pasta, exclusivos desta
+        instância (ex: um por tenant), em vez dos arquivos globais.
+        'shared_drive_id' (ou GOOGLE_SHARED_DRIVE_ID) é o Drive compartilhado
+        da pasta de destino, usado pela Changes API.
         """
         print("Iniciando serviço do Google Drive (via Service Account)...")
+        self.pasta_estado = Path(pasta_estado) if pasta_estado else None
+        self.creds = None
+        self.indice = None
+        if usar_indice is None:
+            usar_indice = USAR_INDICE_PADRAO
+        self.arquivar = ARQUIVAR_PADRAO if arquivar is None else arquivar
+        self.pasta_arquivo = pasta_arquivo or PASTA_ARQUIVO_PADRAO
+        self.particionar = PARTICIONAR_PADRAO if particionar is None else particionar
+        self.modo_upload = modo_upload or MODO_UPLOAD_PADRAO
+        self.pacote_por = PACOTE_POR_PADRAO
+        self.mapa_pastas = MapaPastas(self._caminho_estado('pastas_drive.json')) if self.particionar else None
+        # Protege só os caches abaixo; as chamadas à API ficam fora dele
+        self._lock_pastas = threading.Lock()
+        # Pasta do Drive já resolvida para cada XML local
+        self._pasta_por_arquivo = {}
+        # Subpastas sendo resolvidas agora (caminho -> Future): a primeira
+        # thread consulta a API, as demais esperam pelo mesmo resultado
+        self._pastas_pendentes = {}
+        if usar_indice_hash is None:
+            usar_indice_hash = USAR_INDICE_HASH_PADRAO
+        self.indice_hash = IndiceHash(self._caminho_estado('indice_hash.sqlite3')) if usar_indice_hash else None
+        # (pasta_id, nome) -> {'drive_id', 'md5'} vistos nas listagens, sem o índice local
+        self._metadados_drive = {}
+        # ID do Drive compartilhado (opcional), necessário para a Changes API em shared drives
+        self.shared_drive_id = shared_drive_id or os.environ.get("GOOGLE_SHARED_DRIVE_ID")
+        # Cada thread de upload recebe o seu próprio cliente (httplib2 não é thread-safe)
+        self._local = threading.local()
+        # Repetição com backoff e concorrência adaptativa para todas as chamadas
+        self.executor = ExecutorDrive()
+        # URIs das sessões retomáveis, para continuar uploads interrompidos
+        self.sessoes = SessoesUpload(self._caminho_estado('sessoes_upload.json'))
+        # Itens na pasta do Drive vistos na última listagem completa
+        self._tamanho_pasta = int(TAMANHO_PASTA_ESTIMADO) if TAMANHO_PASTA_ESTIMADO else None
         self.service = self._get_drive_service()
         
         if not self.service:
@@ -30,8 +175,8 @@ class Drive:
             return
 
         # --- LÓGICA ATUALIZADA ---
-        # 1. Pega o ID diretamente do .env
-        self.target_folder_id = os.environ.get("GOOGLE_DRIVE_FOLDER_ID")
+        # 1. Pega o ID recebido (ex: um por empresa) ou diretamente do .env
+        self.target_folder_id = folder_id or os.environ.get("GOOGLE_DRIVE_FOLDER_ID")
         
         if not self.target_folder_id:
             print("ERRO: Variável 'GOOGLE_DRIVE_FOLDER_ID' não encontrada no arquivo .env.")
@@ -45,8 +190,15 @@ class Drive:
             self.target_folder_id = None # Invalida o ID para o resto da execução
         else:
             print(f"Acesso à pasta do Drive (ID: {self.target_folder_id}) verificado com sucesso.")
+            if usar_indice:
+                self.indice = IndiceDrive(self._caminho_estado('indice_drive.sqlite3'))
+                print(f"Usando índice local do Drive em: {self.indice.caminho}")
 
 
+    def _caminho_estado(self, nome):
+        # None: cada classe usa o seu caminho global (ou o do .env)
+        return self.pasta_estado / nome if self.pasta_estado else None
+
     def _get_drive_service(self):
         """
         (Este método permanece o mesmo - Autentica via .env)
@@ -69,12 +221,12 @@ class Drive:
                 print("ERRO: GOOGLE_CLIENT_EMAIL ou GOOGLE_PRIVATE_KEY não encontrados no .env")
                 return None
             
-            creds = service_account.Credentials.from_service_account_info(
+            self.creds = service_account.Credentials.from_service_account_info(
                 creds_info, 
                 scopes=SCOPES
             )
             print("Autenticação com Service Account bem-sucedida.")
-            return build('drive', 'v3', credentials=creds, cache_discovery=False)
+            return construir_servico_drive(self.creds)
         except Exception as error:
             print(f"Um erro ocorreu ao construir o serviço do Drive com Service Account: {error}")
             return None
@@ -88,11 +240,11 @@ class Drive:
         if not self.service:
             return False
         try:
-            folder = self.service.files().get(
+            folder = self.executor.executar(self.service.files().get(
                 fileId=folder_id, 
                 fields='id, name',
                 supportsAllDrives=True
-            ).execute()
+            ), 'files.get')
             
             print(f"Pasta encontrada no Drive: '{folder.get('name')}'")
             return True
@@ -108,92 +260,990 @@ class Drive:
             print(f"Erro inesperado ao verificar pasta: {e}")
             return False
 
-    def _get_existing_files_in_drive_folder(self):
+    def _list_drive_folder(self, fields='nextPageToken, files(name)', pasta_id=None, service=None):
         """
-        (Este método permanece o mesmo)
+        Pagina por todos os arquivos (não as subpastas) da pasta de destino
+        ou da subpasta 'pasta_id'.
+        Retorna a lista de dicts com os campos pedidos.
         """
-        existing_files = set()
-        if not self.target_folder_id:
-            return existing_files
-        
+        arquivos = []
         page_token = None
-        try:
+        while True:
+            query = f"'{pasta_id or self.target_folder_id}' in parents and trashed=false and mimeType != '{MIME_PASTA}'"
+            response = self.executor.executar((service or self.service).files().list(
+                q=query,
+                corpora="allDrives", 
+                includeItemsFromAllDrives=True, 
+                supportsAllDrives=True, 
+                spaces='drive',
+                fields=fields,
+                pageSize=1000,
+                pageToken=page_token
+            ), 'files.list')
+            print(f"DEBUG: A API retornou {len(response.get('files', []))} arquivos nesta página.")
+            arquivos.extend(response.get('files', []))
+            page_token = response.get('nextPageToken', None)
+            if page_token is None:
+                break
+        return arquivos
+
+    @staticmethod
+    def _escapar_nome(nome):
+        # Aspas simples e barras invertidas precisam de escape na query do Drive
+        return nome.replace('\\', '\\\\').replace("'", "\\'")
+
+    def _buscar_nomes_no_drive(self, nomes, pasta_id=None, service=None):
+        """
+        Verifica só os nomes candidatos, com várias cláusulas
+        name = '...' combinadas por 'or' em cada files().list.
+        Retorna o conjunto dos nomes que já existem na pasta.
+        """
+        pasta_id = pasta_id or self.target_folder_id
+        nomes = sorted(set(nomes))
+        encontrados = set()
+        for i in range(0, len(nomes), NOMES_POR_CONSULTA):
+            clausulas = " or ".join(f"name = '{self._escapar_nome(nome)}'" for nome in nomes[i:i + NOMES_POR_CONSULTA])
+            query = f"'{pasta_id}' in parents and trashed=false and ({clausulas})"
+            page_token = None
             while True:
-                query = f"'{self.target_folder_id}' in parents and trashed=false"
-                response = self.service.files().list(
+                response = self.executor.executar((service or self.service).files().list(
                     q=query,
-                    corpora="allDrives", 
-                    includeItemsFromAllDrives=True, 
-                    supportsAllDrives=True, 
+                    corpora="allDrives",
+                    includeItemsFromAllDrives=True,
+                    supportsAllDrives=True,
                     spaces='drive',
-                    fields='nextPageToken, files(name)',
+                    fields='nextPageToken, files(id, name, md5Checksum)',
+                    pageSize=1000,
                     pageToken=page_token
-                ).execute()
-                print(f"DEBUG: A API retornou {len(response.get('files', []))} arquivos nesta página.")
-                for file in response.get('files', []):
-                    existing_files.add(file.get('name'))
-                page_token = response.get('nextPageToken', None)
+                ), 'files.list.nomes')
+                for f in response.get('files', []):
+                    encontrados.add(f.get('name'))
+                    self._metadados_drive[(pasta_id, f.get('name'))] = {'drive_id': f.get('id'), 'md5': f.get('md5Checksum')}
+                page_token = response.get('nextPageToken')
                 if page_token is None:
                     break
+        return encontrados
+
+    def _consulta_direcionada_compensa(self, candidatos, pasta_id=None):
+        """
+        Estimativa de custo em chamadas: a consulta direcionada faz uma
+        chamada a cada NOMES_POR_CONSULTA candidatos; a listagem completa,
+        uma a cada 1000 itens da pasta.
+        """
+        chamadas_direcionadas = -(-len(candidatos) // NOMES_POR_CONSULTA)
+        if self._tamanho_pasta is None or (pasta_id or self.target_folder_id) != self.target_folder_id:
+            return True
+        chamadas_listagem = max(1, -(-self._tamanho_pasta // 1000))
+        return chamadas_direcionadas < chamadas_listagem
+
+    def _buscar_ou_criar_pasta(self, nome, pai_id, service):
+        """
+        ID da subpasta 'nome' dentro de 'pai_id', criando-a se não existir.
+        Retorna (pasta_id, ja_existia).
+        """
+        query = (f"'{pai_id}' in parents and trashed=false and mimeType = '{MIME_PASTA}' "
+                 f"and name = '{self._escapar_nome(nome)}'")
+        response = self.executor.executar(service.files().list(
+            q=query,
+            corpora="allDrives",
+            includeItemsFromAllDrives=True,
+            supportsAllDrives=True,
+            spaces='drive',
+            fields='files(id)',
+            pageSize=1
+        ), 'files.list.pasta')
+        if response.get('files'):
+            return response['files'][0]['id'], True
+        criada = self.executor.executar(service.files().create(
+            body={'name': nome, 'mimeType': MIME_PASTA, 'parents': [pai_id]},
+            fields='id',
+            supportsAllDrives=True
+        ), 'files.create.pasta', ja_aplicada=lambda: self._procurar_criado(nome, pai_id, service, mimetype=MIME_PASTA))
+        print(f"  -> Pasta criada no Drive: '{nome}'")
+        return criada['id'], False
+
+    def _pasta_do_arquivo(self, local_file, service=None):
+        """
+        Pasta do Drive onde o XML deve ficar: a pasta de destino ou, com o
+        layout particionado, a subpasta AAAA/MM/<CNPJ> derivada da chave de
+        acesso. As subpastas são criadas na primeira vez e depois vêm do
+        mapa local, sem chamadas à API. Sem chave, o XML fica na raiz.
+        """
+        if not self.particionar:
+            return self.target_folder_id
+        local_file = Path(local_file)
+        with self._lock_pastas:
+            if local_file in self._pasta_por_arquivo:
+                return self._pasta_por_arquivo[local_file]
+        partes = particao_do_xml(local_file)
+        pasta_id = self.target_folder_id
+        caminho = self.target_folder_id
+        for nome in partes or ():
+            caminho = f"{caminho}/{nome}"
+            pasta_id = self.mapa_pastas.get(caminho) or self._resolver_subpasta(nome, pasta_id, caminho, service)
+        with self._lock_pastas:
+            self._pasta_por_arquivo[local_file] = pasta_id
+        return pasta_id
+
+    def _resolver_subpasta(self, nome, pai_id, caminho, service=None):
+        """
+        Busca ou cria uma subpasta que ainda não está no mapa. Cada caminho
+        é resolvido por uma thread só; as outras que precisarem dele esperam
+        o resultado, e as de outras subpastas seguem sem esperar.
+        """
+        with self._lock_pastas:
+            subpasta_id = self.mapa_pastas.get(caminho)
+            if subpasta_id:
+                return subpasta_id
+            futuro = self._pastas_pendentes.get(caminho)
+            dono = futuro is None
+            if dono:
+                futuro = self._pastas_pendentes[caminho] = Future()
+        if not dono:
+            return futuro.result()
+
+        try:
+            subpasta_id, ja_existia = self._buscar_ou_criar_pasta(nome, pai_id, service or self.service)
+            if ja_existia and self.indice and caminho.count('/') == 3:
+                # Subpasta criada fora desta máquina: o índice ainda não a conhece
+                self.indice.substituir_pasta(subpasta_id, self._list_drive_folder(
+                    fields='nextPageToken, files(id, name, size, md5Checksum)',
+                    pasta_id=subpasta_id, service=service
+                ))
+            # Só entra no mapa depois do índice, para quem consultar o índice em seguida
+            self.mapa_pastas.set(caminho, subpasta_id)
+        except BaseException as error:
+            with self._lock_pastas:
+                del self._pastas_pendentes[caminho]
+            futuro.set_exception(error)
+            raise
+        with self._lock_pastas:
+            del self._pastas_pendentes[caminho]
+        futuro.set_result(subpasta_id)
+        return subpasta_id
+
+    def _pastas_monitoradas(self):
+        """
+        Pastas cujo conteúdo o índice local acompanha: a de destino e,
+        no layout particionado, as subpastas finais já conhecidas.
+        """
+        pastas = {self.target_folder_id}
+        if self.particionar:
+            pastas.update(self.mapa_pastas.folhas(self.target_folder_id))
+        return pastas
+
+    def _get_start_page_token(self):
+        kwargs = {'supportsAllDrives': True}
+        if self.shared_drive_id:
+            kwargs['driveId'] = self.shared_drive_id
+        return self.executor.executar(
+            self.service.changes().getStartPageToken(**kwargs), 'changes.getStartPageToken'
+        ).get('startPageToken')
+
+    def reconciliar_indice(self):
+        """
+        Reconciliação completa: lista a pasta inteira e reescreve o índice local.
+        O token da Changes API é obtido ANTES da listagem, para que nada que
+        mude durante a listagem seja perdido na próxima atualização incremental.
+        """
+        print("Reconciliando índice local com a listagem completa da pasta do Drive...")
+        token = self._get_start_page_token()
+        total = 0
+        for pasta_id in self._pastas_monitoradas():
+            arquivos = self._list_drive_folder(fields='nextPageToken, files(id, name, size, md5Checksum)', pasta_id=pasta_id)
+            self.indice.substituir_pasta(pasta_id, arquivos)
+            total += len(arquivos)
+        self.indice.set_page_token(self.target_folder_id, token)
+        print(f"Índice reconciliado: {total} arquivos na pasta do Drive.")
+
+    def _atualizar_indice(self):
+        """
+        Aplica ao índice local apenas as alterações feitas no Drive desde a
+        última execução (changes.list a partir do pageToken salvo).
+        """
+        page_token = self.indice.get_page_token(self.target_folder_id)
+        alteracoes = 0
+        kwargs = {
+            'spaces': 'drive',
+            'includeItemsFromAllDrives': True,
+            'supportsAllDrives': True,
+            'pageSize': 1000,
+            'fields': CAMPOS_ALTERACOES,
+        }
+        if self.shared_drive_id:
+            kwargs['driveId'] = self.shared_drive_id
+
+        monitoradas = self._pastas_monitoradas()
+        while page_token:
+            response = self.executor.executar(
+                self.service.changes().list(pageToken=page_token, **kwargs), 'changes.list'
+            )
+            for change in response.get('changes', []):
+                alteracoes += 1
+                file = change.get('file') or {}
+                pasta_id = next((p for p in file.get('parents', []) if p in monitoradas), None)
+                if change.get('removed') or file.get('trashed') or not pasta_id or file.get('mimeType') == MIME_PASTA:
+                    self.indice.remover(change.get('fileId'))
+                else:
+                    self.indice.registrar(
+                        file.get('id'), file.get('name'), pasta_id,
+                        int(file['size']) if file.get('size') else None, file.get('md5Checksum')
+                    )
+            if 'newStartPageToken' in response:
+                self.indice.set_page_token(self.target_folder_id, response['newStartPageToken'])
+            page_token = response.get('nextPageToken')
+
+        print(f"Índice local atualizado via Changes API: {alteracoes} alterações aplicadas.")
+
+    def _get_existing_files_in_drive_folder(self, reconciliar=False, candidatos=None, pasta_id=None, sincronizar=True,
+                                            service=None):
+        """
+        Retorna os nomes já existentes na pasta de destino (ou na subpasta
+        'pasta_id' do layout particionado).
+        Com o índice local ativo, devolve uma visão do SQLite atualizada
+        incrementalmente ('sincronizar=False' pula a atualização, já feita
+        para outra subpasta). Sem ele, se os 'candidatos' (nomes locais)
+        forem poucos perto do tamanho da pasta, consulta só esses nomes;
+        senão lista a pasta inteira como antes.
+        """
+        existing_files = set()
+        if not self.target_folder_id:
+            return existing_files
+        pasta_id = pasta_id or self.target_folder_id
+        
+        try:
+            if self.indice:
+                if sincronizar:
+                    if reconciliar or not self.indice.get_page_token(self.target_folder_id):
+                        self.reconciliar_indice()
+                    else:
+                        self._atualizar_indice()
+                return self.indice.nomes_da_pasta(pasta_id)
+
+            if candidatos is not None and self._consulta_direcionada_compensa(candidatos, pasta_id):
+                existing_files = self._buscar_nomes_no_drive(candidatos, pasta_id, service)
+                print(f"Consulta direcionada: {len(existing_files)} de {len(candidatos)} arquivos já existem no Google Drive.")
+                return existing_files
+
+            for file in self._list_drive_folder(fields='nextPageToken, files(id, name, md5Checksum)',
+                                                pasta_id=pasta_id, service=service):
+                existing_files.add(file.get('name'))
+                self._metadados_drive[(pasta_id, file.get('name'))] = {'drive_id': file.get('id'), 'md5': file.get('md5Checksum')}
+            if pasta_id == self.target_folder_id:
+                self._tamanho_pasta = len(existing_files)
             print(f"Encontrados {len(existing_files)} arquivos .xml existentes no Google Drive.")
             return existing_files
-        except HttpError as error:
+        except (HttpError, *ERROS_REDE) as error:
             print(f'Um erro ocorreu ao listar arquivos do Drive: {error}')
+            if self.indice:
+                # Uma visão desatualizada do índice é bem mais segura que uma
+                # vazia: vazia, todo XML pareceria novo e seria enviado de novo
+                print("Usando o índice local sem a atualização desta execução.")
+                return self.indice.nomes_da_pasta(pasta_id)
             return existing_files
 
-    def upload_files(self, local_folder_path):
+    def _get_thread_service(self):
+        """
+        Retorna um cliente do Drive exclusivo da thread atual.
+        O 'self.service' usa um único httplib2.Http, que não pode ser
+        compartilhado entre threads; por isso cada worker constrói o seu.
+        """
+        service = getattr(self._local, "service", None)
+        if service is None:
+            service = construir_servico_drive(self.creds)
+            self._local.service = service
+        return service
+
+    def _requisicao_upload(self, service, local_file, pasta_id, media, drive_id=None):
+        """
+        files().create para um arquivo novo ou files().update (só o
+        conteúdo) para um arquivo que já existe no Drive com outro conteúdo.
+        """
+        if drive_id:
+            return service.files().update(
+                fileId=drive_id,
+                media_body=media,
+                fields='id, size, md5Checksum',
+                supportsAllDrives=True
+            )
+        return service.files().create(
+            body={'name': local_file.name, 'parents': [pasta_id]},
+            media_body=media,
+            fields='id, size, md5Checksum',
+            supportsAllDrives=True
+        )
+
+    def _procurar_criado(self, nome, pasta_id, service=None, tamanho=None, mimetype=None):
+        """
+        Procura na pasta um arquivo com este nome (e tamanho/tipo, se
+        informados): confere se um files().create que falhou depois de
+        enviado já tinha criado o arquivo. Retorna o dict dele ou None.
+        """
+        query = f"'{pasta_id}' in parents and trashed=false and name = '{self._escapar_nome(nome)}'"
+        if mimetype:
+            query += f" and mimeType = '{mimetype}'"
+        response = self.executor.executar((service or self.service).files().list(
+            q=query,
+            corpora="allDrives",
+            includeItemsFromAllDrives=True,
+            supportsAllDrives=True,
+            spaces='drive',
+            fields='files(id, size, md5Checksum)',
+            pageSize=10
+        ), 'files.list.criado')
+        for arquivo in response.get('files', []):
+            if tamanho is None or int(arquivo.get('size') or -1) == tamanho:
+                return arquivo
+        return None
+
+    def _verificador_de_criacao(self, local_file, pasta_id, service=None):
+        tamanho = Path(local_file).stat().st_size
+        return lambda: self._procurar_criado(Path(local_file).name, pasta_id, service, tamanho)
+
+    def _upload_file(self, local_file, service, drive_id=None):
+        """
+        Envia um único arquivo para a pasta de destino (ou para a subpasta
+        dele, no layout particionado). Com 'drive_id', substitui o conteúdo
+        desse arquivo no Drive.
+        Arquivos grandes vão por _upload_retomavel.
+        Retorna o tamanho em bytes do arquivo enviado.
+        """
+        pasta_id = self._pasta_do_arquivo(local_file, service)
+        if local_file.stat().st_size >= LIMITE_RETOMAVEL_PADRAO:
+            criado = self._upload_retomavel(local_file, service, pasta_id=pasta_id, drive_id=drive_id)
+            return self._registrar_enviado(local_file, criado, pasta_id)
+
+        media = MediaFileUpload(local_file, mimetype='text/xml')
+
+        try:
+            criado = self.executor.executar(
+                self._requisicao_upload(service, local_file, pasta_id, media, drive_id),
+                'files.update' if drive_id else 'files.create',
+                ja_aplicada=None if drive_id else self._verificador_de_criacao(local_file, pasta_id, service)
+            )
+        finally:
+            # Libera o arquivo para que ele possa ser movido para o arquivo
+            media.stream().close()
+        return self._registrar_enviado(local_file, criado, pasta_id)
+
+    def _upload_retomavel(self, local_file, service, mimetype='text/xml', pasta_id=None, drive_id=None):
+        """
+        Upload retomável em blocos de DRIVE_BLOCO_UPLOAD_MB. A URI da sessão
+        é gravada após o primeiro bloco; se a execução cair, a próxima
+        reabre a sessão e o servidor informa de qual byte continuar.
+        Retorna o dict do arquivo criado no Drive.
+        """
+        pasta_id = pasta_id or self.target_folder_id
+        chave = self.sessoes.chave(local_file, drive_id or pasta_id)
+        uri_salva = self.sessoes.get(chave)
+        tamanho_bloco = -(-TAMANHO_BLOCO_UPLOAD_PADRAO // (256 * 1024)) * 256 * 1024
+        media = MediaFileUpload(local_file, mimetype=mimetype, resumable=True, chunksize=tamanho_bloco)
+        try:
+            requisicao = self._requisicao_upload(service, local_file, pasta_id, media, drive_id)
+            consulta = ConsultaSessao(requisicao)
+
+            def ja_enviado():
+                # Antes de reenviar um bloco que falhou: o servidor diz o que chegou
+                criado = self.executor.executar(consulta, 'files.create.sessao')
+                return (None, criado) if criado is not None else None
+
+            criado = None
+            try:
+                if uri_salva:
+                    print(f"  -> Retomando upload de '{local_file.name}' da sessão salva...")
+                    requisicao.resumable_uri = uri_salva
+                    criado = self.executor.executar(consulta, 'files.create.sessao')
+                while criado is None:
+                    status, criado = self.executor.executar(
+                        requisicao, 'files.create.bloco', metodo='next_chunk', ja_aplicada=ja_enviado
+                    )
+                    if requisicao.resumable_uri:
+                        self.sessoes.set(chave, requisicao.resumable_uri)
+                    if status is not None:
+                        print(f"    '{local_file.name}': {status.resumable_progress / status.total_size:.0%} enviado")
+            except HttpError as error:
+                if uri_salva and error.resp.status in (404, 410):
+                    # Sessão expirada no servidor: começa de novo do zero
+                    print(f"  -> Sessão de upload expirada para '{local_file.name}', reiniciando.")
+                    self.sessoes.remover(chave)
+                    return self._upload_retomavel(local_file, service, mimetype, pasta_id, drive_id)
+                raise
+        finally:
+            media.stream().close()
+
+        self.sessoes.remover(chave)
+        return criado
+
+    def _registrar_enviado(self, local_file, criado, pasta_id=None):
+        """
+        Registra no índice local um arquivo recém-criado no Drive.
+        Retorna o tamanho local em bytes.
+        """
+        tamanho = local_file.stat().st_size
+        pasta_id = pasta_id or self.target_folder_id
+        if self.indice:
+            self.indice.registrar(
+                criado.get('id'), local_file.name, pasta_id, tamanho, criado.get('md5Checksum')
+            )
+        else:
+            self._metadados_drive[(pasta_id, local_file.name)] = {'drive_id': criado.get('id'), 'md5': criado.get('md5Checksum')}
+        return tamanho
+
+    def _upload_file_thread(self, local_file, drive_id=None):
+        """
+        Versão de _upload_file usada pelos workers do ThreadPoolExecutor.
+        """
+        return self._upload_file(local_file, self._get_thread_service(), drive_id)
+
+    def _alterado_no_drive(self, local_file, pasta_id):
+        """
+        Para um XML cujo nome já existe no Drive: compara o MD5 local (do
+        índice de conteúdo) com o md5Checksum do Drive. Retorna o ID do
+        arquivo no Drive se o conteúdo mudou, ou None se é idêntico ou se
+        não há como comparar.
+        """
+        if not self.indice_hash:
+            return None
+        if self.indice:
+            info = self.indice.buscar(local_file.name, pasta_id)
+        else:
+            info = self._metadados_drive.get((pasta_id, local_file.name))
+        if not info or not info.get('md5'):
+            return None
+        if self.indice_hash.md5_local(local_file) == info['md5']:
+            return None
+        return info['drive_id']
+
+    def _arquivar(self, local_file):
+        """
+        Move um XML já presente no Drive para o arquivo local particionado
+        pela data de hoje (AAAA/MM/DD). Uma falha aqui não desfaz o upload:
+        o arquivo só fica na pasta de trabalho e é ignorado na próxima vez.
+        """
+        if not self.arquivar:
+            return
+        local_file = Path(local_file)
+        base = Path(self.pasta_arquivo) if self.pasta_arquivo else local_file.parent.parent / "arquivo"
+        hoje = date.today()
+        destino = base / f"{hoje:%Y}" / f"{hoje:%m}" / f"{hoje:%d}"
+        try:
+            os.makedirs(destino, exist_ok=True)
+            os.replace(local_file, destino / local_file.name)
+        except OSError as e:
+            print(f"    AVISO: não foi possível arquivar '{local_file.name}': {e}")
+
+    def upload_files(self, local_folder_path, max_workers=None, reconciliar=None, arquivos=None):
         """
         Método público para fazer upload, pulando arquivos que já existem.
+        Com max_workers > 1 os uploads são feitos em paralelo, cada worker
+        com o seu próprio cliente do Drive.
+        Com reconciliar=True (ou DRIVE_INDICE_RECONCILIAR=1) o índice local é
+        refeito a partir da listagem completa da pasta.
+        'arquivos' é o manifesto da execução (os XMLs novos devolvidos pelo
+        extrator); sem ele, a pasta local é varrida (*.xml), o que com o
+        arquivamento ativo só encontra o que ficou pendente.
+        Retorna um dict com o resumo do upload (ou None se não foi possível).
         """
         if not self.target_folder_id:
             print("Erro: ID da pasta de destino no Drive não foi definido ou falhou na verificação. Abortando upload.")
-            return
+            return None
+
+        if max_workers is None:
+            max_workers = UPLOAD_WORKERS_PADRAO
+        max_workers = max(1, max_workers)
 
         print(f"Verificando arquivos em '{local_folder_path}' para upload no Drive...")
         
-        # 1. Busca a lista de arquivos (que pode estar atrasada/cacheada)
-        drive_files = self._get_existing_files_in_drive_folder()
-        
-        local_path = Path(local_folder_path)
-        local_xml_files = list(local_path.glob("*.xml"))
+        if reconciliar is None:
+            reconciliar = os.environ.get("DRIVE_INDICE_RECONCILIAR") == "1"
+
+        if arquivos is not None:
+            local_xml_files = [Path(arquivo) for arquivo in arquivos]
+        else:
+            local_xml_files = list(Path(local_folder_path).glob("*.xml"))
 
         if not local_xml_files:
-            print("Nenhum arquivo .xml encontrado na pasta local para upload.")
-            return
+            if arquivos is not None:
+                print("Nenhum XML novo nesta execução para upload.")
+            else:
+                print("Nenhum arquivo .xml encontrado na pasta local para upload.")
+            return {'locais': 0, 'enviados': 0, 'atualizados': 0, 'ignorados': 0, 'erros': 0, 'bytes': 0, 'duracao': 0.0}
+
+        if self.modo_upload == 'pacote':
+            return self.upload_pacote(local_xml_files)
 
         total_local_files = len(local_xml_files)
         files_uploaded = 0
-        
+        files_updated = 0
+        bytes_uploaded = 0
+        falhas = []
+        # XML -> ID no Drive, para os que existem lá com outro conteúdo
+        atualizacoes = {}
+
+        # 1. Busca a lista de arquivos (índice local, consulta direcionada ou listagem
+        # completa), por subpasta no layout particionado
+        grupos, sem_pasta = self._agrupar_por_pasta(local_xml_files)
+        existentes = {}
+        for pasta_id, grupo in grupos.items():
+            existentes[pasta_id] = self._get_existing_files_in_drive_folder(
+                reconciliar=reconciliar, candidatos=[f.name for f in grupo],
+                pasta_id=pasta_id, sincronizar=not existentes
+            )
+
+        pendentes = []
+        for pasta_id, grupo in grupos.items():
+            drive_files = existentes[pasta_id]
+            for local_file in grupo:
+                local_file_name = local_file.name
+
+                drive_id = self._alterado_no_drive(local_file, pasta_id) if local_file_name in drive_files else None
+                if drive_id:
+                    print(f"  -> '{local_file_name}' mudou: o conteúdo será atualizado no Drive.")
+                    atualizacoes[local_file] = drive_id
+                    pendentes.append(local_file)
+                elif local_file_name in drive_files:
+                    print(f"  -> Ignorando '{local_file_name}': Já existe (cache local ou API).")
+                    self._arquivar(local_file)
+                else:
+                    pendentes.append(local_file)
+                    # Evita enviar duas vezes o mesmo nome na mesma execução
+                    drive_files.add(local_file_name)
+
+        inicio = time.perf_counter()
+
+        if max_workers == 1:
+            for local_file in pendentes:
+                print(f"  -> Fazendo upload de '{local_file.name}'...")
+                try:
+                    bytes_uploaded += self._upload_file(local_file, self.service, atualizacoes.get(local_file))
+                    if local_file in atualizacoes:
+                        files_updated += 1
+                    else:
+                        files_uploaded += 1
+                    self._arquivar(local_file)
+                except (HttpError, *ERROS_REDE) as error:
+                    falhas.append(local_file)
+                    print(f"    ERRO ao fazer upload de '{local_file.name}': {error}")
+        else:
+            print(f"Enviando {len(pendentes)} arquivos com {max_workers} uploads simultâneos...")
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futuros = {
+                    executor.submit(self._upload_file_thread, local_file, atualizacoes.get(local_file)): local_file
+                    for local_file in pendentes
+                }
+                for futuro in as_completed(futuros):
+                    local_file = futuros[futuro]
+                    try:
+                        bytes_uploaded += futuro.result()
+                        if local_file in atualizacoes:
+                            files_updated += 1
+                        else:
+                            files_uploaded += 1
+                        print(f"  -> Upload concluído: '{local_file.name}'")
+                        self._arquivar(local_file)
+                    except (HttpError, *ERROS_REDE) as error:
+                        falhas.append(local_file)
+                        print(f"    ERRO ao fazer upload de '{local_file.name}': {error}")
+
+        enviados, atualizados, enviados_bytes, falhas = self._repassar_falhas(falhas, atualizacoes)
+        files_uploaded += enviados
+        files_updated += atualizados
+        bytes_uploaded += enviados_bytes
+
+        duracao = time.perf_counter() - inicio
+        return self._relatorio_upload(
+            total_local_files, files_uploaded, total_local_files - len(pendentes) - len(sem_pasta),
+            len(falhas) + len(sem_pasta), bytes_uploaded, duracao, max_workers, files_updated
+        )
+
+    def _agrupar_por_pasta(self, local_xml_files):
+        """
+        Separa os arquivos pela pasta do Drive de destino (uma só, fora do
+        layout particionado). Retorna (grupos, arquivos_sem_pasta), onde os
+        sem pasta são os que não puderam ter a subpasta resolvida.
+        """
+        grupos = {}
+        sem_pasta = []
         for local_file in local_xml_files:
-            local_file_name = local_file.name
-            
-            if local_file_name in drive_files:
-                print(f"  -> Ignorando '{local_file_name}': Já existe (cache local ou API).")
-            else:
-                print(f"  -> Fazendo upload de '{local_file_name}'...")
+            try:
+                pasta_id = self._pasta_do_arquivo(local_file)
+            except (HttpError, *ERROS_REDE) as error:
+                print(f"    ERRO ao resolver a pasta de '{local_file.name}' no Drive: {error}")
+                sem_pasta.append(local_file)
+                continue
+            grupos.setdefault(pasta_id, []).append(local_file)
+        return grupos, sem_pasta
+
+    def _repassar_falhas(self, falhas, atualizacoes=None, repasses=None):
+        """
+        Tenta de novo, na mesma execução, os arquivos cujo upload falhou
+        mesmo depois das repetições do ExecutorDrive (ex: uma rajada longa
+        de 429). Cada passada espera um pouco antes de começar.
+        'atualizacoes' (XML -> ID no Drive) marca os que são atualização.
+        Retorna (enviados, atualizados, bytes, arquivos_que_continuam_com_falha).
+        """
+        if repasses is None:
+            repasses = REPASSES_PADRAO
+        atualizacoes = atualizacoes or {}
+        enviados = atualizados = bytes_enviados = 0
+        for passada in range(1, repasses + 1):
+            if not falhas:
+                break
+            espera = self.executor.espera_maxima / 4
+            print(f"Nova passada {passada}/{repasses} por {len(falhas)} arquivo(s) com erro em {espera:.0f}s...")
+            time.sleep(espera)
+            restantes = []
+            for local_file in falhas:
                 try:
-                    file_metadata = {'name': local_file_name, 'parents': [self.target_folder_id]}
-                    media = MediaFileUpload(local_file, mimetype='text/xml')
-                    
-                    self.service.files().create(
-                        body=file_metadata,
-                        media_body=media,
-                        fields='id',
-                        supportsAllDrives=True
-                    ).execute()
-                    
-                    files_uploaded += 1
-                    
-                    drive_files.add(local_file_name)
+                    bytes_enviados += self._upload_file(local_file, self.service, atualizacoes.get(local_file))
+                    if local_file in atualizacoes:
+                        atualizados += 1
+                    else:
+                        enviados += 1
+                    print(f"  -> Upload concluído na nova passada: '{local_file.name}'")
+                    self._arquivar(local_file)
+                except (HttpError, *ERROS_REDE) as error:
+                    restantes.append(local_file)
+                    print(f"    ERRO ao fazer upload de '{local_file.name}': {error}")
+            falhas = restantes
+        return enviados, atualizados, bytes_enviados, falhas
 
-                except HttpError as error:
-                    print(f"    ERRO ao fazer upload de '{local_file_name}': {error}")
+    def _relatorio_upload(self, total_local_files, files_uploaded, files_skipped, files_failed,
+                          bytes_uploaded, duracao, max_workers, files_updated=0):
+        """
+        Imprime o relatório final de upload e retorna o resumo em um dict.
+        """
+        arquivos_por_segundo = (files_uploaded + files_updated) / duracao if duracao > 0 else 0.0
+        bytes_por_segundo = bytes_uploaded / duracao if duracao > 0 else 0.0
         
-        # (Relatório final ... permanece o mesmo)
         print("="*30)
         print("Relatório de Upload para o Google Drive:")
         print(f"Total de arquivos .xml na pasta local: {total_local_files}")
         print(f"Arquivos novos enviados para o Drive:  {files_uploaded}")
-        print(f"Arquivos ignorados (já existem): {total_local_files - files_uploaded}")
+        print(f"Arquivos alterados atualizados no Drive: {files_updated}")
+        print(f"Arquivos ignorados (idênticos aos do Drive): {files_skipped}")
+        print(f"Arquivos com erro no upload: {files_failed}")
+        print(f"Uploads simultâneos: {max_workers}")
+        print(f"Tempo de upload: {duracao:.2f}s")
+        self.executor.relatorio()
+        print(f"Vazão: {arquivos_por_segundo:.2f} arquivos/s, {bytes_por_segundo / 1024:.1f} KB/s ({bytes_por_segundo:.0f} bytes/s)")
         print("="*30)
-        
\ No newline at end of file
+
+        return {
+            'locais': total_local_files,
+            'enviados': files_uploaded,
+            'atualizados': files_updated,
+            'ignorados': files_skipped,
+            'erros': files_failed,
+            'bytes': bytes_uploaded,
+            'duracao': duracao,
+        }
+
+    def upload_from_queue(self, fila, max_workers=None):
+        """
+        Consome caminhos de XML de uma fila (queue.Queue) enquanto eles são
+        extraídos, com 'max_workers' uploads simultâneos. Cada worker para ao
+        receber None; quem produz deve colocar um None por worker no final.
+        Retorna o mesmo resumo de upload_files.
+        """
+        if max_workers is None:
+            max_workers = UPLOAD_WORKERS_PADRAO
+        max_workers = max(1, max_workers)
+
+        if self.modo_upload == 'pacote':
+            return self.upload_pacote(self._esvaziar_fila(fila, max_workers))
+
+        if self.indice:
+            # Sincroniza o índice uma única vez (Changes API); depois cada
+            # verificação de existência é uma consulta local ao SQLite
+            self._get_existing_files_in_drive_folder()
+        lock = threading.Lock()
+        # (pasta_id, nome) já enviados nesta execução: o mesmo nome não sobe duas vezes
+        na_execucao = set()
+        contadores = {'locais': 0, 'enviados': 0, 'atualizados': 0, 'ignorados': 0, 'bytes': 0, 'sem_pasta': 0,
+                      'sem_verificacao': 0, 'inesperados': 0}
+        falhas = []
+        atualizacoes = {}
+
+        def erro_inesperado(local_file, error):
+            # Qualquer outro erro (arquivo que sumiu, índice ocupado...) fica só
+            # neste XML: o worker continua consumindo a fila, senão a extração trava
+            print(f"    ERRO inesperado com '{local_file}': {type(error).__name__}: {error}")
+            logging.exception(f"Erro inesperado no upload de '{local_file}'")
+            with lock:
+                contadores['inesperados'] += 1
+
+        def enviar(local_file, pasta_id, ja_existe, service):
+            drive_id = self._alterado_no_drive(local_file, pasta_id) if ja_existe else None
+            if ja_existe and not drive_id:
+                print(f"  -> Ignorando '{local_file.name}': Já existe (cache local ou API).")
+                self._arquivar(local_file)
+                with lock:
+                    contadores['ignorados'] += 1
+                return
+            if drive_id:
+                print(f"  -> '{local_file.name}' mudou: o conteúdo será atualizado no Drive.")
+                with lock:
+                    atualizacoes[local_file] = drive_id
+            try:
+                tamanho = self._upload_file_thread(local_file, drive_id)
+                print(f"  -> Upload concluído: '{local_file.name}'")
+                self._arquivar(local_file)
+                with lock:
+                    contadores['atualizados' if drive_id else 'enviados'] += 1
+                    contadores['bytes'] += tamanho
+            except (HttpError, *ERROS_REDE) as error:
+                print(f"    ERRO ao fazer upload de '{local_file.name}': {error}")
+                with lock:
+                    falhas.append(local_file)
+
+        def processar_lote(lote, service):
+            # 1. Pasta do Drive de cada XML
+            grupos = {}
+            for local_file in lote:
+                try:
+                    pasta_id = self._pasta_do_arquivo(local_file, service)
+                except (HttpError, *ERROS_REDE) as error:
+                    print(f"    ERRO ao resolver a pasta de '{local_file.name}' no Drive: {error}")
+                    with lock:
+                        contadores['sem_pasta'] += 1
+                    continue
+                except Exception as error:
+                    erro_inesperado(local_file, error)
+                    continue
+                grupos.setdefault(pasta_id, []).append(local_file)
+
+            for pasta_id, grupo in grupos.items():
+                # 2. Existência: índice local ou uma consulta direcionada
+                # pelos nomes do lote, fora do lock
+                try:
+                    existentes = self._nomes_existentes(pasta_id, [f.name for f in grupo], service)
+                except (HttpError, *ERROS_REDE) as error:
+                    # Sem saber se já existem, não envia (evita duplicatas); ficam para a próxima execução
+                    print(f"    ERRO ao verificar {len(grupo)} arquivo(s) no Drive: {error}")
+                    with lock:
+                        contadores['sem_verificacao'] += len(grupo)
+                    continue
+                except Exception as error:
+                    for local_file in grupo:
+                        erro_inesperado(local_file, error)
+                    continue
+
+                # 3. Upload
+                for local_file in grupo:
+                    with lock:
+                        chave = (pasta_id, local_file.name)
+                        ja_existe = local_file.name in existentes or chave in na_execucao
+                        na_execucao.add(chave)
+                    try:
+                        enviar(local_file, pasta_id, ja_existe, service)
+                    except Exception as error:
+                        erro_inesperado(local_file, error)
+
+        def worker():
+            while True:
+                lote, terminou = self._proximo_lote(fila)
+                try:
+                    with lock:
+                        contadores['locais'] += len(lote)
+                    if lote:
+                        processar_lote(lote, self._get_thread_service())
+                except Exception as error:
+                    for local_file in lote:
+                        erro_inesperado(local_file, error)
+                finally:
+                    for _ in range(len(lote) + terminou):
+                        fila.task_done()
+                if terminou:
+                    return
+
+        inicio = time.perf_counter()
+        threads = [threading.Thread(target=worker, name=f"upload-{i}", daemon=True) for i in range(max_workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        enviados, atualizados, enviados_bytes, falhas = self._repassar_falhas(falhas, atualizacoes)
+        contadores['enviados'] += enviados
+        contadores['atualizados'] += atualizados
+        contadores['bytes'] += enviados_bytes
+        duracao = time.perf_counter() - inicio
+
+        return self._relatorio_upload(
+            contadores['locais'], contadores['enviados'], contadores['ignorados'],
+            len(falhas) + contadores['sem_pasta'] + contadores['sem_verificacao'] + contadores['inesperados'],
+            contadores['bytes'], duracao, max_workers,
+            contadores['atualizados']
+        )
+
+    @staticmethod
+    def _proximo_lote(fila):
+        """
+        Espera o próximo XML da fila e junta a ele os que chegarem em
+        seguida (até NOMES_POR_CONSULTA, ou ESPERA_LOTE_FILA segundos), para
+        que a verificação de existência no Drive seja uma consulta por lote.
+        Retorna (lote, terminou), com terminou=1 se veio o marcador None.
+        """
+        lote = []
+        item = fila.get()
+        limite = time.monotonic() + ESPERA_LOTE_FILA
+        while item is not None:
+            lote.append(Path(item))
+            restante = limite - time.monotonic()
+            if len(lote) >= NOMES_POR_CONSULTA or restante <= 0:
+                return lote, 0
+            try:
+                item = fila.get(timeout=restante)
+            except queue.Empty:
+                return lote, 0
+        return lote, 1
+
+    def _nomes_existentes(self, pasta_id, nomes, service=None):
+        """
+        Quais destes nomes já existem na pasta do Drive: pelo índice local
+        ou, sem ele, por consultas direcionadas (name = '...' or ...).
+        """
+        if self.indice:
+            return {nome for nome in nomes if self.indice.contem(nome, pasta_id)}
+        return self._buscar_nomes_no_drive(nomes, pasta_id, service)
+
+    @staticmethod
+    def _esvaziar_fila(fila, finais):
+        """
+        Recolhe os caminhos da fila até receber 'finais' marcadores None.
+        """
+        arquivos = []
+        while finais:
+            local_file = fila.get()
+            if local_file is None:
+                finais -= 1
+            else:
+                arquivos.append(Path(local_file))
+            fila.task_done()
+        return arquivos
+
+    # --- Modo pacote ---
+
+    def upload_pacote(self, arquivos, pasta_pacotes=None):
+        """
+        Empacota os XMLs num único .zip (com manifesto.json) e envia o
+        pacote como um só objeto para a pasta de destino: uma ou duas
+        chamadas à API no lugar de uma por XML.
+        Com DRIVE_PACOTE_POR=dia o pacote do dia ('xmls_AAAA-MM-DD.zip')
+        é refeito com os XMLs novos e tem o conteúdo atualizado no Drive;
+        senão, cada execução gera o seu ('xmls_AAAA-MM-DD_HHMMSS.zip').
+        Depois do envio os XMLs são arquivados; se o envio falhar, eles
+        ficam na pasta de trabalho para a próxima execução.
+        Retorna o mesmo resumo de upload_files.
+        """
+        arquivos = [Path(a) for a in arquivos if Path(a).exists()]
+        if not arquivos:
+            print("Nenhum XML novo nesta execução para o pacote.")
+            return {'locais': 0, 'enviados': 0, 'atualizados': 0, 'ignorados': 0, 'erros': 0, 'bytes': 0, 'duracao': 0.0}
+
+        base = Path(pasta_pacotes or PASTA_PACOTES_PADRAO or arquivos[0].parent.parent / "pacotes")
+        agora = datetime.now()
+        por_dia = self.pacote_por == 'dia'
+        nome = f"xmls_{agora:%Y-%m-%d}.zip" if por_dia else f"xmls_{agora:%Y-%m-%d_%H%M%S}.zip"
+        caminho = base / nome
+
+        inicio = time.perf_counter()
+        try:
+            os.makedirs(base, exist_ok=True)
+            drive_id = self._id_do_pacote(nome) if por_dia else None
+            if drive_id and not caminho.exists():
+                # O pacote do dia foi enviado de outra máquina: parte dele
+                self._baixar_arquivo(drive_id, caminho)
+            manifesto = montar_pacote(arquivos, caminho, anterior=caminho if caminho.exists() else None)
+            print(f"Pacote '{nome}': {len(arquivos)} XML(s) novo(s), {len(manifesto['arquivos'])} no total, "
+                  f"{caminho.stat().st_size / 1024:.1f} KB compactado.")
+
+            if caminho.stat().st_size >= LIMITE_RETOMAVEL_PADRAO:
+                criado = self._upload_retomavel(caminho, self.service, mimetype=MIME_PACOTE, drive_id=drive_id)
+            else:
+                media = MediaFileUpload(caminho, mimetype=MIME_PACOTE)
+                try:
+                    criado = self.executor.executar(
+                        self._requisicao_upload(self.service, caminho, self.target_folder_id, media, drive_id),
+                        'files.update' if drive_id else 'files.create',
+                        ja_aplicada=None if drive_id else self._verificador_de_criacao(caminho, self.target_folder_id)
+                    )
+                finally:
+                    media.stream().close()
+            bytes_enviados = self._registrar_enviado(caminho, criado)
+        except (HttpError, OSError, zipfile.BadZipFile) as error:
+            print(f"    ERRO ao enviar o pacote '{nome}': {error}")
+            return self._relatorio_upload(len(arquivos), 0, 0, len(arquivos), 0,
+                                          time.perf_counter() - inicio, 1)
+
+        print(f"  -> Pacote '{nome}' {'atualizado' if drive_id else 'enviado'} no Drive.")
+        for local_file in arquivos:
+            self._arquivar(local_file)
+        if not por_dia:
+            # Os XMLs já estão no arquivo local; a cópia do pacote não é mais usada
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
+        return self._relatorio_upload(len(arquivos), len(arquivos), 0, 0, bytes_enviados,
+                                      time.perf_counter() - inicio, 1)
+
+    def _id_do_pacote(self, nome):
+        """
+        ID no Drive do pacote com esse nome na pasta de destino, ou None.
+        Aceita também o próprio ID (quando não há pacote com esse nome).
+        """
+        info = self.indice.buscar(nome, self.target_folder_id) if self.indice else None
+        if not info:
+            self._buscar_nomes_no_drive([nome])
+            info = self._metadados_drive.get((self.target_folder_id, nome))
+        return info['drive_id'] if info else None
+
+    def _baixar_arquivo(self, file_id, destino):
+        conteudo = self.executor.executar(
+            self.service.files().get_media(fileId=file_id, supportsAllDrives=True), 'files.get_media'
+        )
+        temporario = Path(destino).with_name(Path(destino).name + ".tmp")
+        with open(temporario, 'wb') as f:
+            f.write(conteudo)
+        os.replace(temporario, destino)
+
+    def _ler_intervalo(self, file_id, inicio, fim):
+        """
+        Bytes 'inicio'..'fim' (inclusive) de um arquivo do Drive, com o
+        cabeçalho Range no download.
+        """
+        requisicao = self.service.files().get_media(fileId=file_id, supportsAllDrives=True)
+        requisicao.headers['Range'] = f"bytes={inicio}-{fim}"
+        return self.executor.executar(requisicao, 'files.get_media.intervalo')
+
+    def abrir_pacote(self, pacote):
+        """
+        Abre um pacote do Drive (nome ou ID) como zipfile.ZipFile sem
+        baixá-lo: cada leitura vira um download parcial (Range).
+        """
+        file_id = self._id_do_pacote(pacote) or pacote
+        info = self.executor.executar(self.service.files().get(
+            fileId=file_id, fields='id, size', supportsAllDrives=True
+        ), 'files.get')
+        remoto = ArquivoRemoto(info['size'], lambda inicio, fim: self._ler_intervalo(file_id, inicio, fim))
+        return zipfile.ZipFile(remoto)
+
+    def listar_pacote(self, pacote):
+        """
+        Manifesto do pacote (nome, tamanho e SHA-256 de cada XML).
+        """
+        with self.abrir_pacote(pacote) as zf:
+            return ler_manifesto(zf)
+
+    def extrair_do_pacote(self, pacote, nome_xml, destino='.'):
+        """
+        Baixa só o XML 'nome_xml' de dentro do pacote para a pasta
+        'destino'. Retorna o caminho do arquivo gravado.
+        """
+        caminho = Path(destino) / Path(nome_xml).name
+        os.makedirs(caminho.parent, exist_ok=True)
+        with self.abrir_pacote(pacote) as zf:
+            caminho.write_bytes(zf.read(nome_xml))
+        return caminho
@@ -0,0 +1,158 @@
+# Em: classes/espera.py
+
+import os
+import time
+import logging
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Perfis de "pacing": fração do antigo time.sleep fixo que ainda é aplicada
+# DEPOIS da condição de prontidão ser satisfeita.
+#   normal -> só as condições (nenhuma pausa extra)
+#   lento  -> metade das pausas antigas, para quando o servidor está lento
+#   legado -> as pausas antigas completas (comportamento anterior)
+PERFIS_PACING = {
+    'normal': 0.0,
+    'lento': 0.5,
+    'legado': 1.0,
+}
+
+# Perfil 'adaptativo': a pausa acompanha a carga do servidor, medida pela
+# média móvel (exponencial) da duração dos carregamentos do Innovaro. A
+# pausa é PACING_PROPORCAO dessa média, no mínimo PACING_PISO segundos e
+# nunca mais que o sleep antigo do ponto. Servidor rápido: quase nenhuma
+# pausa; servidor lento: as pausas crescem até as antigas.
+PACING_ADAPTATIVO = 'adaptativo'
+PACING_PROPORCAO = float(os.environ.get("INNOVARO_PACING_PROPORCAO", "0.25"))
+PACING_PISO = float(os.environ.get("INNOVARO_PACING_PISO", "0"))
+# Peso de cada nova medida na média móvel
+PACING_SUAVIZACAO = 0.3
+
+PACING_PADRAO = os.environ.get("INNOVARO_PACING", PACING_ADAPTATIVO)
+
+# Intervalo entre verificações das condições (o padrão do Selenium é 0.5s)
+FREQUENCIA_VERIFICACAO = 0.1
+
+
+class Espera:
+    """
+    Ajudante de espera do robô.
+    Troca os time.sleep fixos por condições explícitas de prontidão e
+    contabiliza o tempo realmente gasto esperando, comparado com o
+    orçamento fixo (soma dos sleeps antigos) que cada espera substitui.
+    """
+
+    def __init__(self, nav, timeout=20, pacing=None):
+        self.nav = nav
+        self.timeout = timeout
+        self.pacing = pacing or PACING_PADRAO
+        if self.pacing not in PERFIS_PACING and self.pacing != PACING_ADAPTATIVO:
+            print(f"AVISO: perfil de pacing '{self.pacing}' desconhecido. Usando 'normal'.")
+            self.pacing = 'normal'
+        self.fator_pacing = PERFIS_PACING.get(self.pacing)
+        # Média móvel da duração dos carregamentos (None até o primeiro)
+        self.media_carregamento = None
+        self.total_esperado = 0.0
+        self.total_orcamento_antigo = 0.0
+        self.registros = []
+
+    def registrar(self, descricao, duracao, orcamento_antigo=0.0):
+        self.total_esperado += duracao
+        self.total_orcamento_antigo += orcamento_antigo
+        self.registros.append((descricao, duracao, orcamento_antigo))
+
+    def ate(self, condicao, descricao, orcamento_antigo=0.0, timeout=None):
+        """
+        Espera a condição (no formato dos expected_conditions do Selenium)
+        e retorna o valor dela. 'orcamento_antigo' é quanto a versão com
+        time.sleep gastava nesse ponto, usado apenas no relatório.
+        """
+        inicio = time.perf_counter()
+        try:
+            resultado = WebDriverWait(
+                self.nav, timeout or self.timeout, poll_frequency=FREQUENCIA_VERIFICACAO
+            ).until(condicao)
+        finally:
+            self.registrar(descricao, time.perf_counter() - inicio, orcamento_antigo)
+        self.pausa(orcamento_antigo)
+        return resultado
+
+    def observar_carregamento(self, segundos):
+        """
+        Registra a duração de um carregamento do Innovaro na média móvel
+        usada pelo perfil adaptativo.
+        """
+        if self.media_carregamento is None:
+            self.media_carregamento = segundos
+        else:
+            self.media_carregamento += PACING_SUAVIZACAO * (segundos - self.media_carregamento)
+
+    def segundos_pausa(self, orcamento_antigo):
+        """
+        Quanto dormir no lugar de um sleep antigo de 'orcamento_antigo' segundos.
+        """
+        if orcamento_antigo <= 0:
+            return 0.0
+        if self.fator_pacing is not None:
+            return orcamento_antigo * self.fator_pacing
+        proporcional = (self.media_carregamento or 0.0) * PACING_PROPORCAO
+        return min(orcamento_antigo, max(PACING_PISO, proporcional))
+
+    def pausa(self, orcamento_antigo, descricao=None):
+        """
+        Pausa de pacing: só dorme se o perfil atual pedir.
+        Com 'descricao', a pausa substitui sozinha um sleep antigo e entra
+        no relatório com o orçamento dele.
+        """
+        segundos = self.segundos_pausa(orcamento_antigo)
+        inicio = time.perf_counter()
+        if segundos > 0:
+            time.sleep(segundos)
+        if descricao or segundos > 0:
+            self.registrar(descricao or f"pacing ({self.pacing})", time.perf_counter() - inicio,
+                            orcamento_antigo if descricao else 0.0)
+
+    def relatorio(self):
+        """
+        Imprime o tempo total esperado em comparação com o orçamento antigo.
+        """
+        economia = self.total_orcamento_antigo - self.total_esperado
+        print("="*30)
+        print("Relatório de Esperas:")
+        print(f"Perfil de pacing: {self.pacing}")
+        if self.pacing == PACING_ADAPTATIVO and self.media_carregamento is not None:
+            print(f"Média móvel dos carregamentos: {self.media_carregamento:.2f}s")
+        print(f"Esperas realizadas: {len(self.registros)}")
+        print(f"Tempo total esperando: {self.total_esperado:.2f}s")
+        print(f"Orçamento fixo antigo (time.sleep): {self.total_orcamento_antigo:.2f}s")
+        print(f"Diferença: {economia:.2f}s")
+        print("="*30)
+        for descricao, duracao, orcamento in self.registros:
+            logging.info(f"Espera '{descricao}': {duracao:.2f}s (antes: {orcamento:.2f}s)")
+
+
+# --- Condições de prontidão usadas pelo robô ---
+
+class valor_confirmado:
+    """
+    O campo contém exatamente o valor digitado.
+    """
+
+    def __init__(self, elemento, valor):
+        self.elemento = elemento
+        self.valor = valor
+
+    def __call__(self, driver):
+        return self.elemento.get_attribute('value') == self.valor
+
+
+class foco_saiu:
+    """
+    O foco já saiu do elemento (ex: depois de um TAB), ou seja,
+    o sistema já recebeu o 'blur' e confirmou o valor.
+    """
+
+    def __init__(self, elemento):
+        self.elemento = elemento
+
+    def __call__(self, driver):
+        return driver.switch_to.active_element != self.elemento
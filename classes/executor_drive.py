@@ -0,0 +1,240 @@
+# Em: classes/executor_drive.py
+
+import os
+import ssl
+import json
+import time
+import random
+import socket
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+import httplib2
+from googleapiclient.errors import HttpError
+
+# Tentativas por chamada (a primeira + as repetições)
+TENTATIVAS_PADRAO = int(os.environ.get("DRIVE_TENTATIVAS", "6"))
+# Backoff exponencial: base * 2^n, limitado ao máximo, com jitter total
+ESPERA_BASE_PADRAO = float(os.environ.get("DRIVE_ESPERA_BASE", "1.0"))
+ESPERA_MAXIMA_PADRAO = float(os.environ.get("DRIVE_ESPERA_MAXIMA", "64"))
+# Janela de concorrência adaptativa (quantas chamadas ao Drive ao mesmo tempo)
+CONCORRENCIA_INICIAL_PADRAO = int(os.environ.get("DRIVE_CONCORRENCIA_INICIAL", "2"))
+CONCORRENCIA_MAXIMA_PADRAO = int(os.environ.get("DRIVE_CONCORRENCIA_MAXIMA", "8"))
+# Arquivo JSON opcional com as métricas por chamada no fim da execução
+METRICAS_PATH_PADRAO = os.environ.get("DRIVE_METRICAS_PATH")
+
+# Status que valem uma nova tentativa
+STATUS_TRANSITORIOS = {429, 500, 502, 503, 504}
+# Motivos de 403 que são limite de cota, não falta de permissão
+MOTIVOS_COTA = {'rateLimitExceeded', 'userRateLimitExceeded', 'quotaExceeded'}
+# Falhas de rede (conexão caiu, timeout, TLS, DNS) também são repetidas; o
+# httplib2 do cliente do Drive tem exceções próprias (ex: ServerNotFoundError)
+ERROS_REDE = (ConnectionError, TimeoutError, ssl.SSLError, socket.gaierror, httplib2.HttpLib2Error)
+
+
+def _status(erro):
+    try:
+        return int(erro.resp.status)
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _motivos(erro):
+    """
+    Motivos ('reason') informados no corpo JSON de um HttpError.
+    """
+    try:
+        dados = json.loads(erro.content.decode('utf-8') if isinstance(erro.content, bytes) else erro.content)
+        return {e.get('reason') for e in dados.get('error', {}).get('errors', [])}
+    except (AttributeError, TypeError, ValueError):
+        return set()
+
+
+def _retry_after(erro):
+    """
+    Segundos pedidos pelo servidor no cabeçalho Retry-After (número ou data HTTP).
+    """
+    try:
+        valor = erro.resp.get('retry-after')
+    except AttributeError:
+        return None
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class LimitadorAdaptativo:
+    """
+    Janela de concorrência AIMD: cada resposta saudável aumenta o limite
+    (+1 a cada 'limite' sucessos, como a janela do TCP) e cada erro de cota
+    o corta pela metade. Os workers pedem uma vaga antes de cada chamada.
+    """
+
+    def __init__(self, inicial=None, maximo=None):
+        self.maximo = max(1, maximo or CONCORRENCIA_MAXIMA_PADRAO)
+        self.limite = float(min(self.maximo, max(1, inicial or CONCORRENCIA_INICIAL_PADRAO)))
+        self.em_uso = 0
+        self.pico = self.limite
+        self._cond = threading.Condition()
+
+    def adquirir(self):
+        with self._cond:
+            while self.em_uso >= int(self.limite):
+                self._cond.wait()
+            self.em_uso += 1
+
+    def liberar(self, sucesso=True, cota=False):
+        with self._cond:
+            self.em_uso -= 1
+            if cota:
+                self.limite = max(1.0, self.limite / 2)
+            elif sucesso:
+                self.limite = min(float(self.maximo), self.limite + 1 / self.limite)
+                self.pico = max(self.pico, self.limite)
+            self._cond.notify_all()
+
+
+class ExecutorDrive:
+    """
+    Executa as requisições do cliente do Drive (files().get/list/create,
+    changes...) com repetição, backoff exponencial com jitter, respeito ao
+    Retry-After e concorrência limitada pelo LimitadorAdaptativo.
+    Uma instância é compartilhada por todas as threads de upload e guarda
+    as métricas de latência e repetições por tipo de chamada.
+    """
+
+    def __init__(self, tentativas=None, espera_base=None, espera_maxima=None, limitador=None):
+        self.tentativas = max(1, tentativas or TENTATIVAS_PADRAO)
+        self.espera_base = espera_base or ESPERA_BASE_PADRAO
+        self.espera_maxima = espera_maxima or ESPERA_MAXIMA_PADRAO
+        self.limitador = limitador or LimitadorAdaptativo()
+        self._lock = threading.Lock()
+        self._metricas = {}
+
+    def _espera(self, tentativa, erro=None):
+        pedido = _retry_after(erro) if erro is not None else None
+        if pedido is not None:
+            return min(pedido, self.espera_maxima)
+        # "Full jitter": espalha as repetições de várias threads no tempo
+        return random.uniform(0, min(self.espera_maxima, self.espera_base * (2 ** tentativa)))
+
+    def _registrar(self, operacao, latencia=None, repeticao=False, erro=False, cota=False):
+        with self._lock:
+            m = self._metricas.setdefault(operacao, {
+                'chamadas': 0, 'repeticoes': 0, 'erros': 0, 'erros_cota': 0, 'latencias': [],
+            })
+            if latencia is not None:
+                m['chamadas'] += 1
+                m['latencias'].append(latencia)
+            if repeticao:
+                m['repeticoes'] += 1
+            if erro:
+                m['erros'] += 1
+            if cota:
+                m['erros_cota'] += 1
+
+    def executar(self, requisicao, operacao='drive', metodo='execute', ja_aplicada=None):
+        """
+        Executa 'requisicao' (um HttpRequest do googleapiclient) e devolve a
+        resposta. Erros transitórios (429, 5xx, 403 de cota, falhas de rede)
+        são repetidos; os demais, ou o último após esgotar as tentativas,
+        são relançados.
+        Com metodo='next_chunk' envia um bloco de um upload retomável; a
+        repetição consulta o servidor e continua do último byte confirmado.
+        'ja_aplicada' é para chamadas que não podem ser repetidas às cegas
+        (files().create): antes de repetir depois de um 5xx ou de uma falha
+        de rede, quando a tentativa anterior pode ter chegado ao servidor,
+        ela procura o resultado; se devolver algo, esse é a resposta.
+        """
+        talvez_aplicada = False
+        for tentativa in range(self.tentativas):
+            if talvez_aplicada and ja_aplicada is not None:
+                resposta = ja_aplicada()
+                if resposta is not None:
+                    logging.warning(f"Drive {operacao}: a tentativa anterior já tinha sido aplicada; sem repetir.")
+                    return resposta
+            self.limitador.adquirir()
+            inicio = time.perf_counter()
+            try:
+                resposta = getattr(requisicao, metodo)()
+            except HttpError as erro:
+                self._registrar(operacao, time.perf_counter() - inicio)
+                status = _status(erro)
+                cota = status == 429 or (status == 403 and bool(_motivos(erro) & MOTIVOS_COTA))
+                self.limitador.liberar(sucesso=False, cota=cota)
+                repetir = cota or status in STATUS_TRANSITORIOS
+                # 429 e cota são recusados antes de processar; um 5xx pode vir depois
+                talvez_aplicada = not cota
+                if not repetir or tentativa == self.tentativas - 1:
+                    self._registrar(operacao, erro=True, cota=cota)
+                    raise
+                espera = self._espera(tentativa, erro)
+                self._registrar(operacao, repeticao=True, cota=cota)
+                logging.warning(f"Drive {operacao}: HTTP {status}, nova tentativa em {espera:.1f}s "
+                                f"({tentativa + 1}/{self.tentativas - 1}).")
+            except ERROS_REDE as erro:
+                self._registrar(operacao, time.perf_counter() - inicio)
+                self.limitador.liberar(sucesso=False)
+                talvez_aplicada = True
+                if tentativa == self.tentativas - 1:
+                    self._registrar(operacao, erro=True)
+                    raise
+                espera = self._espera(tentativa)
+                self._registrar(operacao, repeticao=True)
+                logging.warning(f"Drive {operacao}: falha de rede ({erro}), nova tentativa em {espera:.1f}s.")
+            else:
+                self._registrar(operacao, time.perf_counter() - inicio)
+                self.limitador.liberar(sucesso=True)
+                return resposta
+            time.sleep(espera)
+
+    def estatisticas(self):
+        """
+        Métricas por tipo de chamada: quantidade, repetições, erros e latência
+        (média, p50, p95 e máxima, em segundos).
+        """
+        resultado = {}
+        with self._lock:
+            for operacao, m in self._metricas.items():
+                latencias = sorted(m['latencias'])
+                n = len(latencias)
+                resultado[operacao] = {
+                    'chamadas': m['chamadas'],
+                    'repeticoes': m['repeticoes'],
+                    'erros': m['erros'],
+                    'erros_cota': m['erros_cota'],
+                    'latencia_media': sum(latencias) / n if n else 0.0,
+                    'latencia_p50': latencias[n // 2] if n else 0.0,
+                    'latencia_p95': latencias[min(n - 1, int(n * 0.95))] if n else 0.0,
+                    'latencia_max': latencias[-1] if n else 0.0,
+                }
+        return resultado
+
+    def relatorio(self, caminho=None):
+        """
+        Imprime as métricas e, se houver caminho (ou DRIVE_METRICAS_PATH),
+        grava-as em JSON. Retorna o dict das métricas.
+        """
+        estatisticas = self.estatisticas()
+        print("Chamadas ao Drive (latência em s):")
+        for operacao, m in sorted(estatisticas.items()):
+            print(f"  {operacao}: {m['chamadas']} chamadas | repetições: {m['repeticoes']} "
+                  f"(cota: {m['erros_cota']}) | erros: {m['erros']} | média {m['latencia_media']:.3f} | "
+                  f"p95 {m['latencia_p95']:.3f} | máx {m['latencia_max']:.3f}")
+        print(f"Concorrência adaptativa: limite atual {int(self.limitador.limite)}, pico {int(self.limitador.pico)}")
+
+        caminho = caminho or METRICAS_PATH_PADRAO
+        if caminho:
+            try:
+                with open(caminho, 'w', encoding='utf-8') as f:
+                    json.dump(estatisticas, f, ensure_ascii=False, indent=2)
+            except OSError as e:
+                logging.warning(f"Não foi possível gravar as métricas do Drive em '{caminho}': {e}")
+        return estatisticas
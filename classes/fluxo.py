@@ -0,0 +1,91 @@
+# Em: classes/fluxo.py
+
+import logging
+from classes.innovaro import Innovaro
+from classes.download_xmls import Download_XML
+from pathlib import Path
+from classes.indice_notas import IndexadorNotas, IndiceNotas, USAR_INDICE_NOTAS_PADRAO
+
+# Caminho no menu do Innovaro até a tela de download dos XMLs
+CAMINHO_DOWNLOAD_XML = [
+    "Fiscal e Regulamentação",
+    "Consultas",
+    "Auxiliares Fiscais",
+    "Manifestação (C)",
+    "99003 Download de XML Manifestados (C)",
+]
+
+
+def baixar_xmls_innovaro(usuario, senha, url=None, data_inicial='-1', data_final='-1',
+                         download_path=None, modo_download=None, headless=None, perfil_dir=None,
+                         caminho_cookies=None, ao_extrair=None, pasta_estado=None, concorrencia=1):
+    """
+    Fluxo completo no navegador: login, tela 99003, período, exportação,
+    download e descompactação.
+    'ao_extrair' recebe cada XML novo assim que ele é gravado.
+    Com NOTAS_INDICE (ativo por padrão) os metadados de cada XML extraído
+    vão para o índice local de notas (classes.indice_notas).
+    Com 'pasta_estado', o cache de navegação, o índice de conteúdo e o
+    índice de notas ficam nessa pasta (ex: uma por tenant) em vez dos
+    arquivos globais.
+    'concorrencia' é quantos fluxos rodam em paralelo na máquina (backfill,
+    orquestrador): limita os workers do índice de notas de cada um.
+    Retorna a pasta com os XMLs, ou None se algo falhou.
+    """
+    kwargs = {'url': url} if url else {}
+    estado = Path(pasta_estado) if pasta_estado else None
+    bot = None
+    indexador = None
+    try:
+        # Dentro do try: o construtor já abre o Chrome e faz o login, e uma
+        # falha ali também precisa fechar o navegador no finally
+        bot = Innovaro(usuario=usuario, senha=senha, headless=headless, perfil_dir=perfil_dir,
+                       caminho_cookies=caminho_cookies,
+                       caminho_cache_navegacao=estado / "cache_navegacao.json" if estado else None, **kwargs)
+        if not bot.nav:
+            return None
+
+        # Abre a tela 99003 percorrendo o menu numa única chamada
+        # (os nós ficam em cache para as próximas execuções)
+        if not bot.navegar_menu(CAMINHO_DOWNLOAD_XML):
+            return None
+
+        # ... aqui você faria suas ações dentro do iframe ...
+        print("Executando ações dentro do iframe...")
+        bot.carregamento(apos_acao=True)
+
+        if USAR_INDICE_NOTAS_PADRAO:
+            indexador = IndexadorNotas(IndiceNotas(estado / "indice_notas.sqlite3" if estado else None),
+                                       concorrencia=concorrencia)
+        download_xmls = Download_XML(bot.nav, espera=bot.espera, download_path=download_path,
+                                     ao_extrair=ao_extrair, indexador=indexador,
+                                     caminho_indice_hash=estado / "indice_hash.sqlite3" if estado else None)
+
+        if not download_xmls.preencher_variaveis_manifesto(data_inicial, data_final):
+            return None
+
+        bot.botao_e()
+
+        # A exportação às vezes só mostra a overlay depois do settle
+        bot.carregamento(apos_acao=True)
+
+        pasta_local_dos_xmls = download_xmls.download_xml_manifestados(modo=modo_download)
+        bot.carregamento()
+        return pasta_local_dos_xmls
+
+    except Exception as e:
+        print(f"Um erro ocorreu no fluxo do navegador: {e}")
+        logging.error(f"Um erro ocorreu no fluxo do navegador: {e}")
+        return None
+
+    finally:
+        # Fecha o navegador mesmo se ocorrer um erro
+        if getattr(bot, 'espera', None):
+            bot.espera.relatorio()
+        if bot and bot.nav:
+            bot.fechar_navegador()
+        if indexador:
+            try:
+                indexador.finalizar()
+            except Exception as e:
+                logging.warning(f"Falha ao finalizar o índice de notas: {e}")
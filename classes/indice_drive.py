@@ -0,0 +1,147 @@
+# Em: classes/indice_drive.py
+
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+# Local padrão do índice (mesma pasta base usada pelo robô para os XMLs)
+CAMINHO_INDICE_PADRAO = Path.home() / "XML- Robô Innovaro/indice_drive.sqlite3"
+
+
+class IndiceDrive:
+    """
+    Índice local (SQLite) dos arquivos já presentes no Google Drive.
+    Guarda nome, tamanho, hash (md5 do Drive) e ID de cada arquivo, além do
+    'pageToken' da Changes API, para que cada execução só precise buscar
+    o que mudou desde a anterior em vez de listar a pasta inteira.
+    """
+
+    def __init__(self, caminho=None):
+        self.caminho = Path(caminho or os.environ.get("DRIVE_INDICE_PATH") or CAMINHO_INDICE_PADRAO)
+        os.makedirs(self.caminho.parent, exist_ok=True)
+        # O upload em paralelo consulta o índice de outras threads
+        self._lock = threading.Lock()
+        # Outra instância (ex: outro processo) pode estar gravando no mesmo arquivo
+        self.conn = sqlite3.connect(str(self.caminho), timeout=30, check_same_thread=False)
+        with self.conn:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS arquivos (
+                    drive_id TEXT PRIMARY KEY,
+                    nome TEXT NOT NULL,
+                    pasta_id TEXT NOT NULL,
+                    tamanho INTEGER,
+                    md5 TEXT
+                )
+                """
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_arquivos_pasta_nome ON arquivos (pasta_id, nome)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS estado (chave TEXT PRIMARY KEY, valor TEXT)"
+            )
+
+    # --- Estado (pageToken da Changes API) ---
+
+    def get_estado(self, chave):
+        with self._lock:
+            linha = self.conn.execute("SELECT valor FROM estado WHERE chave = ?", (chave,)).fetchone()
+        return linha[0] if linha else None
+
+    def set_estado(self, chave, valor):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO estado (chave, valor) VALUES (?, ?)", (chave, valor)
+            )
+
+    def get_page_token(self, pasta_id):
+        return self.get_estado(f"page_token:{pasta_id}")
+
+    def set_page_token(self, pasta_id, token):
+        self.set_estado(f"page_token:{pasta_id}", token)
+
+    # --- Arquivos ---
+
+    def contem(self, nome, pasta_id):
+        with self._lock:
+            linha = self.conn.execute(
+                "SELECT 1 FROM arquivos WHERE pasta_id = ? AND nome = ? LIMIT 1", (pasta_id, nome)
+            ).fetchone()
+        return linha is not None
+
+    def buscar(self, nome, pasta_id):
+        """
+        Retorna {'drive_id', 'md5'} do arquivo com esse nome na pasta, ou None.
+        """
+        with self._lock:
+            linha = self.conn.execute(
+                "SELECT drive_id, md5 FROM arquivos WHERE pasta_id = ? AND nome = ? LIMIT 1", (pasta_id, nome)
+            ).fetchone()
+        return {'drive_id': linha[0], 'md5': linha[1]} if linha else None
+
+    def registrar(self, drive_id, nome, pasta_id, tamanho=None, md5=None):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO arquivos (drive_id, nome, pasta_id, tamanho, md5) VALUES (?, ?, ?, ?, ?)",
+                (drive_id, nome, pasta_id, tamanho, md5)
+            )
+
+    def remover(self, drive_id):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM arquivos WHERE drive_id = ?", (drive_id,))
+
+    def substituir_pasta(self, pasta_id, arquivos):
+        """
+        Troca todo o conteúdo conhecido de uma pasta (usado na reconciliação completa).
+        'arquivos' é uma lista de dicts no formato retornado pela API (id, name, size, md5Checksum).
+        """
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM arquivos WHERE pasta_id = ?", (pasta_id,))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO arquivos (drive_id, nome, pasta_id, tamanho, md5) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (f.get('id'), f.get('name'), pasta_id, int(f['size']) if f.get('size') else None, f.get('md5Checksum'))
+                    for f in arquivos
+                ]
+            )
+
+    def total(self, pasta_id):
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM arquivos WHERE pasta_id = ?", (pasta_id,)
+            ).fetchone()[0]
+
+    def nomes_da_pasta(self, pasta_id):
+        """
+        Retorna uma visão da pasta que responde a 'nome in ...' consultando o
+        SQLite sob demanda, sem carregar todos os nomes para a memória.
+        """
+        return NomesIndexados(self, pasta_id)
+
+    def fechar(self):
+        with self._lock:
+            self.conn.close()
+
+
+class NomesIndexados:
+    """
+    Substituto do 'set' de nomes usado em Drive.upload_files.
+    Suporta 'in' e 'add' como um set, mas as consultas vão ao índice.
+    """
+
+    def __init__(self, indice, pasta_id):
+        self.indice = indice
+        self.pasta_id = pasta_id
+        # Nomes enviados nesta execução (ainda sem ID registrado)
+        self._adicionados = set()
+
+    def __contains__(self, nome):
+        return nome in self._adicionados or self.indice.contem(nome, self.pasta_id)
+
+    def add(self, nome):
+        self._adicionados.add(nome)
+
+    def __len__(self):
+        return self.indice.total(self.pasta_id) + len(self._adicionados)
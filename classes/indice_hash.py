@@ -0,0 +1,127 @@
+# Em: classes/indice_hash.py
+
+import os
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+
+# Local padrão do índice de conteúdo dos XMLs extraídos
+CAMINHO_INDICE_HASH_PADRAO = Path.home() / "XML- Robô Innovaro/indice_hash.sqlite3"
+
+# Deduplicação por conteúdo (SHA-256) na extração e no upload
+USAR_INDICE_HASH_PADRAO = os.environ.get("XML_INDICE_HASH", "1") != "0"
+
+
+def hashes_do_arquivo(caminho, tamanho_bloco=1024 * 1024):
+    """
+    SHA-256 e MD5 de um arquivo local numa única leitura.
+    Retorna (sha256, md5) em hexadecimal.
+    """
+    sha256 = hashlib.sha256()
+    md5 = hashlib.md5()
+    with open(caminho, 'rb') as f:
+        while True:
+            bloco = f.read(tamanho_bloco)
+            if not bloco:
+                break
+            sha256.update(bloco)
+            md5.update(bloco)
+    return sha256.hexdigest(), md5.hexdigest()
+
+
+def chave_pasta(pasta):
+    """
+    Chave da pasta de destino no índice (caminho absoluto): o mesmo nome
+    em pastas diferentes (tenants, janelas do backfill) são XMLs distintos.
+    """
+    return str(Path(pasta).resolve())
+
+
+class IndiceHash:
+    """
+    Índice local (SQLite) do conteúdo de cada XML já extraído, por pasta de
+    destino e nome: SHA-256, MD5 (o mesmo hash que o Drive informa em
+    md5Checksum), tamanho e o CRC-32 declarado no .zip. Com ele a extração
+    distingue arquivos novos, idênticos (mesmo nome e conteúdo), alterados
+    (mesmo nome, conteúdo diferente) e duplicados (mesmo conteúdo com
+    outro nome na mesma pasta). Um registro só é gravado depois que o
+    arquivo está no disco.
+    """
+
+    def __init__(self, caminho=None):
+        self.caminho = Path(caminho or os.environ.get("XML_INDICE_HASH_PATH") or CAMINHO_INDICE_HASH_PADRAO)
+        os.makedirs(self.caminho.parent, exist_ok=True)
+        # A extração em paralelo (threads) e o backfill (processos) usam o mesmo arquivo
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.caminho), timeout=30, check_same_thread=False)
+        with self.conn:
+            colunas = [linha[1] for linha in self.conn.execute("PRAGMA table_info(conteudos)")]
+            if colunas and 'pasta' not in colunas:
+                # Versão antiga, chaveada só pelo nome: os registros não dizem
+                # de qual pasta eram, então o índice recomeça
+                self.conn.execute("DROP TABLE conteudos")
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS conteudos (
+                    pasta TEXT NOT NULL,
+                    nome TEXT NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    md5 TEXT,
+                    tamanho INTEGER,
+                    crc32 INTEGER,
+                    PRIMARY KEY (pasta, nome)
+                )
+                """
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_conteudos_pasta_sha256 ON conteudos (pasta, sha256)"
+            )
+
+    def buscar(self, pasta, nome):
+        """
+        Retorna o registro do nome na pasta (dict) ou None.
+        """
+        with self._lock:
+            linha = self.conn.execute(
+                "SELECT sha256, md5, tamanho, crc32 FROM conteudos WHERE pasta = ? AND nome = ?", (pasta, nome)
+            ).fetchone()
+        if linha is None:
+            return None
+        return {'sha256': linha[0], 'md5': linha[1], 'tamanho': linha[2], 'crc32': linha[3]}
+
+    def nome_com_sha(self, pasta, sha256):
+        """
+        Algum nome já registrado na pasta com esse conteúdo (ou None).
+        """
+        with self._lock:
+            linha = self.conn.execute(
+                "SELECT nome FROM conteudos WHERE pasta = ? AND sha256 = ? LIMIT 1", (pasta, sha256)
+            ).fetchone()
+        return linha[0] if linha else None
+
+    def registrar(self, pasta, nome, sha256, md5=None, tamanho=None, crc32=None):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO conteudos (pasta, nome, sha256, md5, tamanho, crc32) VALUES (?, ?, ?, ?, ?, ?)",
+                (pasta, nome, sha256, md5, tamanho, crc32)
+            )
+
+    def md5_local(self, caminho):
+        """
+        MD5 de um XML local: vem do índice se o tamanho bater; senão é
+        calculado (e registrado) lendo o arquivo.
+        """
+        caminho = Path(caminho)
+        pasta = chave_pasta(caminho.parent)
+        tamanho = caminho.stat().st_size
+        registro = self.buscar(pasta, caminho.name)
+        if registro and registro['md5'] and registro['tamanho'] == tamanho:
+            return registro['md5']
+        sha256, md5 = hashes_do_arquivo(caminho)
+        self.registrar(pasta, caminho.name, sha256, md5, tamanho)
+        return md5
+
+    def fechar(self):
+        with self._lock:
+            self.conn.close()
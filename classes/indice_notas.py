@@ -0,0 +1,315 @@
+# Em: classes/indice_notas.py
+
+import io
+import os
+import sqlite3
+import logging
+import argparse
+import threading
+import multiprocessing
+from collections import deque
+from datetime import date, timedelta
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+import xml.etree.ElementTree as ET
+
+# Local padrão do índice de metadados das notas
+CAMINHO_INDICE_NOTAS_PADRAO = Path.home() / "XML- Robô Innovaro/indice_notas.sqlite3"
+
+# Indexação dos metadados logo após a extração (NOTAS_INDICE=0 desliga)
+USAR_INDICE_NOTAS_PADRAO = os.environ.get("NOTAS_INDICE", "1") != "0"
+# 1 = cada XML é lido na própria thread da extração; acima disso, num pool
+# de threads, ou de processos com NOTAS_INDICE_PROCESSOS=1 (opt-in: cada
+# navegador do backfill/orquestrador já é um processo)
+WORKERS_INDICE_NOTAS_PADRAO = int(os.environ.get("NOTAS_INDICE_WORKERS", "1"))
+PROCESSOS_INDICE_NOTAS_PADRAO = os.environ.get("NOTAS_INDICE_PROCESSOS", "0") == "1"
+TAMANHO_LOTE_NOTAS_PADRAO = int(os.environ.get("NOTAS_INDICE_LOTE", "500"))
+
+COLUNAS = ('chave', 'tp_evento', 'modelo', 'cnpj_emitente', 'cnpj_destinatario', 'dh_emi', 'valor_total', 'arquivo')
+
+# Elementos cujo atributo Id traz a chave (Id="NFe<chave>")
+TAGS_COM_ID = ('infNFe', 'infCte')
+TAGS_CHAVE = ('chNFe', 'chCTe')
+
+
+def _nome_local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _valor(texto, nome_arquivo):
+    if not texto:
+        return None
+    try:
+        return float(texto)
+    except ValueError:
+        logging.warning(f"vNF inválido em '{nome_arquivo}': '{texto}'")
+        return None
+
+
+def extrair_metadados(conteudo, nome_arquivo=''):
+    """
+    Lê um XML de NF-e/NFC-e/CT-e (nota, resumo ou evento) em streaming
+    com iterparse, liberando cada elemento depois de lido, e devolve um
+    dict com chave, emitente, destinatário, data de emissão, valor total
+    e tipo de evento ('' para a própria nota). Retorna None se não houver
+    chave de acesso ou se o XML não puder ser lido; um valor malformado
+    vira None sem descartar a nota. Executado nos workers do IndexadorNotas.
+    """
+    registro = dict.fromkeys(COLUNAS)
+    registro['tp_evento'] = ''
+    registro['arquivo'] = nome_arquivo
+    pilha = []
+    try:
+        for evento, elem in ET.iterparse(io.BytesIO(conteudo), events=('start', 'end')):
+            tag = _nome_local(elem.tag)
+            if evento == 'start':
+                pilha.append(tag)
+                if tag in TAGS_COM_ID and not registro['chave']:
+                    chave = ''.join(c for c in elem.get('Id', '') if c.isdigit())
+                    if len(chave) == 44:
+                        registro['chave'] = chave
+                continue
+
+            pilha.pop()
+            pai = pilha[-1] if pilha else ''
+            texto = (elem.text or '').strip()
+            if tag in ('CNPJ', 'CPF'):
+                if pai == 'dest':
+                    registro['cnpj_destinatario'] = registro['cnpj_destinatario'] or texto
+                elif pai in ('emit', 'resNFe', 'infEvento'):
+                    registro['cnpj_emitente'] = registro['cnpj_emitente'] or texto
+            elif tag in ('dhEmi', 'dEmi', 'dhEvento'):
+                registro['dh_emi'] = registro['dh_emi'] or texto
+            elif tag == 'vNF' and pai in ('ICMSTot', 'resNFe'):
+                registro['valor_total'] = _valor(texto, nome_arquivo)
+            elif tag == 'tpEvento':
+                registro['tp_evento'] = texto
+            elif tag in TAGS_CHAVE and not registro['chave'] and len(texto) == 44:
+                registro['chave'] = texto
+            # Memória constante: o que já foi lido não fica na árvore
+            elem.clear()
+    except ET.ParseError as e:
+        logging.warning(f"XML inválido '{nome_arquivo}': {e}")
+        return None
+    except Exception as e:
+        logging.warning(f"Não foi possível indexar '{nome_arquivo}': {e}")
+        return None
+
+    if not registro['chave']:
+        return None
+    registro['modelo'] = registro['chave'][20:22]
+    return registro
+
+
+class IndiceNotas:
+    """
+    Índice local (SQLite) dos metadados das notas: uma linha por chave de
+    acesso (e por tipo de evento), com índices por emitente, destinatário
+    e data de emissão para as consultas do dia a dia.
+    """
+
+    def __init__(self, caminho=None):
+        self.caminho = Path(caminho or os.environ.get("NOTAS_INDICE_PATH") or CAMINHO_INDICE_NOTAS_PADRAO)
+        os.makedirs(self.caminho.parent, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.caminho), timeout=30, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS notas (
+                    chave TEXT NOT NULL,
+                    tp_evento TEXT NOT NULL DEFAULT '',
+                    modelo TEXT,
+                    cnpj_emitente TEXT,
+                    cnpj_destinatario TEXT,
+                    dh_emi TEXT,
+                    valor_total REAL,
+                    arquivo TEXT,
+                    PRIMARY KEY (chave, tp_evento)
+                )
+                """
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_notas_emitente ON notas (cnpj_emitente, dh_emi)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_notas_destinatario ON notas (cnpj_destinatario, dh_emi)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_notas_dh_emi ON notas (dh_emi)")
+
+    def inserir_lote(self, registros):
+        """
+        Grava um lote numa única transação. A mesma chave (e evento)
+        substitui a linha anterior, sem duplicar.
+        """
+        if not registros:
+            return
+        with self._lock, self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO notas ({', '.join(COLUNAS)}) VALUES ({', '.join('?' for _ in COLUNAS)})",
+                [tuple(r[c] for c in COLUNAS) for r in registros]
+            )
+
+    def consultar(self, emitente=None, destinatario=None, inicio=None, fim=None, tp_evento=None, limite=None):
+        """
+        Notas filtradas por emitente, destinatário, período de emissão
+        ('inicio' e 'fim' em aaaa-mm-dd, fim inclusivo) e tipo de evento
+        ('' = só as notas). Retorna uma lista de dicts.
+        """
+        condicoes, parametros = [], []
+        if emitente:
+            condicoes.append("cnpj_emitente = ?")
+            parametros.append(emitente)
+        if destinatario:
+            condicoes.append("cnpj_destinatario = ?")
+            parametros.append(destinatario)
+        if inicio:
+            condicoes.append("dh_emi >= ?")
+            parametros.append(str(inicio))
+        if fim:
+            # 'fim' inclusivo: qualquer horário do último dia
+            condicoes.append("dh_emi < ?")
+            parametros.append((date.fromisoformat(str(fim)) + timedelta(days=1)).isoformat())
+        if tp_evento is not None:
+            condicoes.append("tp_evento = ?")
+            parametros.append(tp_evento)
+        sql = f"SELECT {', '.join(COLUNAS)} FROM notas"
+        if condicoes:
+            sql += " WHERE " + " AND ".join(condicoes)
+        sql += " ORDER BY dh_emi"
+        if limite:
+            sql += f" LIMIT {int(limite)}"
+        with self._lock:
+            linhas = self.conn.execute(sql, parametros).fetchall()
+        return [dict(zip(COLUNAS, linha)) for linha in linhas]
+
+    def total(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM notas").fetchone()[0]
+
+    def fechar(self):
+        with self._lock:
+            self.conn.close()
+
+
+class IndexadorNotas:
+    """
+    Estágio de indexação logo após a extração. 'enviar' lê o XML recém
+    gravado (antes que o upload o mova para o arquivo) e extrai os
+    metadados na própria thread ou, com workers > 1, num pool; os
+    resultados são gravados em lotes no IndiceNotas. O número de XMLs em
+    voo é limitado, então a memória não cresce com o tamanho do .zip.
+    'concorrencia' é quantos indexadores rodam ao mesmo tempo na máquina
+    (ex: navegadores do backfill): os workers são divididos entre eles.
+    O pool de processos usa 'spawn': um fork com as threads do Selenium e
+    do upload rodando pode travar o filho.
+    """
+
+    def __init__(self, indice=None, workers=None, tamanho_lote=None, processos=None, concorrencia=1):
+        self.indice = indice or IndiceNotas()
+        self.tamanho_lote = tamanho_lote or TAMANHO_LOTE_NOTAS_PADRAO
+        workers = WORKERS_INDICE_NOTAS_PADRAO if workers is None else workers
+        workers = min(workers, max(1, ((os.cpu_count() or 2) - 1) // max(1, concorrencia)))
+        processos = PROCESSOS_INDICE_NOTAS_PADRAO if processos is None else processos
+        self._pool = None
+        if workers > 1 and processos:
+            try:
+                self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            except (OSError, ValueError, NotImplementedError) as e:
+                # Ex: dentro de um processo que não pode criar filhos; fica com threads
+                logging.warning(f"Indexação de notas sem pool de processos: {e}")
+        if workers > 1 and self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="indice-notas")
+        self._max_pendentes = max(1, workers) * 64
+        self._pendentes = deque()
+        self._lote = []
+        self._lock = threading.Lock()
+        self.indexados = 0
+        self.ignorados = 0
+
+    def _coletar_futuro(self, futuro):
+        try:
+            registro = futuro.result()
+        except Exception as e:
+            # Ex: worker do pool de processos morto; o XML fica de fora do índice
+            logging.warning(f"Indexação de um XML falhou: {e}")
+            registro = None
+        self._coletar(registro)
+
+    def _coletar(self, registro):
+        if registro is None:
+            self.ignorados += 1
+            return
+        self._lote.append(registro)
+        self.indexados += 1
+        if len(self._lote) >= self.tamanho_lote:
+            self.indice.inserir_lote(self._lote)
+            self._lote = []
+
+    def enviar(self, caminho):
+        caminho = Path(caminho)
+        try:
+            conteudo = caminho.read_bytes()
+        except OSError as e:
+            logging.warning(f"Não foi possível ler '{caminho}' para o índice de notas: {e}")
+            return
+        with self._lock:
+            if self._pool is None:
+                self._coletar(extrair_metadados(conteudo, caminho.name))
+                return
+            self._pendentes.append(self._pool.submit(extrair_metadados, conteudo, caminho.name))
+            # Recolhe o que já terminou e segura o produtor se houver XMLs demais em voo
+            while self._pendentes and (self._pendentes[0].done() or len(self._pendentes) > self._max_pendentes):
+                self._coletar_futuro(self._pendentes.popleft())
+
+    def indexar(self, arquivos):
+        for caminho in arquivos:
+            self.enviar(caminho)
+
+    def finalizar(self):
+        """
+        Espera os XMLs em voo, grava o último lote e encerra o pool.
+        Retorna (indexados, ignorados).
+        """
+        with self._lock:
+            while self._pendentes:
+                self._coletar_futuro(self._pendentes.popleft())
+            self.indice.inserir_lote(self._lote)
+            self._lote = []
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+        print(f"Índice de notas: {self.indexados} XML(s) indexados, {self.ignorados} ignorado(s) sem chave de acesso ou ilegíveis "
+              f"({self.indice.total()} no total em {self.indice.caminho}).")
+        return self.indexados, self.ignorados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Índice local dos metadados das NF-e baixadas.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p_indexar = sub.add_parser("indexar", help="Indexa todos os XMLs de uma pasta (e subpastas).")
+    p_indexar.add_argument("pasta")
+    p_consultar = sub.add_parser("consultar", help="Lista as notas que atendem aos filtros.")
+    p_consultar.add_argument("--emitente", help="CNPJ/CPF do emitente.")
+    p_consultar.add_argument("--destinatario", help="CNPJ/CPF do destinatário.")
+    p_consultar.add_argument("--inicio", help="Data inicial de emissão (aaaa-mm-dd).")
+    p_consultar.add_argument("--fim", help="Data final de emissão (aaaa-mm-dd), inclusiva.")
+    p_consultar.add_argument("--evento", help="Tipo de evento (ex: 210200); sem ele, notas e eventos.")
+    p_consultar.add_argument("--limite", type=int)
+    args = parser.parse_args()
+
+    if args.comando == "indexar":
+        # Linha de comando: sem navegador nem uploads rodando, o pool de processos compensa
+        indexador = IndexadorNotas(workers=max(1, (os.cpu_count() or 2) - 1), processos=True)
+        indexador.indexar(Path(args.pasta).rglob("*.xml"))
+        indexador.finalizar()
+        return
+
+    notas = IndiceNotas().consultar(
+        emitente=args.emitente, destinatario=args.destinatario,
+        inicio=args.inicio, fim=args.fim, tp_evento=args.evento, limite=args.limite,
+    )
+    for nota in notas:
+        print("\t".join("" if nota[c] is None else str(nota[c]) for c in COLUNAS))
+    total = sum(n['valor_total'] or 0 for n in notas)
+    print(f"{len(notas)} registro(s), valor total {total:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,14 @@
+import os
 import time
 import logging
-import pandas as pd
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
+from classes.espera import Espera
+from classes.navegacao import CacheNavegacao, SCRIPT_NAVEGAR_MENU
+from classes.sessao import SessaoNavegador
 
 try:
     from utils import verificar_chrome_driver
@@ -16,6 +18,117 @@ except ImportError:
     def verificar_chrome_driver():
         return None
 
+# Mensagens de carregamento do Innovaro (ids no documento principal)
+OVERLAYS_CARREGAMENTO = ['statusMessageBox', 'waitMessageBox', 'progressMessageBox', 'content_waitMessageBox']
+
+# Tempo (s) sem nenhuma overlay para considerar o carregamento encerrado
+CARREGAMENTO_SETTLE = float(os.environ.get("INNOVARO_CARREGAMENTO_SETTLE", "0.5"))
+# Depois de uma ação que sabidamente dispara um carregamento (login, abrir
+# a tela, exportação), o Innovaro às vezes só mostra a overlay mais de 0,5 s
+# depois. Nesses casos carregamento(aparecer=...) espera a overlay surgir ao
+# menos uma vez, por até este tempo (a janela de 3 s do código antigo),
+# antes de aplicar o settle. Custo: se o carregamento já tiver terminado
+# antes da chamada, ela espera a janela inteira; por isso não é o padrão.
+CARREGAMENTO_APARECER = float(os.environ.get("INNOVARO_CARREGAMENTO_APARECER", "3"))
+CARREGAMENTO_TIMEOUT = float(os.environ.get("INNOVARO_CARREGAMENTO_TIMEOUT", "300"))
+
+# Executado via execute_async_script: observa todas as overlays de uma vez
+# (MutationObserver + verificação curta) e devolve quanto tempo cada uma ficou na tela.
+SCRIPT_ESPERA_CARREGAMENTO = """
+var ids = arguments[0], settle = arguments[1], timeout = arguments[2], aparecer = arguments[3];
+var done = arguments[arguments.length - 1];
+var topo = window.top.document;
+var inicio = performance.now(), livreDesde = null, finalizado = false, vista = false;
+var abertas = {}, acumulado = {}, carregamentos = 0, observer = null, timer = null;
+
+function finalizar(esgotado) {
+    if (finalizado) { return; }
+    finalizado = true;
+    var agora = performance.now();
+    for (var id in abertas) { acumulado[id] = (acumulado[id] || 0) + agora - abertas[id]; }
+    if (observer) { observer.disconnect(); }
+    clearTimeout(timer);
+    done({overlays: acumulado, carregamentos: carregamentos, esgotado: esgotado});
+}
+
+function verificar() {
+    if (finalizado) { return; }
+    var agora = performance.now(), algumaPresente = false;
+    for (var i = 0; i < ids.length; i++) {
+        var id = ids[i];
+        if (topo.getElementById(id)) {
+            algumaPresente = true;
+            if (!(id in abertas)) { abertas[id] = agora; carregamentos++; }
+        } else if (id in abertas) {
+            acumulado[id] = (acumulado[id] || 0) + agora - abertas[id];
+            delete abertas[id];
+        }
+    }
+    if (algumaPresente) {
+        vista = true;
+        livreDesde = null;
+    } else if (livreDesde === null) {
+        livreDesde = agora;
+    }
+    // Enquanto nenhuma overlay apareceu, a página livre só encerra depois
+    // da janela 'aparecer' (0 = basta o settle)
+    if (livreDesde !== null && agora - livreDesde >= settle && (vista || agora - inicio >= aparecer)) {
+        return finalizar(false);
+    }
+    if (agora - inicio >= timeout) { return finalizar(true); }
+    clearTimeout(timer);
+    timer = setTimeout(verificar, 50);
+}
+
+observer = new MutationObserver(verificar);
+observer.observe(topo.documentElement, {childList: true, subtree: true});
+verificar();
+"""
+
+# Escolha do iframe da aba ativa: o 'tab-frame' visível cujo título bate com
+# o informado ou, sem título, o último visível.
+_ESCOLHER_FRAME = """
+function escolherFrame(doc, titulo) {
+    var frames = Array.prototype.filter.call(
+        doc.getElementsByClassName('tab-frame'),
+        function (f) { return f.offsetParent !== null || f.getClientRects().length > 0; }
+    );
+    if (titulo) {
+        for (var i = frames.length - 1; i >= 0; i--) {
+            var f = frames[i], tituloFrame = f.title || f.name || '';
+            try { tituloFrame = tituloFrame || f.contentDocument.title; } catch (e) {}
+            if (tituloFrame.indexOf(titulo) !== -1) { return f; }
+        }
+    }
+    return frames.length ? frames[frames.length - 1] : null;
+}
+"""
+
+# Executado no conteúdo principal: retorna o iframe alvo
+SCRIPT_FRAME_ALVO = _ESCOLHER_FRAME + "return escolherFrame(document, arguments[0]);"
+
+# Executado dentro do frame atual: ele já é o alvo?
+SCRIPT_JA_NO_FRAME_ALVO = _ESCOLHER_FRAME + """
+return window.frameElement !== null && escolherFrame(window.top.document, arguments[0]) === window.frameElement;
+"""
+
+# Executado via execute_script: texto, visibilidade e índice de todos os
+# elementos de uma classe numa única ida ao navegador.
+SCRIPT_CONSULTAR_ELEMENTOS = """
+var elementos = document.getElementsByClassName(arguments[0]);
+var resultado = [];
+for (var i = 0; i < elementos.length; i++) {
+    var el = elementos[i];
+    resultado.push({
+        indice: i,
+        texto: (el.innerText || '').trim(),
+        visivel: el.offsetParent !== null,
+        elemento: el
+    });
+}
+return resultado;
+"""
+
 class Innovaro:
     """
     Classe de automação para interagir com o sistema Innovaro.
@@ -23,191 +136,207 @@ class Innovaro:
     como login, navegação em menus e manipulação de iframes.
     """
 
-    def __init__(self, usuario, senha, url='http://192.168.3.141/sistema', wait_time=20):
+    def __init__(self, usuario, senha, url='http://192.168.3.141/sistema', wait_time=20, pacing=None,
+                 headless=None, perfil_dir=None, caminho_cookies=None, caminho_cache_navegacao=None):
         """
         Construtor da classe.
         Inicializa o navegador, define o tempo de espera e 
-        executa o login no sistema Innovaro.
+        executa o login no sistema Innovaro (ou reaproveita a sessão
+        anterior, se ela ainda for válida).
         """
         print(f"Iniciando automação no Innovaro: {url}")
+        self.nav = None
+        self.sessao = SessaoNavegador(headless=headless, perfil_dir=perfil_dir, caminho_cookies=caminho_cookies)
         
         try:
             # Tenta iniciar o Chrome (assume que o driver está no PATH)
-            self.nav = webdriver.Chrome()
+            self.nav = self.sessao.criar_driver()
         except Exception as e:
             print(f"Erro ao iniciar Chrome. Tentando com 'verificar_chrome_driver()'. Erro: {e}")
             try:
-                # Substitua pela sua função real se necessário
                 chrome_driver_path = verificar_chrome_driver() 
-                self.nav = webdriver.Chrome(chrome_driver_path)
-                
-                # Simplesmente relançando o erro por enquanto, 
-                # já que a função não foi definida
-                raise e
+                self.nav = self.sessao.criar_driver(chrome_driver_path)
             except Exception as e_inner:
                 logging.error(f"Falha total ao iniciar o WebDriver: {e_inner}")
                 return
 
+        # Frame em que o driver está (None = conteúdo principal)
+        self._frame_atual = None
+
         # Armazena o objeto de espera (Wait) para reuso
         self.wait = WebDriverWait(self.nav, wait_time)
         self.wait_load = WebDriverWait(self.nav, 3)
-        
-        # Lógica de login (original de acessar_innovaro_login)
-        self.nav.maximize_window()
-        self.nav.get(url)
-        time.sleep(1)
+        # Esperas por condição (substituem os time.sleep fixos) + relatório
+        self.espera = Espera(self.nav, timeout=wait_time, pacing=pacing)
+        # Ids dos nós do menu já resolvidos em execuções anteriores
+        self.cache_navegacao = CacheNavegacao(caminho_cache_navegacao)
+
+        try:
+            self._entrar(usuario, senha, url)
+        except BaseException:
+            # Quem chamou não recebe o objeto e não teria como fechar o
+            # Chrome (nem o chromedriver) no seu próprio finally
+            self.fechar_navegador()
+            raise
+
+    def _entrar(self, usuario, senha, url):
+        """
+        Abre o sistema: reaproveita a sessão anterior ou faz o login.
+        """
+        # Sessão ainda autenticada (perfil persistente ou cookies salvos)?
+        if self.sessao.abrir(self.nav, url):
+            self.carregamento()
+            return
 
+        # Lógica de login (original de acessar_innovaro_login)
         try:
-            self.nav.find_element(By.ID, 'username').send_keys(usuario)
-            time.sleep(1) # Reduzi o tempo, pode ajustar se necessário
+            # Antes: 3 x time.sleep(1) entre carregar a página e cada campo
+            campo_usuario = self.espera.ate(
+                EC.element_to_be_clickable((By.ID, 'username')), "login: formulário", orcamento_antigo=3
+            )
+            campo_usuario.send_keys(usuario)
             self.nav.find_element(By.ID, 'password').send_keys(senha)
-            time.sleep(1)
             self.nav.find_element(By.ID, 'submit-login').click()
             print("Login realizado com sucesso.")
-            self.carregamento()
+            self.carregamento(apos_acao=True)
+            # Se o login tiver falhado, a próxima execução descobre pelo
+            # esta_autenticado e simplesmente faz o login de novo
+            self.sessao.salvar_cookies(self.nav)
         except Exception as e:
             print(f"Erro durante o login: {e}")
             logging.error(f"Erro durante o login: {e}")
 
     # --- Métodos de Navegação (Iframes) ---
 
-    def iframes(self):
+    def iframes(self, titulo=None):
         """
-        Itera sobre os iframes da classe 'tab-frame' e 
-        tenta entrar no último disponível.
+        Entra direto no iframe ('tab-frame') da aba ativa: o último visível
+        ou, se informado, o que tiver o título da aba/tela.
+        O frame atual é rastreado; se o driver já estiver nele, nenhuma
+        troca de contexto é feita.
         """
         try:
-            iframe_list = self.nav.find_elements(By.CLASS_NAME, 'tab-frame')
-            
-            for iframe_index in range(len(iframe_list)):
-                time.sleep(1)
+            if self._frame_atual is not None:
+                # Uma chamada dentro do frame atual responde se ele já é o alvo
                 try:
-                    self.saida_iframe() # Garante que estamos no contexto padrão
-                    self.nav.switch_to.frame(iframe_list[iframe_index])
-                    print(f"Trocado para o iframe {iframe_index}")
-                except Exception as e_inner:
-                    print(f"Não foi possível trocar para o iframe {iframe_index}: {e_inner}")
-                    pass
+                    if self.nav.execute_script(SCRIPT_JA_NO_FRAME_ALVO, titulo):
+                        return
+                except Exception:
+                    # Frame atual foi fechado/recarregado: contexto desconhecido
+                    self._frame_atual = None
+                    self.saida_iframe(forcar=True)
+
+            self.saida_iframe()
+            alvo = self.nav.execute_script(SCRIPT_FRAME_ALVO, titulo)
+            if alvo is None:
+                print("Nenhum iframe de aba visível encontrado.")
+                return
+            self.nav.switch_to.frame(alvo)
+            self._frame_atual = alvo
+            print(f"Trocado para o iframe da aba ativa{f' ({titulo})' if titulo else ''}")
         except Exception as e:
-            print(f"Erro ao buscar lista de iframes: {e}")
+            print(f"Erro ao trocar para o iframe da aba ativa: {e}")
 
-    def saida_iframe(self):
+    def saida_iframe(self, forcar=False):
         """
         Retorna o foco do driver para o conteúdo principal (fora de qualquer iframe).
+        Não faz nada se o driver já estiver no conteúdo principal.
         """
+        if self._frame_atual is None and not forcar:
+            return
         try:
             self.nav.switch_to.default_content()
+            self._frame_atual = None
         except Exception as e:
             print(f"Erro ao sair do iframe: {e}")
     
     
-    def carregamento(self):
-        cont_load = 0
-        self.saida_iframe()
+    def carregamento(self, settle=None, timeout=None, apos_acao=False):
+        """
+        Espera todas as mensagens de carregamento do Innovaro sumirem.
+        Uma única chamada assíncrona no navegador observa as quatro
+        overlays ao mesmo tempo e retorna assim que nenhuma estiver presente
+        por 'settle' segundos seguidos.
+        Com 'apos_acao' (logo depois de uma ação que dispara um carregamento),
+        a página livre só conta depois que uma overlay aparecer, ou depois de
+        CARREGAMENTO_APARECER segundos sem nenhuma.
+        Retorna um dict com os tempos: total, por overlay e quantidade de
+        carregamentos observados.
+        """
+        if settle is None:
+            settle = CARREGAMENTO_SETTLE
+        if timeout is None:
+            timeout = CARREGAMENTO_TIMEOUT
+        aparecer = CARREGAMENTO_APARECER if apos_acao else 0
 
-        print('procurando carregamento 1')
-        try:
-            # Espera inicial para verificar se a mensagem de carregamento existe
-            carregamento = self.wait_load.until(EC.presence_of_element_located((By.XPATH, '//*[@id="statusMessageBox"]')))
-            
-            # Enquanto o elemento existir, continue verificando
-            while True:
-                print("Carregando...")
-                try:
-                    # Aguarde novamente pela presença do elemento
-                    carregamento = self.wait_load.until(EC.presence_of_element_located((By.XPATH, '//*[@id="statusMessageBox"]')))
-                
-                except TimeoutException:
-                    cont_load+=1
-                    break
-        except TimeoutException:
-            # Não há mensagem de carregamento inicial
-            pass    
-
-        print('procurando carregamento 2')
-        try:
-            # Espera inicial para verificar se a mensagem de carregamento existe
-            carregamento =  self.wait_load.until(EC.presence_of_element_located((By.XPATH, '//*[@id="waitMessageBox"]')))
-            
-            
-            # Enquanto o elemento existir, continue verificando
-            while True:
-                print("Carregando...")
-                try:
-                    # Aguarde novamente pela presença do elemento
-                    carregamento =  self.wait_load.until(EC.presence_of_element_located((By.XPATH, '//*[@id="waitMessageBox"]')))
-                except TimeoutException:
-                    # Se o elemento não for encontrado, interrompa o loop
-                    cont_load+=1
-                    break
-        except TimeoutException:
-            # Não há mensagem de carregamento inicial
-            pass  
-
-        print('procurando carregamento 3')
-        try:
-            # Espera inicial para verificar se a mensagem de carregamento existe
-            carregamento =  self.wait_load.until(EC.presence_of_element_located((By.XPATH, '//*[@id="progressMessageBox"]')))
-            
-            # Enquanto o elemento existir, continue verificando
-            while True:
-                print("Carregando...")
-                try:
-                    # Aguarde novamente pela presença do elemento
-                    carregamento =  self.wait_load.until(EC.presence_of_element_located((By.XPATH, '//*[@id="progressMessageBox"]')))
-                except TimeoutException:
-                    # Se o elemento não for encontrado, interrompa o loop
-                    cont_load+=1
-                    break
-        except TimeoutException:
-            # Não há mensagem de carregamento inicial
-            pass    
-
-        print('procurando carregamento 4')
+        # As overlays são lidas em window.top, então não é preciso sair do iframe
+        inicio = time.perf_counter()
         try:
-            # Espera inicial para verificar se a mensagem de carregamento existe
-            carregamento = self.wait_load.until(EC.presence_of_element_located((By.XPATH, '//*[@id="content_waitMessageBox"]')))
-            cont_load+=1
-            
-            # Enquanto o elemento existir, continue verificando
-            while True:
-                print("Carregando...")
-                try:
-                    # Aguarde novamente pela presença do elemento
-                    carregamento = self.wait_load.until(EC.presence_of_element_located((By.XPATH, '//*[@id="content_waitMessageBox"]')))
-                except TimeoutException:
-                    # Se o elemento não for encontrado, interrompa o loop
-                    cont_load+=1
-                    break
-        except TimeoutException:
-            # Não há mensagem de carregamento inicial
-            self.iframes()
-            pass 
+            self.nav.set_script_timeout(timeout + 5)
+            resultado = self.nav.execute_async_script(
+                SCRIPT_ESPERA_CARREGAMENTO, OVERLAYS_CARREGAMENTO, settle * 1000, timeout * 1000, aparecer * 1000
+            )
+        except Exception as e:
+            print(f"Erro ao aguardar carregamento: {e}")
+            logging.error(f"Erro ao aguardar carregamento: {e}")
+            resultado = {'overlays': {}, 'carregamentos': 0, 'esgotado': True}
+
+        tempos = {
+            'total': time.perf_counter() - inicio,
+            'overlays': {nome: ms / 1000 for nome, ms in resultado.get('overlays', {}).items()},
+            'carregamentos': resultado.get('carregamentos', 0),
+            'esgotado': resultado.get('esgotado', False),
+        }
+
+        if tempos['carregamentos']:
+            # Só o tempo com overlay na tela mede o servidor (não o settle)
+            self.espera.observar_carregamento(sum(tempos['overlays'].values()))
+        if tempos['esgotado']:
+            print(f"AVISO: carregamento ainda presente após {timeout}s.")
+        detalhes = ", ".join(f"{nome}: {seg:.2f}s" for nome, seg in tempos['overlays'].items()) or "nenhum"
+        print(f"Carregamento concluído em {tempos['total']:.2f}s (esperando: {detalhes})")
 
         self.iframes()
-        print("quantidade de carregamentos: ",cont_load)
-        return cont_load
+        print("quantidade de carregamentos: ", tempos['carregamentos'])
+        return tempos
 
 
     # --- Métodos de Interação com Menu ---
 
+    def consultar_elementos(self, classe):
+        """
+        Consulta todos os elementos de uma classe numa única chamada ao
+        navegador (em vez de um 'elemento.text' por elemento).
+        Retorna uma lista de dicts com: indice, texto, visivel e elemento.
+        """
+        return self.nav.execute_script(SCRIPT_CONSULTAR_ELEMENTOS, classe) or []
+
     def listar(self, classe):
         """
         Lista elementos de uma classe, filtra vazios e retorna:
         1. A lista de web elements originais.
-        2. Um DataFrame do Pandas com os textos.
+        2. A lista de dicts (indice, texto, visivel) dos que têm texto.
         """
-        lista_menu = self.nav.find_elements(By.CLASS_NAME, classe)
-        elementos_menu = []
-
-        for elemento in lista_menu:
-            elementos_menu.append(elemento.text)
-
-        test_lista = pd.DataFrame(elementos_menu, columns=['texto'])
-        test_lista = test_lista.loc[test_lista['texto'] != ""].reset_index()
+        consulta = self.consultar_elementos(classe)
+        lista_menu = [item['elemento'] for item in consulta]
+        test_lista = [
+            {'indice': item['indice'], 'texto': item['texto'], 'visivel': item['visivel']}
+            for item in consulta if item['texto'] != ""
+        ]
 
         return lista_menu, test_lista
 
+    def _encontrar_item_menu(self, item_menu, classe='webguiTreeNodeLabel'):
+        """
+        Retorna o web element visível com o texto exato, ou False.
+        Usado como condição de espera.
+        """
+        lista_menu, test_list = self.listar(classe)
+        for item in test_list:
+            if item['texto'] == item_menu and item['visivel']:
+                return lista_menu[item['indice']]
+        return False
+
     def listar_menu_click(self, item_menu):
         """
         Busca por um texto específico no menu e clica nele.
@@ -215,25 +344,69 @@ class Innovaro:
         """
         print(f"Buscando e clicando no item de menu: '{item_menu}'")
         try:
-            lista_menu, test_list = self.listar('webguiTreeNodeLabel')
-            time.sleep(1)
-            
-            # Encontra o índice do item no DataFrame
-            item_encontrado = test_list.loc[test_list['texto'] == item_menu]
-            
-            if item_encontrado.empty:
+            # Espera o item aparecer no menu (antes: sleep(1) aqui, sleep(2)
+            # depois do clique e mais sleep(2) no app.py entre os itens)
+            try:
+                elemento = self.espera.ate(
+                    lambda nav: self._encontrar_item_menu(item_menu),
+                    f"menu: '{item_menu}'", orcamento_antigo=5
+                )
+            except TimeoutException:
                 print(f"Erro: Item de menu '{item_menu}' não encontrado.")
-                return
-
-            click_index = item_encontrado.iloc[0]['index']
+                return False
             
             # Clica no web element correspondente
-            lista_menu[click_index].click()
-            time.sleep(2)
+            elemento.click()
             print(f"Clicado com sucesso.")
+            return True
         except Exception as e:
             print(f"Erro ao clicar no menu '{item_menu}': {e}")
             logging.error(f"Erro ao clicar no menu '{item_menu}': {e}")
+            return False
+
+    def navegar_menu(self, caminho_menu, timeout_passo=20):
+        """
+        Abre o menu principal e percorre o caminho completo (lista de textos
+        dos itens, do primeiro nível até a tela desejada) numa única chamada
+        ao navegador. Os ids dos nós resolvidos ficam em cache no disco e são
+        usados direto nas próximas execuções; se o cache estiver velho, o
+        próprio script procura pelo texto. Só se isso falhar é que volta para
+        o clique item a item com listar_menu_click.
+        Retorna True se chegou ao último item.
+        """
+        print(f"Navegando no menu: {' > '.join(caminho_menu)}")
+
+        self.menu_innovaro()
+        ids_cache = self.cache_navegacao.get(caminho_menu)
+
+        inicio = time.perf_counter()
+        try:
+            self.nav.set_script_timeout(timeout_passo * len(caminho_menu) + 5)
+            resultado = self.nav.execute_async_script(
+                SCRIPT_NAVEGAR_MENU, list(caminho_menu), ids_cache, timeout_passo * 1000
+            )
+        except Exception as e:
+            print(f"Erro na navegação pelo navegador: {e}")
+            logging.error(f"Erro na navegação pelo navegador: {e}")
+            resultado = {'ok': False, 'passo': 0, 'ids': [], 'cache': 0}
+        duracao = time.perf_counter() - inicio
+        # Antes: 5 x (sleep(1) + sleep(2) + sleep(2) no app.py) por item
+        self.espera.registrar(f"navegação: {caminho_menu[-1]}", duracao, 5 * len(caminho_menu))
+
+        if resultado.get('ok'):
+            print(f"Navegação concluída em {duracao:.2f}s ({resultado.get('cache', 0)}/{len(caminho_menu)} nós vindos do cache).")
+            if resultado.get('ids') != ids_cache:
+                self.cache_navegacao.set(caminho_menu, resultado.get('ids'))
+            return True
+
+        # Cache velho e texto não encontrado: volta ao clique item a item
+        passo = resultado.get('passo', 0)
+        print(f"Navegação direta parou em '{caminho_menu[passo]}'. Usando o clique item a item.")
+        self.cache_navegacao.invalidar(caminho_menu)
+        for item_menu in caminho_menu[passo:]:
+            if not self.listar_menu_click(item_menu):
+                return False
+        return True
 
 
     def menu_innovaro(self):
@@ -244,10 +417,11 @@ class Innovaro:
             # Tenta sair de qualquer iframe primeiro
             self.saida_iframe()
             
-            time.sleep(2)
-            # Usa o 'self.wait' definido no __init__
+            # Antes: sleep(2) aqui e mais sleep(2) no app.py depois do clique
             xpath_menu = '//*[@id="bt_1892603865"]'
-            self.wait.until(EC.element_to_be_clickable((By.XPATH, xpath_menu))).click()
+            self.espera.ate(
+                EC.element_to_be_clickable((By.XPATH, xpath_menu)), "menu principal", orcamento_antigo=4
+            ).click()
             
             logging.info("Clicou no menu")
             print("Menu principal clicado.")
@@ -267,12 +441,15 @@ class Innovaro:
     def botao_e(self):
         try:
             self.saida_iframe()
-            time.sleep(1.5)
             xpath = '/html/body/div[2]/table/tbody/tr/td[9]/div/input'
-            self.wait.until(EC.presence_of_element_located((By.XPATH, xpath)))
-            time.sleep(1.5)
-            self.nav.find_element(By.XPATH, xpath).send_keys(Keys.CONTROL,Keys.SHIFT + 'e')
-            time.sleep(3)
+            # Antes: 2 x sleep(1.5) antes do atalho e sleep(1) no app.py
+            campo = self.espera.ate(
+                EC.element_to_be_clickable((By.XPATH, xpath)), "atalho Ctrl+Shift+E", orcamento_antigo=4
+            )
+            campo.send_keys(Keys.CONTROL,Keys.SHIFT + 'e')
+            # Antes: sleep(3). O app.py chama carregamento() logo em seguida,
+            # que espera a execução; aqui fica só a pausa do perfil de pacing.
+            self.espera.pausa(3, "após atalho Ctrl+Shift+E")
         except Exception as e:
             print(f"Ocorreu um erro durante o preenchimento da data inicial e final: {e}")
             logging.error(f"Ocorreu um erro durante o preenchimento da data inicial e final: {e}")
\ No newline at end of file
@@ -0,0 +1,183 @@
+# Em: classes/monitor_download.py
+
+import os
+import sys
+import json
+import time
+import select
+import ctypes
+import ctypes.util
+import logging
+from pathlib import Path
+
+# Constantes do inotify (linux/inotify.h)
+IN_CREATE = 0x00000100
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# Intervalo máximo entre verificações quando não há inotify (Windows/macOS)
+INTERVALO_VERIFICACAO = 0.25
+
+# Extensões de arquivos temporários do Chrome durante o download
+EXTENSOES_TEMPORARIAS = ('.crdownload', '.tmp', '.part')
+
+
+class _Inotify:
+    """
+    Acesso mínimo ao inotify via ctypes, para acordar assim que um arquivo
+    for criado/renomeado na pasta, sem polling.
+    """
+
+    def __init__(self, pasta):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+        mascara = IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO
+        if libc.inotify_add_watch(self.fd, str(pasta).encode(), mascara) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch falhou")
+
+    def esperar(self, timeout):
+        prontos, _, _ = select.select([self.fd], [], [], timeout)
+        if prontos:
+            try:
+                # Descarta os eventos; a pasta é conferida logo em seguida
+                os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                pass
+
+    def fechar(self):
+        os.close(self.fd)
+
+
+class MonitorDownload:
+    """
+    Aguarda a conclusão de UM download específico do Chrome.
+
+    - Antes do clique, 'iniciar()' tira uma foto da pasta e descarta eventos
+      antigos, para que um .zip que sobrou de outra execução nunca seja
+      confundido com o download atual.
+    - Os eventos do DevTools (Page.downloadWillBegin / Page.downloadProgress)
+      lidos do log 'performance' identificam o download pelo GUID e pelo
+      nome sugerido e avisam a conclusão na hora.
+    - Em paralelo, a pasta é observada (inotify no Linux, verificação curta
+      nos demais sistemas) caso os eventos não estejam disponíveis.
+    """
+
+    def __init__(self, nav, pasta, extensao='.zip'):
+        self.nav = nav
+        self.pasta = Path(pasta)
+        self.extensao = extensao
+        self._snapshot = set()
+        self._guid = None
+        self._nome_sugerido = None
+        self._concluido = False
+        self._eventos_disponiveis = True
+
+    def iniciar(self):
+        self._snapshot = set(os.listdir(self.pasta))
+        self._guid = None
+        self._nome_sugerido = None
+        self._concluido = False
+        # Descarta eventos anteriores ao clique
+        self._ler_eventos()
+
+    def _ler_eventos(self):
+        """
+        Lê os eventos de download do log 'performance' do ChromeDriver.
+        """
+        if not self._eventos_disponiveis:
+            return
+        try:
+            entradas = self.nav.get_log('performance')
+        except Exception:
+            # Log de performance não habilitado neste driver
+            self._eventos_disponiveis = False
+            return
+
+        for entrada in entradas:
+            try:
+                mensagem = json.loads(entrada['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            metodo = mensagem.get('method', '')
+            params = mensagem.get('params', {})
+            if metodo.endswith('.downloadWillBegin'):
+                if self._guid is None:
+                    self._guid = params.get('guid')
+                    self._nome_sugerido = params.get('suggestedFilename')
+                    print(f"Download iniciado: '{self._nome_sugerido}' (guid {self._guid})")
+            elif metodo.endswith('.downloadProgress') and params.get('guid') == self._guid:
+                estado = params.get('state')
+                if estado == 'completed':
+                    self._concluido = True
+                elif estado == 'canceled':
+                    raise Exception(f"Download '{self._nome_sugerido}' foi cancelado pelo navegador.")
+
+    def _arquivo_novo(self):
+        """
+        Procura na pasta o arquivo do download atual, já finalizado.
+        """
+        atuais = set(os.listdir(self.pasta))
+        novos = atuais - self._snapshot
+        # Enquanto houver temporário do Chrome, o download não terminou
+        if any(nome.endswith(EXTENSOES_TEMPORARIAS) for nome in novos) and not self._concluido:
+            return None
+
+        if self._nome_sugerido:
+            base, ext = os.path.splitext(self._nome_sugerido)
+            # O Chrome pode acrescentar ' (1)' se o nome já existir
+            candidatos = [n for n in novos if n == self._nome_sugerido or (n.startswith(base) and n.endswith(ext))]
+        else:
+            candidatos = [n for n in novos if n.lower().endswith(self.extensao)]
+
+        candidatos = [n for n in candidatos if not n.endswith(EXTENSOES_TEMPORARIAS)]
+        if len(candidatos) > 1:
+            logging.warning(f"Mais de um arquivo novo na pasta de download: {candidatos}")
+        if candidatos:
+            # O mais recente, caso haja mais de um
+            return max((self.pasta / n for n in candidatos), key=lambda p: p.stat().st_mtime)
+        return None
+
+    def aguardar(self, timeout=60):
+        """
+        Bloqueia até o arquivo do download atual estar completo na pasta.
+        Retorna o caminho (str) do arquivo.
+        """
+        print(f"Aguardando download na pasta: {self.pasta}")
+        inicio = time.monotonic()
+        fim = inicio + timeout
+
+        observador = None
+        if sys.platform.startswith('linux'):
+            try:
+                observador = _Inotify(self.pasta)
+            except (OSError, AttributeError) as e:
+                logging.info(f"inotify indisponível, usando verificação periódica: {e}")
+
+        try:
+            while True:
+                self._ler_eventos()
+                arquivo = self._arquivo_novo()
+                if arquivo is not None:
+                    print(f"Download concluído em {time.monotonic() - inicio:.2f}s: {arquivo}")
+                    return str(arquivo)
+
+                restante = fim - time.monotonic()
+                if restante <= 0:
+                    break
+                # Os eventos do DevTools só são lidos a cada volta, então o
+                # bloqueio do inotify também é limitado ao intervalo curto.
+                espera = min(restante, INTERVALO_VERIFICACAO)
+                if observador:
+                    observador.esperar(espera)
+                else:
+                    time.sleep(espera)
+        finally:
+            if observador:
+                observador.fechar()
+
+        raise Exception(f"Tempo esgotado ({timeout}s). Nenhum arquivo {self.extensao} concluído foi encontrado.")
@@ -0,0 +1,105 @@
+# Em: classes/navegacao.py
+
+import os
+import json
+import logging
+from pathlib import Path
+
+# Cache em disco dos nós do menu já resolvidos (caminho -> ids dos nós)
+CAMINHO_CACHE_PADRAO = Path.home() / "XML- Robô Innovaro/cache_navegacao.json"
+
+# Executado via execute_async_script: percorre o caminho inteiro do menu
+# dentro do navegador. Para cada nível tenta primeiro o id em cache (conferindo
+# o texto) e, se ele não servir mais, procura pelo texto entre os
+# 'webguiTreeNodeLabel' visíveis. Clica e espera o próximo nível aparecer,
+# sem voltar ao Python entre os cliques.
+SCRIPT_NAVEGAR_MENU = """
+var passos = arguments[0], ids = arguments[1] || [], timeout = arguments[2];
+var done = arguments[arguments.length - 1];
+var resolvidos = [], usouCache = 0, i = 0, inicioPasso = performance.now();
+
+function visivel(el) { return el && el.offsetParent !== null; }
+function texto(el) { return (el.innerText || '').trim(); }
+
+function encontrar(k) {
+    var id = ids[k];
+    if (id) {
+        var el = document.getElementById(id);
+        if (visivel(el) && texto(el) === passos[k]) { return [el, true]; }
+    }
+    var elementos = document.getElementsByClassName('webguiTreeNodeLabel');
+    for (var j = 0; j < elementos.length; j++) {
+        if (visivel(elementos[j]) && texto(elementos[j]) === passos[k]) { return [elementos[j], false]; }
+    }
+    return null;
+}
+
+function clicar(el) {
+    ['mousedown', 'mouseup', 'click'].forEach(function (tipo) {
+        el.dispatchEvent(new MouseEvent(tipo, {bubbles: true, cancelable: true, view: window}));
+    });
+}
+
+function passo() {
+    if (i >= passos.length) { return done({ok: true, ids: resolvidos, cache: usouCache}); }
+    var r = encontrar(i);
+    if (!r) {
+        if (performance.now() - inicioPasso > timeout) {
+            return done({ok: false, passo: i, ids: resolvidos, cache: usouCache});
+        }
+        return setTimeout(passo, 50);
+    }
+    if (r[1]) { usouCache++; }
+    resolvidos.push(r[0].id || null);
+    clicar(r[0]);
+    i++;
+    inicioPasso = performance.now();
+    setTimeout(passo, 0);
+}
+
+passo();
+"""
+
+
+class CacheNavegacao:
+    """
+    Guarda, por caminho de menu, os ids dos nós clicados na última
+    navegação bem-sucedida.
+    """
+
+    def __init__(self, caminho=None):
+        self.caminho = Path(caminho or os.environ.get("INNOVARO_CACHE_NAVEGACAO") or CAMINHO_CACHE_PADRAO)
+        self.dados = {}
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                self.dados = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"Cache de navegação ignorado ({self.caminho}): {e}")
+
+    @staticmethod
+    def chave(caminho_menu):
+        return " > ".join(caminho_menu)
+
+    def get(self, caminho_menu):
+        return self.dados.get(self.chave(caminho_menu), [])
+
+    def set(self, caminho_menu, ids):
+        self.dados[self.chave(caminho_menu)] = ids
+        self._salvar()
+
+    def invalidar(self, caminho_menu):
+        if self.dados.pop(self.chave(caminho_menu), None) is not None:
+            self._salvar()
+
+    def _salvar(self):
+        try:
+            os.makedirs(self.caminho.parent, exist_ok=True)
+            # Temporário + os.replace: outro processo nunca lê um JSON pela metade
+            temporario = self.caminho.with_name(f"{self.caminho.name}.{os.getpid()}.tmp")
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(self.dados, f, ensure_ascii=False, indent=2)
+            os.replace(temporario, self.caminho)
+        except OSError as e:
+            logging.warning(f"Não foi possível salvar o cache de navegação: {e}")
@@ -0,0 +1,161 @@
+# Em: classes/orquestrador.py
+
+import os
+import json
+import time
+import logging
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+# Cada empresa/filial ganha uma pasta própria abaixo desta
+PASTA_TENANTS_PADRAO = Path.home() / "XML- Robô Innovaro/tenants"
+
+
+def carregar_tenants(caminho):
+    """
+    Lê o arquivo de tarefas (JSON) com a lista de empresas/filiais:
+
+        {
+          "tenants": [
+            {
+              "nome": "matriz",
+              "usuario_env": "USUARIO_MATRIZ",
+              "senha_env": "SENHA_MATRIZ",
+              "url": "http://192.168.3.141/sistema",
+              "drive_folder_id": "1AbC...",
+              "shared_drive_id": "0AbC..."
+            }
+          ]
+        }
+
+    As credenciais ficam no .env: 'usuario_env'/'senha_env' dizem o nome das
+    variáveis. 'url' é opcional (usa o padrão do Innovaro), assim como
+    'shared_drive_id' (o Drive compartilhado da pasta do tenant; sem ele,
+    vale GOOGLE_SHARED_DRIVE_ID).
+    """
+    with open(caminho, 'r', encoding='utf-8') as f:
+        dados = json.load(f)
+
+    tenants = []
+    for item in dados.get('tenants', []):
+        nome = item.get('nome')
+        if not nome:
+            raise ValueError("Todo tenant precisa de um 'nome'.")
+        usuario = os.environ.get(item.get('usuario_env', ''), item.get('usuario'))
+        senha = os.environ.get(item.get('senha_env', ''), item.get('senha'))
+        if not usuario or not senha:
+            raise ValueError(f"Credenciais do tenant '{nome}' não encontradas no .env.")
+        if not item.get('drive_folder_id'):
+            raise ValueError(f"O tenant '{nome}' precisa de um 'drive_folder_id'.")
+        tenants.append({
+            'nome': nome,
+            'usuario': usuario,
+            'senha': senha,
+            'url': item.get('url'),
+            'drive_folder_id': item['drive_folder_id'],
+            'shared_drive_id': item.get('shared_drive_id'),
+        })
+    return tenants
+
+
+def _baixar_tenant(tenant, pasta_base, modo_download=None, headless=None, concorrencia=1):
+    """
+    Executado num processo separado (um navegador por processo).
+    Pasta de download, cookies, perfil do Chrome e os arquivos de estado
+    (cache de navegação e índices) são exclusivos do tenant.
+    """
+    # Importado aqui para que o processo principal não precise do Selenium
+    from classes.fluxo import baixar_xmls_innovaro
+
+    pasta_tenant = Path(pasta_base) / tenant['nome']
+    perfil_base = os.environ.get("INNOVARO_PERFIL_DIR")
+    inicio = time.perf_counter()
+    try:
+        pasta = baixar_xmls_innovaro(
+            tenant['usuario'], tenant['senha'], url=tenant['url'],
+            download_path=pasta_tenant / "arquivos-xmls",
+            modo_download=modo_download,
+            headless=headless,
+            perfil_dir=f"{perfil_base}-{tenant['nome']}" if perfil_base else None,
+            caminho_cookies=pasta_tenant / "sessao_cookies.json",
+            pasta_estado=pasta_tenant / "estado",
+            concorrencia=concorrencia,
+        )
+        erro = None if pasta else "Fluxo do navegador não retornou a pasta dos XMLs."
+    except Exception as e:
+        pasta, erro = None, str(e)
+    return {'nome': tenant['nome'], 'pasta': pasta, 'erro': erro, 'duracao_download': time.perf_counter() - inicio}
+
+
+def _enviar_tenant(tenant, pasta, pasta_base):
+    """
+    Upload para a pasta do Drive do tenant (executado numa thread do processo principal).
+    Os índices, o mapa de pastas e as sessões de upload ficam na pasta de
+    estado do tenant: os uploads rodam em paralelo e não compartilham esses
+    arquivos.
+    """
+    from classes.drive_xml import Drive
+
+    inicio = time.perf_counter()
+    drive_uploader = Drive(folder_id=tenant['drive_folder_id'],
+                           pasta_estado=Path(pasta_base) / tenant['nome'] / "estado",
+                           shared_drive_id=tenant.get('shared_drive_id'))
+    resumo = drive_uploader.upload_files(local_folder_path=pasta)
+    return resumo, time.perf_counter() - inicio
+
+
+def executar_tenants(caminho_tarefas, max_navegadores=2, pasta_base=None, modo_download=None, headless=None):
+    """
+    Roda todos os tenants do arquivo de tarefas ao mesmo tempo, com no
+    máximo 'max_navegadores' navegadores abertos. Assim que o download de
+    um tenant termina, o upload dele começa numa thread, liberando a vaga
+    do navegador para o próximo tenant.
+    Retorna a lista de resultados por tenant.
+    """
+    tenants = carregar_tenants(caminho_tarefas)
+    pasta_base = Path(pasta_base or PASTA_TENANTS_PADRAO)
+    por_nome = {t['nome']: t for t in tenants}
+    print(f"Executando {len(tenants)} tenant(s) com até {max_navegadores} navegador(es) simultâneo(s).")
+
+    resultados = {}
+    comeco = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_navegadores) as navegadores, \
+            ThreadPoolExecutor(max_workers=max(1, len(tenants))) as uploads:
+        downloads = [
+            navegadores.submit(_baixar_tenant, tenant, str(pasta_base), modo_download, headless, max_navegadores)
+            for tenant in tenants
+        ]
+        envios = {}
+        for futuro in as_completed(downloads):
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                logging.error(f"Processo de tenant falhou: {e}")
+                continue
+            resultados[resultado['nome']] = resultado
+            if resultado['pasta']:
+                envio = uploads.submit(_enviar_tenant, por_nome[resultado['nome']], resultado['pasta'], pasta_base)
+                envios[envio] = resultado['nome']
+
+        for envio in as_completed(envios):
+            nome = envios[envio]
+            try:
+                resultados[nome]['upload'], resultados[nome]['duracao_upload'] = envio.result()
+            except Exception as e:
+                resultados[nome]['erro'] = f"Upload: {e}"
+                logging.error(f"Upload do tenant '{nome}' falhou: {e}")
+
+    print("="*30)
+    print("Resumo dos Tenants:")
+    for tenant in tenants:
+        r = resultados.get(tenant['nome'], {'erro': "processo não concluído"})
+        upload = r.get('upload') or {}
+        status = "OK" if not r.get('erro') else f"FALHOU ({r['erro']})"
+        print(f"  {tenant['nome']}: {status} | download: {r.get('duracao_download', 0.0):.1f}s | "
+              f"upload: {r.get('duracao_upload', 0.0):.1f}s | enviados: {upload.get('enviados', 0)} | "
+              f"atualizados: {upload.get('atualizados', 0)} | "
+              f"ignorados: {upload.get('ignorados', 0)} | erros de upload: {upload.get('erros', 0)}")
+    print(f"Tempo total: {time.perf_counter() - comeco:.1f}s")
+    print("="*30)
+
+    return [resultados.get(t['nome']) for t in tenants]
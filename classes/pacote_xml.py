@@ -0,0 +1,165 @@
+# Em: classes/pacote_xml.py
+
+import io
+import os
+import json
+import hashlib
+import logging
+import argparse
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+# Nome do manifesto gravado dentro de cada pacote
+MANIFESTO = "manifesto.json"
+MIME_PACOTE = 'application/zip'
+
+# Nível do deflate (XML comprime muito; 9 custa pouco para arquivos pequenos)
+NIVEL_COMPRESSAO_PADRAO = int(os.environ.get("DRIVE_PACOTE_NIVEL", "9"))
+# Tamanho de cada leitura parcial (Range) de um pacote no Drive
+TAMANHO_LEITURA_REMOTA = int(os.environ.get("DRIVE_PACOTE_LEITURA_KB", "256")) * 1024
+
+
+def montar_pacote(arquivos, destino, anterior=None, nivel=None):
+    """
+    Grava em 'destino' um .zip com os XMLs de 'arquivos' e, por último,
+    o manifesto (nome, tamanho e SHA-256 de cada XML). Com 'anterior'
+    (um pacote já existente, ex: o do dia), os XMLs dele entram também;
+    um XML com o mesmo nome de um dos novos é substituído.
+    O .zip é escrito num temporário e só então substitui o destino.
+    Retorna o manifesto (dict).
+    """
+    destino = Path(destino)
+    nivel = NIVEL_COMPRESSAO_PADRAO if nivel is None else nivel
+    novos = {Path(a).name: Path(a) for a in arquivos}
+    entradas = []
+    temporario = destino.with_name(destino.name + ".tmp")
+    with zipfile.ZipFile(temporario, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=nivel) as zf:
+        if anterior and Path(anterior).exists():
+            with zipfile.ZipFile(anterior) as antigo:
+                conhecidos = {e['nome']: e for e in ler_manifesto(antigo)['arquivos']}
+                for info in antigo.infolist():
+                    if info.filename == MANIFESTO or info.filename in novos:
+                        continue
+                    conteudo = antigo.read(info)
+                    zf.writestr(info, conteudo)
+                    entradas.append(conhecidos.get(info.filename) or _entrada(info.filename, conteudo))
+
+        for nome, caminho in novos.items():
+            conteudo = caminho.read_bytes()
+            zf.writestr(zipfile.ZipInfo.from_file(caminho, nome), conteudo,
+                        compress_type=zipfile.ZIP_DEFLATED, compresslevel=nivel)
+            entradas.append(_entrada(nome, conteudo))
+
+        manifesto = {'versao': 1, 'criado': datetime.now().isoformat(timespec='seconds'), 'arquivos': entradas}
+        zf.writestr(MANIFESTO, json.dumps(manifesto, ensure_ascii=False, indent=1))
+    os.replace(temporario, destino)
+    return manifesto
+
+
+def _entrada(nome, conteudo):
+    return {'nome': nome, 'tamanho': len(conteudo), 'sha256': hashlib.sha256(conteudo).hexdigest()}
+
+
+def ler_manifesto(zf):
+    """
+    Manifesto de um pacote aberto (zipfile.ZipFile). Sem o manifesto,
+    a lista é montada a partir do diretório central do .zip.
+    """
+    try:
+        return json.loads(zf.read(MANIFESTO))
+    except KeyError:
+        return {'versao': 0, 'arquivos': [
+            {'nome': i.filename, 'tamanho': i.file_size, 'sha256': None} for i in zf.infolist()
+        ]}
+
+
+class ArquivoRemoto(io.RawIOBase):
+    """
+    Arquivo somente leitura cujo conteúdo vem sob demanda, por intervalos
+    de bytes ('ler_intervalo(inicio, fim)', fim inclusivo, como no
+    cabeçalho Range). O zipfile só lê o diretório central no fim do .zip
+    e o trecho do membro pedido, então listar o manifesto ou extrair um
+    XML custa poucas leituras em vez do download do pacote inteiro.
+    As leituras são alinhadas em blocos e guardadas em memória.
+    """
+
+    def __init__(self, tamanho, ler_intervalo, tamanho_bloco=None):
+        super().__init__()
+        self.tamanho = int(tamanho)
+        self._ler_intervalo = ler_intervalo
+        self._bloco = tamanho_bloco or TAMANHO_LEITURA_REMOTA
+        self._blocos = {}
+        self._pos = 0
+        self.leituras = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.tamanho
+        self._pos = max(0, offset)
+        return self._pos
+
+    def readinto(self, buffer):
+        fim = min(self.tamanho, self._pos + len(buffer))
+        escritos = 0
+        while self._pos < fim:
+            base = self._pos - self._pos % self._bloco
+            if base not in self._blocos:
+                # Uma leitura cobre todos os blocos que faltam até 'fim'
+                ate = min(self.tamanho, -(-fim // self._bloco) * self._bloco)
+                dados = self._ler_intervalo(base, ate - 1)
+                self.leituras += 1
+                if not dados:
+                    break
+                for i in range(0, len(dados), self._bloco):
+                    self._blocos[base + i] = dados[i:i + self._bloco]
+            trecho = self._blocos[base][self._pos - base:fim - base]
+            if not trecho:
+                break
+            buffer[escritos:escritos + len(trecho)] = trecho
+            escritos += len(trecho)
+            self._pos += len(trecho)
+        return escritos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consulta os pacotes .zip de XMLs enviados ao Drive.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p_listar = sub.add_parser("listar", help="Lista os XMLs de um pacote (lê só o manifesto).")
+    p_listar.add_argument("pacote", help="Nome do pacote na pasta do Drive (ex: xmls_2024-01-15.zip) ou ID.")
+    p_extrair = sub.add_parser("extrair", help="Baixa um único XML de dentro do pacote.")
+    p_extrair.add_argument("pacote", help="Nome do pacote na pasta do Drive ou ID.")
+    p_extrair.add_argument("xml", help="Nome do XML dentro do pacote.")
+    p_extrair.add_argument("--destino", default=".", help="Pasta local de destino (padrão: a atual).")
+    args = parser.parse_args()
+
+    # Importado aqui: o Drive usa este módulo para montar os pacotes
+    from classes.drive_xml import Drive
+
+    drive = Drive()
+    if not drive.target_folder_id:
+        return
+    if args.comando == "listar":
+        manifesto = drive.listar_pacote(args.pacote)
+        for entrada in manifesto['arquivos']:
+            print(f"{entrada['nome']}\t{entrada['tamanho']}\t{entrada.get('sha256') or ''}")
+        print(f"{len(manifesto['arquivos'])} XML(s) no pacote.")
+    else:
+        caminho = drive.extrair_do_pacote(args.pacote, args.xml, args.destino)
+        print(f"XML extraído em: {caminho}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
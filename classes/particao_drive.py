@@ -0,0 +1,123 @@
+# Em: classes/particao_drive.py
+
+import os
+import re
+import json
+import logging
+import threading
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+# Mapa "raiz/AAAA/MM/CNPJ" -> ID da pasta no Drive
+CAMINHO_MAPA_PADRAO = Path.home() / "XML- Robô Innovaro/pastas_drive.json"
+
+# Chave de acesso da NF-e/CT-e: 44 dígitos (cUF, AAMM, CNPJ do emitente, ...)
+PADRAO_CHAVE = re.compile(r'(?<!\d)(\d{44})(?!\d)')
+
+# Elementos do XML onde a chave aparece (Id="NFe<chave>" ou <chNFe>)
+TAGS_COM_ID = ('infNFe', 'infCte', 'infMDFe')
+TAGS_CHAVE = ('chNFe', 'chCTe', 'chMDFe')
+
+
+def _nome_local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def chave_do_xml(caminho):
+    """
+    Procura a chave de acesso dentro do XML, parando no primeiro elemento
+    que a contém (não carrega o documento inteiro).
+    """
+    try:
+        for evento, elem in ET.iterparse(str(caminho), events=('start', 'end')):
+            nome = _nome_local(elem.tag)
+            if evento == 'start' and nome in TAGS_COM_ID:
+                texto = elem.get('Id', '')
+            elif evento == 'end' and nome in TAGS_CHAVE:
+                texto = elem.text or ''
+            else:
+                continue
+            achou = PADRAO_CHAVE.search(texto)
+            if achou:
+                return achou.group(1)
+    except (ET.ParseError, OSError) as e:
+        logging.warning(f"Não foi possível ler a chave de '{caminho}': {e}")
+    return None
+
+
+def _chave_valida(chave):
+    # cUF de 11 a 53 e mês de emissão de 01 a 12: 44 dígitos quaisquer
+    # (ex: um protocolo no nome do arquivo) não viram pastas inventadas
+    return 11 <= int(chave[:2]) <= 53 and 1 <= int(chave[4:6]) <= 12
+
+
+def particao_do_xml(caminho):
+    """
+    Retorna (AAAA, MM, CNPJ do emitente) a partir da chave de acesso, lida
+    do nome do arquivo ou, se não houver, do próprio XML.
+    Retorna None se não houver uma chave válida.
+    """
+    achou = PADRAO_CHAVE.search(Path(caminho).name)
+    chave = achou.group(1) if achou and _chave_valida(achou.group(1)) else chave_do_xml(caminho)
+    if not chave or not _chave_valida(chave):
+        return None
+    return f"20{chave[2:4]}", chave[4:6], chave[6:20]
+
+
+class MapaPastas:
+    """
+    Guarda os IDs das subpastas já resolvidas no Drive, para que encontrar
+    a pasta de um XML não custe nenhuma chamada à API depois da primeira vez.
+    """
+
+    def __init__(self, caminho=None):
+        self.caminho = Path(caminho or os.environ.get("DRIVE_MAPA_PASTAS") or CAMINHO_MAPA_PADRAO)
+        self.dados = {}
+        self._lock = threading.Lock()
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                self.dados = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"Mapa de pastas do Drive ignorado ({self.caminho}): {e}")
+
+    def get(self, caminho):
+        with self._lock:
+            return self.dados.get(caminho)
+
+    def set(self, caminho, pasta_id):
+        with self._lock:
+            self.dados[caminho] = pasta_id
+            self._salvar()
+
+    def invalidar(self, pasta_id):
+        with self._lock:
+            # A pasta e tudo o que foi resolvido abaixo dela
+            prefixos = [c for c, i in self.dados.items() if i == pasta_id]
+            removidos = [c for c in self.dados if any(c == p or c.startswith(f"{p}/") for p in prefixos)]
+            for caminho in removidos:
+                del self.dados[caminho]
+            if removidos:
+                self._salvar()
+
+    def folhas(self, raiz_id, profundidade=3):
+        """
+        IDs das pastas finais (ex: AAAA/MM/CNPJ) abaixo da raiz.
+        """
+        with self._lock:
+            return [
+                pasta_id for caminho, pasta_id in self.dados.items()
+                if caminho.startswith(f"{raiz_id}/") and caminho.count('/') == profundidade
+            ]
+
+    def _salvar(self):
+        try:
+            os.makedirs(self.caminho.parent, exist_ok=True)
+            # Temporário + os.replace: outro processo nunca lê um JSON pela metade
+            temporario = self.caminho.with_name(f"{self.caminho.name}.{os.getpid()}.tmp")
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(self.dados, f, ensure_ascii=False, indent=2)
+            os.replace(temporario, self.caminho)
+        except OSError as e:
+            logging.warning(f"Não foi possível salvar o mapa de pastas do Drive: {e}")
@@ -0,0 +1,120 @@
+# Em: classes/pipeline.py
+
+import os
+import queue
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Quantos XMLs extraídos podem esperar na fila pelo upload
+TAMANHO_FILA_PADRAO = int(os.environ.get("PIPELINE_TAMANHO_FILA", "500"))
+
+
+class PipelineUpload:
+    """
+    Extração e upload em paralelo.
+
+    - Ao ser criado, autentica no Drive e verifica a pasta numa thread,
+      enquanto o navegador ainda faz login e navega.
+    - 'enfileirar' é passado como 'ao_extrair' ao Download_XML: cada XML
+      novo entra numa fila limitada assim que é gravado.
+    - Os workers de upload consomem a fila ao mesmo tempo em que a
+      extração continua; 'finalizar' fecha a fila e devolve o resumo.
+    Se o Drive não puder ser usado, ou se o upload parar com um erro, a
+    fila é apenas esvaziada até o fim da extração: os arquivos continuam na
+    pasta e serão enviados na próxima execução, e a extração nunca trava.
+    """
+
+    def __init__(self, max_workers=None, tamanho_fila=None, folder_id=None):
+        # Sem valor explícito, vem de DRIVE_UPLOAD_WORKERS quando o Drive for importado
+        self.max_workers = max(1, max_workers) if max_workers else None
+        self.fila = queue.Queue(maxsize=tamanho_fila or TAMANHO_FILA_PADRAO)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="drive-auth")
+        self._drive_futuro = self._executor.submit(self._iniciar_drive, folder_id)
+        self._resumo = None
+        # Erro que interrompeu o upload (mostrado no resumo de 'finalizar')
+        self.erro = None
+        self._extracao_encerrada = threading.Event()
+        self._consumidor = threading.Thread(target=self._consumir, name="pipeline-upload", daemon=True)
+        self._consumidor.start()
+
+    def _iniciar_drive(self, folder_id):
+        # Importado aqui para que o googleapiclient carregue e a autenticação
+        # rode nesta thread, junto com o navegador
+        from classes.drive_xml import Drive, UPLOAD_WORKERS_PADRAO
+
+        if self.max_workers is None:
+            self.max_workers = max(1, UPLOAD_WORKERS_PADRAO)
+        return Drive(folder_id=folder_id)
+
+    def _workers(self):
+        # 1 se o Drive nem chegou a ser importado
+        return self.max_workers or 1
+
+    def _consumir(self):
+        try:
+            drive = self._drive_futuro.result()
+        except Exception as e:
+            print(f"ERRO ao iniciar o Google Drive: {e}")
+            logging.error(f"ERRO ao iniciar o Google Drive: {e}")
+            drive = None
+
+        if drive is None or not drive.target_folder_id:
+            print("Drive indisponível: os XMLs extraídos ficam na pasta local para a próxima execução.")
+            self._descartar_fila()
+            return
+
+        try:
+            self._resumo = drive.upload_from_queue(self.fila, max_workers=self._workers())
+        except Exception as e:
+            self.erro = f"{type(e).__name__}: {e}"
+            print(f"ERRO no upload em pipeline: {self.erro}")
+            logging.exception("ERRO no upload em pipeline")
+            self._descartar_fila()
+
+    def _descartar_fila(self):
+        """
+        Consome (sem enviar) tudo o que for enfileirado até 'finalizar'
+        encerrar a extração, para que 'enfileirar' e 'finalizar' nunca
+        fiquem bloqueados numa fila cheia. Não depende de quantos
+        marcadores None já foram consumidos.
+        """
+        while True:
+            try:
+                self.fila.get(timeout=0.5)
+            except queue.Empty:
+                if self._extracao_encerrada.is_set():
+                    return
+                continue
+            self.fila.task_done()
+
+    def enfileirar(self, caminho):
+        # Bloqueia se a fila estiver cheia: o upload dita o ritmo da extração
+        self.fila.put(caminho)
+
+    def finalizar(self):
+        """
+        Sinaliza o fim da extração e espera os uploads terminarem.
+        Retorna o resumo do upload, ou None se o Drive não estava disponível
+        ou se o upload parou com um erro (guardado em 'self.erro').
+        """
+        # O número de workers só é conhecido depois que o Drive foi importado
+        wait([self._drive_futuro])
+        for _ in range(self._workers()):
+            self.fila.put(None)
+        self._extracao_encerrada.set()
+        self._consumidor.join()
+        self._executor.shutdown(wait=True)
+        if self.erro:
+            print(f"Upload em pipeline interrompido ({self.erro}); os XMLs não enviados ficam na pasta "
+                  "para a próxima execução.")
+        return self._resumo
+
+    def get_drive(self):
+        """
+        Instância do Drive já autenticada (ou None).
+        """
+        try:
+            return self._drive_futuro.result()
+        except Exception:
+            return None
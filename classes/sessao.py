@@ -0,0 +1,144 @@
+# Em: classes/sessao.py
+
+import os
+import json
+import logging
+from pathlib import Path
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Arquivo onde os cookies da sessão autenticada são guardados entre execuções
+CAMINHO_COOKIES_PADRAO = Path.home() / "XML- Robô Innovaro/sessao_cookies.json"
+
+# Id do botão de menu, que só existe depois do login
+ID_BOTAO_MENU = 'bt_1892603865'
+
+
+class SessaoNavegador:
+    """
+    Gerencia a criação do Chrome e o reaproveitamento da sessão do Innovaro.
+
+    - headless: roda sem janela (servidores sem display).
+    - perfil_dir: user-data-dir persistente; o próprio Chrome guarda os cookies.
+    - Sem perfil persistente, os cookies são salvos em JSON após o login e
+      restaurados na próxima execução.
+    Em ambos os casos, 'esta_autenticado' confere se a sessão ainda vale
+    antes de preencher o formulário de login.
+    """
+
+    def __init__(self, headless=None, perfil_dir=None, caminho_cookies=None):
+        if headless is None:
+            headless = os.environ.get("INNOVARO_HEADLESS") == "1"
+        self.headless = headless
+        self.perfil_dir = perfil_dir or os.environ.get("INNOVARO_PERFIL_DIR")
+        self.caminho_cookies = Path(
+            caminho_cookies or os.environ.get("INNOVARO_COOKIES") or CAMINHO_COOKIES_PADRAO
+        )
+
+    def opcoes_chrome(self):
+        """
+        Opções do Chrome usadas pelo robô.
+        O log 'performance' expõe os eventos de download do DevTools
+        (Page.downloadWillBegin/downloadProgress) ao MonitorDownload.
+        """
+        options = webdriver.ChromeOptions()
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        # Os eventos de rede não são usados; evita encher o buffer do log
+        options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': False})
+        if self.headless:
+            options.add_argument('--headless=new')
+            options.add_argument('--window-size=1920,1080')
+            options.add_argument('--disable-gpu')
+        if self.perfil_dir:
+            os.makedirs(self.perfil_dir, exist_ok=True)
+            options.add_argument(f'--user-data-dir={os.path.abspath(self.perfil_dir)}')
+        return options
+
+    def criar_driver(self, chromedriver_path=None):
+        """
+        Inicia o Chrome. Sem 'chromedriver_path', usa o driver do PATH
+        (ou o Selenium Manager).
+        """
+        service = Service(executable_path=chromedriver_path) if chromedriver_path else None
+        nav = webdriver.Chrome(options=self.opcoes_chrome(), service=service)
+        if not self.headless:
+            nav.maximize_window()
+        return nav
+
+    def esta_autenticado(self, nav, timeout=10):
+        """
+        Espera a página decidir entre formulário de login e sistema já logado.
+        Retorna True se o botão de menu apareceu (sessão válida).
+        """
+        def estado(driver):
+            if driver.find_elements(By.ID, ID_BOTAO_MENU):
+                return 'logado'
+            if driver.find_elements(By.ID, 'username'):
+                return 'login'
+            return False
+
+        try:
+            return WebDriverWait(nav, timeout, poll_frequency=0.1).until(estado) == 'logado'
+        except Exception:
+            return False
+
+    def abrir(self, nav, url):
+        """
+        Abre a URL reaproveitando a sessão anterior quando possível.
+        Retorna True se já está autenticado (o login pode ser pulado).
+        """
+        nav.get(url)
+        if self.esta_autenticado(nav):
+            print("Sessão anterior ainda válida (perfil do Chrome). Login ignorado.")
+            return True
+
+        if not self.perfil_dir and self._restaurar_cookies(nav):
+            nav.get(url)
+            if self.esta_autenticado(nav):
+                print("Sessão anterior restaurada via cookies. Login ignorado.")
+                return True
+        return False
+
+    def _restaurar_cookies(self, nav):
+        try:
+            with open(self.caminho_cookies, 'r', encoding='utf-8') as f:
+                cookies = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logging.warning(f"Cookies salvos ignorados ({self.caminho_cookies}): {e}")
+            return False
+
+        restaurados = 0
+        for cookie in cookies:
+            # 'sameSite' inválido ou expiração em float quebram o add_cookie
+            cookie.pop('sameSite', None)
+            if 'expiry' in cookie:
+                cookie['expiry'] = int(cookie['expiry'])
+            try:
+                nav.add_cookie(cookie)
+                restaurados += 1
+            except Exception as e:
+                logging.info(f"Cookie '{cookie.get('name')}' não restaurado: {e}")
+        return restaurados > 0
+
+    def salvar_cookies(self, nav):
+        """
+        Guarda os cookies da sessão autenticada para a próxima execução.
+        """
+        if self.perfil_dir:
+            return
+        try:
+            os.makedirs(self.caminho_cookies.parent, exist_ok=True)
+            with open(self.caminho_cookies, 'w', encoding='utf-8') as f:
+                json.dump(nav.get_cookies(), f)
+        except Exception as e:
+            logging.warning(f"Não foi possível salvar os cookies da sessão: {e}")
+
+    def descartar_cookies(self):
+        try:
+            os.remove(self.caminho_cookies)
+        except FileNotFoundError:
+            pass
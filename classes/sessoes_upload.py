@@ -0,0 +1,102 @@
+# Em: classes/sessoes_upload.py
+
+import os
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+
+from googleapiclient.errors import HttpError
+
+# Arquivo com as URIs das sessões de upload retomável em andamento
+CAMINHO_SESSOES_PADRAO = Path.home() / "XML- Robô Innovaro/sessoes_upload.json"
+
+# O Drive mantém uma sessão retomável por cerca de uma semana
+VALIDADE_SESSAO = 6 * 24 * 3600
+
+
+class SessoesUpload:
+    """
+    Guarda, por arquivo local, a URI da sessão de upload retomável aberta
+    no Drive. Se a execução for interrompida, a próxima reabre a mesma
+    sessão e continua a partir do último byte confirmado pelo servidor.
+    A chave inclui tamanho e data de modificação: se o arquivo mudar, a
+    sessão antiga não é reaproveitada.
+    """
+
+    def __init__(self, caminho=None):
+        self.caminho = Path(caminho or os.environ.get("DRIVE_SESSOES_PATH") or CAMINHO_SESSOES_PADRAO)
+        self.dados = {}
+        self._lock = threading.Lock()
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                self.dados = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"Sessões de upload ignoradas ({self.caminho}): {e}")
+
+    @staticmethod
+    def chave(local_file, pasta_id):
+        info = Path(local_file).stat()
+        return f"{pasta_id}:{Path(local_file).resolve()}:{info.st_size}:{int(info.st_mtime)}"
+
+    def get(self, chave):
+        with self._lock:
+            sessao = self.dados.get(chave)
+        if sessao and time.time() - sessao.get('criada', 0) < VALIDADE_SESSAO:
+            return sessao.get('uri')
+        return None
+
+    def set(self, chave, uri):
+        with self._lock:
+            atual = self.dados.get(chave)
+            if atual and atual.get('uri') == uri:
+                return
+            self.dados[chave] = {'uri': uri, 'criada': time.time()}
+            self._salvar()
+
+    def remover(self, chave):
+        with self._lock:
+            if self.dados.pop(chave, None) is not None:
+                self._salvar()
+
+    def _salvar(self):
+        try:
+            os.makedirs(self.caminho.parent, exist_ok=True)
+            temporario = self.caminho.with_name(self.caminho.name + ".tmp")
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(self.dados, f, ensure_ascii=False, indent=2)
+            os.replace(temporario, self.caminho)
+        except OSError as e:
+            logging.warning(f"Não foi possível salvar as sessões de upload: {e}")
+
+
+class ConsultaSessao:
+    """
+    Pergunta ao Drive quanto de uma sessão retomável já chegou: um PUT vazio
+    com 'Content-Range: bytes */tamanho' na URI da sessão. Tem a forma de
+    uma requisição (execute()) para passar pelo ExecutorDrive.
+    execute() acerta 'resumable_progress' da requisição de upload e devolve
+    o dict do arquivo se o upload já terminou, ou None se ainda falta algo.
+    404/410 (sessão expirada) e demais erros saem como HttpError.
+    """
+
+    def __init__(self, requisicao):
+        self.requisicao = requisicao
+
+    def execute(self):
+        requisicao = self.requisicao
+        resp, conteudo = requisicao.http.request(
+            requisicao.resumable_uri, 'PUT',
+            headers={'Content-Range': f"bytes */{requisicao.resumable.size()}", 'Content-Length': '0'}
+        )
+        if resp.status in (200, 201):
+            return requisicao.postproc(resp, conteudo)
+        if resp.status != 308:
+            raise HttpError(resp, conteudo, uri=requisicao.resumable_uri)
+        # 'Range: bytes=0-N' traz o último byte confirmado; sem ele nada chegou
+        faixa = resp.get('range')
+        requisicao.resumable_progress = int(faixa.rsplit('-', 1)[1]) + 1 if faixa else 0
+        return None
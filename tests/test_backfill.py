@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+from classes.backfill import _mesclar, gerar_janelas, ler_data
+
+
+class TestLerData(unittest.TestCase):
+
+    def test_formatos_aceitos(self):
+        self.assertEqual(ler_data('2024-02-29'), date(2024, 2, 29))
+        self.assertEqual(ler_data('29/02/2024'), date(2024, 2, 29))
+
+    def test_data_invalida(self):
+        for texto in ('2023-02-29', '31/04/2024', '2024/01/01', '', 'ontem'):
+            with self.subTest(texto=texto):
+                with self.assertRaises(ValueError):
+                    ler_data(texto)
+
+
+class TestGerarJanelas(unittest.TestCase):
+
+    def test_por_dia(self):
+        self.assertEqual(gerar_janelas(date(2024, 2, 28), date(2024, 3, 1)), [
+            (date(2024, 2, 28), date(2024, 2, 28)),
+            (date(2024, 2, 29), date(2024, 2, 29)),
+            (date(2024, 3, 1), date(2024, 3, 1)),
+        ])
+
+    def test_por_semana_com_sobra(self):
+        janelas = gerar_janelas(date(2024, 1, 1), date(2024, 1, 17), 'semana')
+        self.assertEqual(janelas, [
+            (date(2024, 1, 1), date(2024, 1, 7)),
+            (date(2024, 1, 8), date(2024, 1, 14)),
+            (date(2024, 1, 15), date(2024, 1, 17)),
+        ])
+
+    def test_um_dia_so(self):
+        self.assertEqual(gerar_janelas(date(2024, 5, 5), date(2024, 5, 5), 'semana'),
+                         [(date(2024, 5, 5), date(2024, 5, 5))])
+
+    def test_fim_antes_do_inicio(self):
+        with self.assertRaises(ValueError):
+            gerar_janelas(date(2024, 1, 2), date(2024, 1, 1))
+
+
+class TestMesclar(unittest.TestCase):
+
+    def test_duplicados_descartados(self):
+        raiz = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, raiz, True)
+        janela, destino = raiz / "janela", raiz / "destino"
+        janela.mkdir()
+        destino.mkdir()
+        (destino / "a.xml").write_text('antigo')
+        for nome in ('a.xml', 'b.xml', 'leia-me.txt'):
+            (janela / nome).write_text('novo')
+        existentes = set(os.listdir(destino))
+        self.assertEqual(_mesclar(janela, destino, existentes), (1, 1))
+        self.assertEqual((destino / "a.xml").read_text(), 'antigo')
+        self.assertEqual(sorted(os.listdir(destino)), ['a.xml', 'b.xml'])
+        self.assertFalse(janela.exists())
+        self.assertIn('b.xml', existentes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import io
+import os
+import shutil
+import zipfile
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from classes.download_http import DownloadHTTP, LeitorMemoria, SessaoExpirada
+
+
+def _zip_de_teste():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for i in range(3):
+            zf.writestr(f"{i:044d}-nfe.xml", f"<nfeProc>{i}</nfeProc>" * 100)
+    return buffer.getvalue()
+
+
+ZIP = _zip_de_teste()
+
+
+class _Innovaro(BaseHTTPRequestHandler):
+    """
+    Imita a exportação do Innovaro: /exportacao.zip devolve o .zip e
+    /expirada devolve a tela de login (HTML), como numa sessão vencida.
+    """
+
+    def do_GET(self):
+        if self.path == '/exportacao.zip':
+            corpo, tipo = ZIP, 'application/zip'
+        elif self.path == '/expirada':
+            corpo, tipo = b'<html><body>login</body></html>', 'text/html; charset=utf-8'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestDownloadHTTP(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Innovaro)
+        cls.url = f"http://127.0.0.1:{cls.servidor.server_address[1]}"
+        threading.Thread(target=cls.servidor.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.servidor.shutdown()
+        cls.servidor.server_close()
+
+    def setUp(self):
+        self.download = DownloadHTTP()
+
+    def tearDown(self):
+        self.download.fechar()
+
+    def test_baixa_zip_sem_copia(self):
+        dados = self.download.baixar(f"{self.url}/exportacao.zip")
+        self.assertIsInstance(dados, bytearray)
+        self.assertEqual(bytes(dados), ZIP)
+        with zipfile.ZipFile(LeitorMemoria(dados)) as zf:
+            self.assertEqual(len(zf.namelist()), 3)
+            self.assertEqual(zf.read(f"{1:044d}-nfe.xml"), b"<nfeProc>1</nfeProc>" * 100)
+
+    def test_zip_grande_vai_para_o_disco(self):
+        pasta = Path(tempfile.mkdtemp())
+        download = DownloadHTTP(limite_memoria=len(ZIP) // 2, pasta_temporaria=pasta)
+        try:
+            caminho = download.baixar(f"{self.url}/exportacao.zip")
+            self.assertIsInstance(caminho, Path)
+            self.assertEqual(caminho.parent, pasta)
+            self.assertEqual(caminho.read_bytes(), ZIP)
+        finally:
+            download.fechar()
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    def test_limite_apaga_o_temporario(self):
+        pasta = Path(tempfile.mkdtemp())
+        download = DownloadHTTP(limite_bytes=len(ZIP) - 1, limite_memoria=1, pasta_temporaria=pasta)
+        try:
+            with self.assertRaises(Exception):
+                download.baixar(f"{self.url}/exportacao.zip")
+            self.assertEqual(os.listdir(pasta), [])
+        finally:
+            download.fechar()
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    def test_sessao_expirada(self):
+        with self.assertRaises(SessaoExpirada):
+            self.download.baixar(f"{self.url}/expirada")
+
+    def test_limite_de_tamanho(self):
+        download = DownloadHTTP(limite_bytes=len(ZIP) // 2)
+        try:
+            with self.assertRaises(Exception):
+                download.baixar(f"{self.url}/exportacao.zip")
+        finally:
+            download.fechar()
+
+
+if __name__ == '__main__':
+    unittest.main()
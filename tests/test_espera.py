@@ -0,0 +1,39 @@
+import unittest
+
+from classes.espera import Espera, PACING_PROPORCAO, PACING_SUAVIZACAO
+
+
+class TestPacingAdaptativo(unittest.TestCase):
+
+    def test_sem_carregamentos_nao_pausa(self):
+        espera = Espera(None, pacing='adaptativo')
+        self.assertEqual(espera.segundos_pausa(3), 0.0)
+
+    def test_pausa_acompanha_a_media_movel(self):
+        espera = Espera(None, pacing='adaptativo')
+        espera.observar_carregamento(2.0)
+        self.assertAlmostEqual(espera.segundos_pausa(3), 2.0 * PACING_PROPORCAO)
+        espera.observar_carregamento(6.0)
+        media = 2.0 + PACING_SUAVIZACAO * (6.0 - 2.0)
+        self.assertAlmostEqual(espera.media_carregamento, media)
+        self.assertAlmostEqual(espera.segundos_pausa(3), media * PACING_PROPORCAO)
+
+    def test_pausa_nunca_passa_do_sleep_antigo(self):
+        espera = Espera(None, pacing='adaptativo')
+        espera.observar_carregamento(120.0)
+        self.assertEqual(espera.segundos_pausa(1.5), 1.5)
+        self.assertEqual(espera.segundos_pausa(0), 0.0)
+
+    def test_perfis_fixos(self):
+        self.assertEqual(Espera(None, pacing='legado').segundos_pausa(3), 3)
+        self.assertEqual(Espera(None, pacing='lento').segundos_pausa(3), 1.5)
+        espera = Espera(None, pacing='normal')
+        espera.observar_carregamento(10.0)
+        self.assertEqual(espera.segundos_pausa(3), 0.0)
+
+    def test_perfil_desconhecido_vira_normal(self):
+        self.assertEqual(Espera(None, pacing='turbo').pacing, 'normal')
+
+
+if __name__ == '__main__':
+    unittest.main()
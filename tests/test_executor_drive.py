@@ -0,0 +1,112 @@
+import json
+import unittest
+from unittest import mock
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from classes.executor_drive import ExecutorDrive, LimitadorAdaptativo
+
+
+def _erro(status, motivo=None, retry_after=None):
+    cabecalhos = {'status': str(status)}
+    if retry_after is not None:
+        cabecalhos['retry-after'] = str(retry_after)
+    corpo = {'error': {'code': status, 'message': 'erro', 'errors': [{'reason': motivo}] if motivo else []}}
+    return HttpError(httplib2.Response(cabecalhos), json.dumps(corpo).encode('utf-8'))
+
+
+class _Requisicao:
+    """
+    Imita um HttpRequest: cada execute() levanta o próximo erro da lista
+    e, quando ela acaba, devolve a resposta.
+    """
+
+    def __init__(self, erros, resposta=None):
+        self.erros = list(erros)
+        self.resposta = resposta or {'id': 'abc'}
+        self.chamadas = 0
+
+    def execute(self):
+        self.chamadas += 1
+        if self.erros:
+            raise self.erros.pop(0)
+        return self.resposta
+
+
+class TestExecutorDrive(unittest.TestCase):
+
+    def setUp(self):
+        self.limitador = LimitadorAdaptativo(inicial=4, maximo=8)
+        self.executor = ExecutorDrive(tentativas=4, espera_base=0.01, espera_maxima=10, limitador=self.limitador)
+        patcher = mock.patch('classes.executor_drive.time.sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_429_repetido_e_corta_a_concorrencia(self):
+        requisicao = _Requisicao([_erro(429), _erro(429)])
+        self.assertEqual(self.executor.executar(requisicao, 'files.create'), {'id': 'abc'})
+        self.assertEqual(requisicao.chamadas, 3)
+        self.assertLess(self.limitador.limite, 4)
+        metricas = self.executor.estatisticas()['files.create']
+        self.assertEqual(metricas['repeticoes'], 2)
+        self.assertEqual(metricas['erros_cota'], 2)
+
+    def test_403_de_cota_repetido(self):
+        requisicao = _Requisicao([_erro(403, 'rateLimitExceeded'), _erro(403, 'userRateLimitExceeded')])
+        self.executor.executar(requisicao, 'files.list')
+        self.assertEqual(requisicao.chamadas, 3)
+
+    def test_403_sem_permissao_nao_repetido(self):
+        requisicao = _Requisicao([_erro(403, 'insufficientFilePermissions')])
+        with self.assertRaises(HttpError):
+            self.executor.executar(requisicao, 'files.get')
+        self.assertEqual(requisicao.chamadas, 1)
+        self.sleep.assert_not_called()
+
+    def test_retry_after_respeitado(self):
+        requisicao = _Requisicao([_erro(429, retry_after=7)])
+        self.executor.executar(requisicao, 'files.create')
+        self.sleep.assert_called_once_with(7.0)
+
+    def test_retry_after_limitado_a_espera_maxima(self):
+        requisicao = _Requisicao([_erro(503, retry_after=3600)])
+        self.executor.executar(requisicao, 'files.create')
+        self.sleep.assert_called_once_with(10)
+
+    def test_tentativas_esgotadas_relancam(self):
+        requisicao = _Requisicao([_erro(500)] * 4)
+        with self.assertRaises(HttpError):
+            self.executor.executar(requisicao, 'files.create')
+        self.assertEqual(requisicao.chamadas, 4)
+        self.assertEqual(self.executor.estatisticas()['files.create']['erros'], 1)
+
+    def test_falha_de_dns_repetida(self):
+        requisicao = _Requisicao([httplib2.ServerNotFoundError("Unable to find the server")])
+        self.assertEqual(self.executor.executar(requisicao, 'files.list'), {'id': 'abc'})
+        self.assertEqual(requisicao.chamadas, 2)
+
+    def test_create_ja_aplicado_nao_e_repetido(self):
+        requisicao = _Requisicao([_erro(502)])
+        verificacoes = []
+        existente = {'id': 'criado-antes'}
+        resposta = self.executor.executar(requisicao, 'files.create',
+                                          ja_aplicada=lambda: verificacoes.append(1) or existente)
+        self.assertIs(resposta, existente)
+        self.assertEqual(requisicao.chamadas, 1)
+        self.assertEqual(len(verificacoes), 1)
+
+    def test_create_nao_aplicado_e_repetido(self):
+        requisicao = _Requisicao([ConnectionResetError("reset")])
+        self.assertEqual(self.executor.executar(requisicao, 'files.create', ja_aplicada=lambda: None), {'id': 'abc'})
+        self.assertEqual(requisicao.chamadas, 2)
+
+    def test_cota_nao_verifica_antes_de_repetir(self):
+        requisicao = _Requisicao([_erro(429), _erro(403, 'rateLimitExceeded')])
+        verificar = mock.Mock(return_value={'id': 'outro'})
+        self.assertEqual(self.executor.executar(requisicao, 'files.create', ja_aplicada=verificar), {'id': 'abc'})
+        verificar.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
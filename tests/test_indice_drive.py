@@ -0,0 +1,131 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from classes.drive_xml import Drive
+from classes.executor_drive import ExecutorDrive
+from classes.indice_drive import IndiceDrive
+
+RAIZ = 'pasta-raiz'
+
+
+class _Requisicao:
+    def __init__(self, resposta):
+        self.resposta = resposta
+
+    def execute(self):
+        if isinstance(self.resposta, Exception):
+            raise self.resposta
+        return self.resposta
+
+
+class _Alteracoes:
+    """
+    changes(): devolve as páginas configuradas, uma por chamada a list().
+    """
+
+    def __init__(self, paginas):
+        self.paginas = list(paginas)
+        self.tokens = []
+
+    def list(self, pageToken, **kwargs):
+        self.tokens.append(pageToken)
+        return _Requisicao(self.paginas.pop(0))
+
+
+class _Servico:
+    def __init__(self, paginas):
+        self.alteracoes = _Alteracoes(paginas)
+
+    def changes(self):
+        return self.alteracoes
+
+
+def _erro(status):
+    return HttpError(httplib2.Response({'status': status}), b'{"error": {"message": "falha"}}')
+
+
+class TestIndiceDriveChangesApi(unittest.TestCase):
+
+    def setUp(self):
+        self.raiz = Path(tempfile.mkdtemp())
+        self.indice = IndiceDrive(self.raiz / "indice_drive.sqlite3")
+        self.indice.registrar('id-a', 'a.xml', RAIZ, 10, 'md5-a')
+        self.indice.registrar('id-b', 'b.xml', RAIZ, 10, 'md5-b')
+        self.indice.set_page_token(RAIZ, 'token-1')
+        self.enviados = []
+
+    def tearDown(self):
+        self.indice.fechar()
+        shutil.rmtree(self.raiz, ignore_errors=True)
+
+    def _drive(self, paginas):
+        # Sem autenticação: só o que a sincronização e o upload usam
+        drive = Drive.__new__(Drive)
+        drive.target_folder_id = RAIZ
+        drive.indice = self.indice
+        drive.indice_hash = None
+        drive.particionar = False
+        drive.arquivar = False
+        drive.modo_upload = 'arquivos'
+        drive.shared_drive_id = None
+        drive._metadados_drive = {}
+        drive.executor = ExecutorDrive(tentativas=1)
+        drive.service = _Servico(paginas)
+        drive._upload_file = lambda local_file, service, drive_id=None: self.enviados.append(local_file.name) or 10
+        return drive
+
+    def _xmls(self, *nomes):
+        pasta = self.raiz / "xmls"
+        pasta.mkdir(exist_ok=True)
+        for nome in nomes:
+            (pasta / nome).write_text('<nfe/>')
+        return pasta
+
+    def test_alteracoes_aplicadas_e_token_avancado(self):
+        drive = self._drive([{
+            'changes': [
+                {'fileId': 'id-c', 'file': {'id': 'id-c', 'name': 'c.xml', 'parents': [RAIZ], 'size': '5'}},
+                {'fileId': 'id-a', 'removed': True},
+                {'fileId': 'id-b', 'file': {'id': 'id-b', 'name': 'b.xml', 'parents': [RAIZ], 'trashed': True}},
+                {'fileId': 'id-x', 'file': {'id': 'id-x', 'name': 'x.xml', 'parents': ['outra-pasta']}},
+            ],
+            'newStartPageToken': 'token-2',
+        }])
+        nomes = drive._get_existing_files_in_drive_folder()
+        self.assertEqual([n for n in ('a.xml', 'b.xml', 'c.xml', 'x.xml') if n in nomes], ['c.xml'])
+        self.assertEqual(self.indice.get_page_token(RAIZ), 'token-2')
+        self.assertEqual(drive.service.alteracoes.tokens, ['token-1'])
+
+    def test_paginas_seguidas_ate_o_novo_token(self):
+        drive = self._drive([
+            {'changes': [{'fileId': 'id-c', 'file': {'id': 'id-c', 'name': 'c.xml', 'parents': [RAIZ]}}],
+             'nextPageToken': 'pagina-2'},
+            {'changes': [], 'newStartPageToken': 'token-3'},
+        ])
+        drive._get_existing_files_in_drive_folder()
+        self.assertEqual(drive.service.alteracoes.tokens, ['token-1', 'pagina-2'])
+        self.assertEqual(self.indice.get_page_token(RAIZ), 'token-3')
+
+    def test_falha_na_changes_api_usa_o_indice_local(self):
+        drive = self._drive([_erro(500)])
+        nomes = drive._get_existing_files_in_drive_folder()
+        self.assertIn('a.xml', nomes)
+        self.assertIn('b.xml', nomes)
+        # O token não avança: a próxima execução aplica as alterações perdidas
+        self.assertEqual(self.indice.get_page_token(RAIZ), 'token-1')
+
+    def test_falha_na_changes_api_nao_reenvia_o_que_ja_existe(self):
+        pasta = self._xmls('a.xml', 'b.xml', 'novo.xml')
+        drive = self._drive([_erro(503)])
+        resumo = drive.upload_files(local_folder_path=pasta, max_workers=1)
+        self.assertEqual(self.enviados, ['novo.xml'])
+        self.assertEqual(resumo['ignorados'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from classes.download_xmls import Download_XML, LIMITE_DESCOMPACTADO_PADRAO
+from classes.indice_hash import IndiceHash
+
+
+def _zip(arquivos):
+    """
+    Bytes de um .zip com {nome: conteúdo}.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for nome, conteudo in arquivos.items():
+            zf.writestr(nome, conteudo)
+    return buffer.getvalue()
+
+
+class TestIndiceHashNaExtracao(unittest.TestCase):
+    """
+    A deduplicação por conteúdo nunca pode deixar de gravar um XML que não
+    está na pasta de destino, nem apagar um que já estava lá.
+    """
+
+    def setUp(self):
+        self.raiz = Path(tempfile.mkdtemp())
+        self.indice = IndiceHash(self.raiz / "indice_hash.sqlite3")
+
+    def tearDown(self):
+        self.indice.fechar()
+        shutil.rmtree(self.raiz, ignore_errors=True)
+
+    def _extrator(self, pasta):
+        # Sem navegador: só o que a descompactação usa
+        extrator = Download_XML.__new__(Download_XML)
+        extrator.pasta_destino_drive = Path(pasta)
+        os.makedirs(pasta, exist_ok=True)
+        extrator.indice_hash = self.indice
+        extrator.arquivos_importados = []
+        extrator.ao_extrair = None
+        extrator.indexador = None
+        extrator.limite_descompactado = LIMITE_DESCOMPACTADO_PADRAO
+        extrator.limite_taxa_compressao = 1000
+        extrator.workers_extracao = 1
+        return extrator
+
+    def _extrair(self, pasta, arquivos):
+        extrator = self._extrator(pasta)
+        extrator._descompactar_zip(_zip(arquivos))
+        return sorted(p.name for p in extrator.arquivos_importados)
+
+    def test_mesmo_xml_em_outra_pasta_e_extraido(self):
+        self.assertEqual(self._extrair(self.raiz / "tenant-a", {'a.xml': b'<nfe>1</nfe>'}), ['a.xml'])
+        self.assertEqual(self._extrair(self.raiz / "tenant-b", {'a.xml': b'<nfe>1</nfe>'}), ['a.xml'])
+        self.assertTrue((self.raiz / "tenant-b" / "a.xml").exists())
+
+    def test_pasta_apagada_extrai_de_novo(self):
+        pasta = self.raiz / "janela"
+        arquivos = {'a.xml': b'<nfe>1</nfe>', 'b.xml': b'<nfe>2</nfe>'}
+        self.assertEqual(self._extrair(pasta, arquivos), ['a.xml', 'b.xml'])
+        # Nova tentativa do backfill: a pasta da janela recomeça vazia
+        shutil.rmtree(pasta)
+        self.assertEqual(self._extrair(pasta, arquivos), ['a.xml', 'b.xml'])
+        self.assertEqual(sorted(os.listdir(pasta)), ['a.xml', 'b.xml'])
+
+    def test_identico_na_pasta_nao_e_reimportado(self):
+        pasta = self.raiz / "xmls"
+        self._extrair(pasta, {'a.xml': b'<nfe>1</nfe>'})
+        self.assertEqual(self._extrair(pasta, {'a.xml': b'<nfe>1</nfe>'}), [])
+        self.assertEqual(self._extrair(pasta, {'a.xml': b'<nfe>1 alterada</nfe>'}), ['a.xml'])
+
+    def test_duplicado_nao_apaga_arquivo_que_ja_existia(self):
+        pasta = self.raiz / "xmls"
+        self._extrair(pasta, {'a.xml': b'<nfe>1</nfe>'})
+        # 'b.xml' já estava na pasta, fora do índice
+        (pasta / "b.xml").write_bytes(b'<nfe>antiga</nfe>')
+        self._extrair(pasta, {'b.xml': b'<nfe>1</nfe>'})
+        self.assertTrue((pasta / "b.xml").exists())
+
+    def test_duplicado_recem_extraido_e_descartado(self):
+        pasta = self.raiz / "xmls"
+        self._extrair(pasta, {'a.xml': b'<nfe>1</nfe>'})
+        self.assertEqual(self._extrair(pasta, {'c.xml': b'<nfe>1</nfe>'}), [])
+        self.assertFalse((pasta / "c.xml").exists())
+
+    def test_indice_antigo_sem_pasta_e_recriado(self):
+        self.indice.fechar()
+        caminho = self.raiz / "antigo.sqlite3"
+        with sqlite3.connect(str(caminho)) as conn:
+            conn.execute("CREATE TABLE conteudos (nome TEXT PRIMARY KEY, sha256 TEXT NOT NULL, "
+                         "md5 TEXT, tamanho INTEGER, crc32 INTEGER)")
+            conn.execute("INSERT INTO conteudos VALUES ('a.xml', 'x', NULL, 1, 1)")
+        conn.close()
+        self.indice = IndiceHash(caminho)
+        self.assertIsNone(self.indice.buscar(str(self.raiz), 'a.xml'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from classes.download_xmls import Download_XML, LIMITE_DESCOMPACTADO_PADRAO
+from classes.indice_notas import IndexadorNotas, IndiceNotas, extrair_metadados
+
+CHAVE = '35240112345678000199550010000012341000012345'
+
+NFE = f'''<?xml version="1.0" encoding="UTF-8"?>
+<nfeProc xmlns="http://www.portalfiscal.inf.br/nfe">
+  <NFe><infNFe Id="NFe{CHAVE}">
+    <ide><dhEmi>2024-01-15T10:00:00-03:00</dhEmi></ide>
+    <emit><CNPJ>12345678000199</CNPJ></emit>
+    <dest><CNPJ>98765432000111</CNPJ></dest>
+    <total><ICMSTot><vNF>{{vnf}}</vNF></ICMSTot></total>
+  </infNFe></NFe>
+</nfeProc>'''
+
+EVENTO = f'''<procEventoNFe xmlns="http://www.portalfiscal.inf.br/nfe">
+  <evento><infEvento Id="ID210200{CHAVE}01">
+    <CNPJ>98765432000111</CNPJ>
+    <chNFe>{CHAVE}</chNFe>
+    <dhEvento>2024-01-16T08:00:00-03:00</dhEvento>
+    <tpEvento>210200</tpEvento>
+  </infEvento></evento>
+</procEventoNFe>'''
+
+
+class TestExtrairMetadados(unittest.TestCase):
+
+    def test_nota(self):
+        registro = extrair_metadados(NFE.format(vnf='1500.50').encode(), 'a.xml')
+        self.assertEqual(registro['chave'], CHAVE)
+        self.assertEqual(registro['modelo'], '55')
+        self.assertEqual(registro['tp_evento'], '')
+        self.assertEqual(registro['cnpj_emitente'], '12345678000199')
+        self.assertEqual(registro['cnpj_destinatario'], '98765432000111')
+        self.assertEqual(registro['valor_total'], 1500.5)
+        self.assertEqual(registro['arquivo'], 'a.xml')
+
+    def test_evento(self):
+        registro = extrair_metadados(EVENTO.encode(), 'evento.xml')
+        self.assertEqual(registro['chave'], CHAVE)
+        self.assertEqual(registro['tp_evento'], '210200')
+        self.assertEqual(registro['cnpj_emitente'], '98765432000111')
+        self.assertEqual(registro['dh_emi'], '2024-01-16T08:00:00-03:00')
+        self.assertIsNone(registro['valor_total'])
+
+    def test_valor_malformado_nao_descarta_a_nota(self):
+        registro = extrair_metadados(NFE.format(vnf='1.500,50').encode(), 'a.xml')
+        self.assertEqual(registro['chave'], CHAVE)
+        self.assertIsNone(registro['valor_total'])
+
+    def test_xml_invalido_ou_sem_chave(self):
+        self.assertIsNone(extrair_metadados(b'<nfeProc><NFe>', 'quebrado.xml'))
+        self.assertIsNone(extrair_metadados(b'', 'vazio.xml'))
+        self.assertIsNone(extrair_metadados(b'<outro><CNPJ>1</CNPJ></outro>', 'outro.xml'))
+
+
+class TestIndexadorNotas(unittest.TestCase):
+
+    def setUp(self):
+        self.raiz = Path(tempfile.mkdtemp())
+        self.indice = IndiceNotas(self.raiz / "indice_notas.sqlite3")
+
+    def tearDown(self):
+        self.indice.fechar()
+        shutil.rmtree(self.raiz, ignore_errors=True)
+
+    def _xmls(self):
+        arquivos = {'nota.xml': NFE.format(vnf='10.00'), 'evento.xml': EVENTO,
+                    'valor.xml': NFE.format(vnf='abc'), 'quebrado.xml': '<nfeProc>'}
+        for nome, conteudo in arquivos.items():
+            (self.raiz / nome).write_text(conteudo, encoding='utf-8')
+        return [self.raiz / nome for nome in sorted(arquivos)]
+
+    def _indexar(self, **kwargs):
+        indexador = IndexadorNotas(self.indice, **kwargs)
+        indexador.indexar(self._xmls())
+        return indexador.finalizar()
+
+    def test_na_propria_thread(self):
+        # valor.xml e nota.xml têm a mesma chave: uma linha só
+        self.assertEqual(self._indexar(workers=1), (3, 1))
+        self.assertEqual(self.indice.total(), 2)
+
+    def test_pool_de_threads(self):
+        self.assertEqual(self._indexar(workers=2, processos=False), (3, 1))
+
+    def test_pool_de_processos_spawn(self):
+        self.assertEqual(self._indexar(workers=2, processos=True), (3, 1))
+
+    def test_workers_divididos_pela_concorrencia(self):
+        indexador = IndexadorNotas(self.indice, workers=64, concorrencia=os.cpu_count() or 2)
+        self.assertIsNone(indexador._pool)
+        indexador.finalizar()
+
+
+class _IndexadorComFalha:
+    def enviar(self, caminho):
+        raise RuntimeError("disco cheio")
+
+
+class TestIndexacaoNaExtracao(unittest.TestCase):
+
+    def test_falha_no_indice_nao_interrompe_a_extracao(self):
+        raiz = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, raiz, True)
+        extrator = Download_XML.__new__(Download_XML)
+        extrator.pasta_destino_drive = raiz
+        extrator.indice_hash = None
+        extrator.arquivos_importados = []
+        enviados = []
+        extrator.ao_extrair = enviados.append
+        extrator.indexador = _IndexadorComFalha()
+        extrator.limite_descompactado = LIMITE_DESCOMPACTADO_PADRAO
+        extrator.limite_taxa_compressao = 1000
+        extrator.workers_extracao = 1
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zf:
+            zf.writestr('a.xml', NFE.format(vnf='1'))
+            zf.writestr('b.xml', EVENTO)
+        extrator._descompactar_zip(buffer.getvalue())
+        self.assertEqual(sorted(p.name for p in enviados), ['a.xml', 'b.xml'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from classes.pacote_xml import ArquivoRemoto, MANIFESTO, ler_manifesto, montar_pacote
+
+BLOCO = 4096
+
+
+class _Remoto:
+    """
+    Serve 'dados' por intervalos, como um GET com Range, e guarda os pedidos.
+    """
+
+    def __init__(self, dados):
+        self.dados = dados
+        self.pedidos = []
+
+    def __call__(self, inicio, fim):
+        self.pedidos.append((inicio, fim))
+        return self.dados[inicio:fim + 1]
+
+
+class TestPacoteXml(unittest.TestCase):
+
+    def setUp(self):
+        self.raiz = Path(tempfile.mkdtemp())
+        self.xmls = []
+        for i in range(40):
+            caminho = self.raiz / f"{i:02d}.xml"
+            # Conteúdo pouco compressível: o pacote fica com vários blocos
+            caminho.write_bytes(b'<nfe>' + os.urandom(2048).hex().encode() + b'</nfe>')
+            self.xmls.append(caminho)
+        self.pacote = self.raiz / "pacote.zip"
+        self.manifesto = montar_pacote(self.xmls, self.pacote)
+        self.dados = self.pacote.read_bytes()
+
+    def tearDown(self):
+        shutil.rmtree(self.raiz, ignore_errors=True)
+
+    def _remoto(self):
+        remoto = _Remoto(self.dados)
+        return ArquivoRemoto(len(self.dados), remoto, tamanho_bloco=BLOCO), remoto
+
+    def test_manifesto_lido_sem_baixar_o_pacote(self):
+        arquivo, remoto = self._remoto()
+        with zipfile.ZipFile(arquivo) as zf:
+            self.assertEqual(ler_manifesto(zf), self.manifesto)
+        lidos = sum(fim - inicio + 1 for inicio, fim in remoto.pedidos)
+        self.assertLess(lidos, len(self.dados) / 4)
+
+    def test_um_xml_extraido_por_intervalos(self):
+        arquivo, remoto = self._remoto()
+        with zipfile.ZipFile(arquivo) as zf:
+            conteudo = zf.read("17.xml")
+        self.assertEqual(conteudo, self.xmls[17].read_bytes())
+        entrada = next(e for e in self.manifesto['arquivos'] if e['nome'] == "17.xml")
+        self.assertEqual(hashlib.sha256(conteudo).hexdigest(), entrada['sha256'])
+        for inicio, fim in remoto.pedidos:
+            # Alinhados em blocos, 'fim' inclusivo e dentro do arquivo
+            self.assertEqual(inicio % BLOCO, 0)
+            self.assertLess(fim, len(self.dados))
+            self.assertTrue(fim == len(self.dados) - 1 or (fim + 1) % BLOCO == 0)
+
+    def test_blocos_lidos_uma_vez_so(self):
+        arquivo, remoto = self._remoto()
+        arquivo.seek(-100, io.SEEK_END)
+        self.assertEqual(arquivo.read(100), self.dados[-100:])
+        arquivo.seek(-50, io.SEEK_END)
+        self.assertEqual(arquivo.read(), self.dados[-50:])
+        self.assertEqual(len(remoto.pedidos), 1)
+
+    def test_leitura_atravessando_blocos(self):
+        arquivo, remoto = self._remoto()
+        arquivo.seek(BLOCO - 10)
+        self.assertEqual(arquivo.read(BLOCO * 2), self.dados[BLOCO - 10:BLOCO * 3 - 10])
+        self.assertEqual(remoto.pedidos, [(0, BLOCO * 3 - 1)])
+        self.assertEqual(arquivo.tell(), BLOCO * 3 - 10)
+
+    def test_alem_do_fim(self):
+        arquivo, remoto = self._remoto()
+        arquivo.seek(len(self.dados) + 10)
+        self.assertEqual(arquivo.read(10), b'')
+        self.assertEqual(remoto.pedidos, [])
+
+    def test_pacote_anterior_mesclado(self):
+        novo = self.raiz / "17.xml"
+        novo.write_bytes(b'<nfe>alterada</nfe>')
+        extra = self.raiz / "extra.xml"
+        extra.write_bytes(b'<nfe>extra</nfe>')
+        destino = self.raiz / "mesclado.zip"
+        manifesto = montar_pacote([novo, extra], destino, anterior=self.pacote)
+        self.assertEqual(len(manifesto['arquivos']), 41)
+        with zipfile.ZipFile(destino) as zf:
+            self.assertEqual(zf.read("17.xml"), b'<nfe>alterada</nfe>')
+            self.assertEqual(zf.namelist().count("17.xml"), 1)
+            self.assertEqual(zf.namelist()[-1], MANIFESTO)
+
+    def test_pacote_sem_manifesto(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zf:
+            zf.writestr("a.xml", b'<nfe/>')
+        with zipfile.ZipFile(buffer) as zf:
+            manifesto = ler_manifesto(zf)
+        self.assertEqual(manifesto['versao'], 0)
+        self.assertEqual(manifesto['arquivos'], [{'nome': 'a.xml', 'tamanho': 6, 'sha256': None}])
+
+
+if __name__ == '__main__':
+    unittest.main()
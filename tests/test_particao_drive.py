@@ -0,0 +1,58 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from classes.particao_drive import particao_do_xml
+
+CHAVE = '35240112345678000199550010000012341000012345'
+PARTICAO = ('2024', '01', '12345678000199')
+
+
+class TestParticaoDoXml(unittest.TestCase):
+
+    def setUp(self):
+        self.raiz = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.raiz, ignore_errors=True)
+
+    def _xml(self, nome, conteudo):
+        caminho = self.raiz / nome
+        caminho.write_text(conteudo, encoding='utf-8')
+        return caminho
+
+    def test_chave_no_nome_do_arquivo(self):
+        # O conteúdo nem é lido
+        self.assertEqual(particao_do_xml(self.raiz / f"{CHAVE}-procNFe.xml"), PARTICAO)
+
+    def test_chave_no_conteudo(self):
+        caminho = self._xml("nota.xml", f'<nfeProc><NFe><infNFe Id="NFe{CHAVE}"/></NFe></nfeProc>')
+        self.assertEqual(particao_do_xml(caminho), PARTICAO)
+        caminho = self._xml("evento.xml", f'<procEventoNFe><chNFe>{CHAVE}</chNFe></procEventoNFe>')
+        self.assertEqual(particao_do_xml(caminho), PARTICAO)
+
+    def test_sequencia_mais_longa_nao_e_chave(self):
+        caminho = self._xml(f"{CHAVE}9.xml", '<nfeProc/>')
+        self.assertIsNone(particao_do_xml(caminho))
+        caminho = self._xml("nota.xml", f'<nfeProc><chNFe>{CHAVE[:-1]}</chNFe></nfeProc>')
+        self.assertIsNone(particao_do_xml(caminho))
+
+    def test_mes_ou_uf_invalidos_no_nome_usam_o_conteudo(self):
+        for invalida in ('35241312345678000199550010000012341000012345',
+                         '99240112345678000199550010000012341000012345'):
+            with self.subTest(chave=invalida):
+                caminho = self._xml(f"{invalida}.xml", f'<nfeProc><chNFe>{CHAVE}</chNFe></nfeProc>')
+                self.assertEqual(particao_do_xml(caminho), PARTICAO)
+
+    def test_chave_invalida_no_conteudo(self):
+        caminho = self._xml("nota.xml", '<nfeProc><chNFe>35240012345678000199550010000012341000012345</chNFe></nfeProc>')
+        self.assertIsNone(particao_do_xml(caminho))
+
+    def test_xml_quebrado_ou_ausente(self):
+        self.assertIsNone(particao_do_xml(self._xml("quebrado.xml", '<nfeProc><chNFe>123')))
+        self.assertIsNone(particao_do_xml(self.raiz / "nao-existe.xml"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import threading
+import unittest
+from unittest import mock
+
+from classes.pipeline import PipelineUpload
+
+
+class _DriveFalso:
+    """
+    upload_from_queue: consome a fila até receber um None por worker,
+    ou levanta 'erro' depois de 'falhar_apos' arquivos.
+    """
+
+    def __init__(self, target_folder_id='pasta', falhar_apos=None):
+        self.target_folder_id = target_folder_id
+        self.falhar_apos = falhar_apos
+        self.enviados = []
+
+    def upload_from_queue(self, fila, max_workers=1):
+        encerrados = 0
+        while encerrados < max_workers:
+            item = fila.get()
+            fila.task_done()
+            if item is None:
+                encerrados += 1
+                continue
+            if self.falhar_apos is not None and len(self.enviados) >= self.falhar_apos:
+                raise RuntimeError("quota esgotada")
+            self.enviados.append(item)
+        return {'enviados': len(self.enviados)}
+
+
+class TestPipelineUpload(unittest.TestCase):
+
+    def _pipeline(self, drive=None, erro=None, max_workers=2):
+        def iniciar(pipeline, folder_id):
+            if erro:
+                raise erro
+            return drive
+
+        with mock.patch.object(PipelineUpload, '_iniciar_drive', iniciar):
+            return PipelineUpload(max_workers=max_workers, tamanho_fila=2)
+
+    def _sem_travar(self, funcao, *args):
+        # Roda 'funcao' numa thread e falha se ela não terminar a tempo
+        resultado = {}
+        thread = threading.Thread(target=lambda: resultado.setdefault('valor', funcao(*args)), daemon=True)
+        thread.start()
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive(), f"{funcao.__name__} travou")
+        return resultado.get('valor')
+
+    def _enfileirar(self, pipeline, quantidade):
+        for i in range(quantidade):
+            pipeline.enfileirar(f"{i}.xml")
+
+    def test_upload_normal_devolve_o_resumo(self):
+        drive = _DriveFalso()
+        pipeline = self._pipeline(drive)
+        self._sem_travar(self._enfileirar, pipeline, 10)
+        self.assertEqual(self._sem_travar(pipeline.finalizar), {'enviados': 10})
+        self.assertIsNone(pipeline.erro)
+        self.assertEqual(len(drive.enviados), 10)
+
+    def test_drive_indisponivel_descarta_sem_travar(self):
+        pipeline = self._pipeline(erro=OSError("sem credenciais"))
+        # Bem mais que o tamanho da fila: a extração não pode parar
+        self._sem_travar(self._enfileirar, pipeline, 20)
+        self.assertIsNone(self._sem_travar(pipeline.finalizar))
+        self.assertTrue(pipeline.fila.empty())
+
+    def test_drive_sem_pasta_descarta_sem_travar(self):
+        pipeline = self._pipeline(_DriveFalso(target_folder_id=None))
+        self._sem_travar(self._enfileirar, pipeline, 20)
+        self.assertIsNone(self._sem_travar(pipeline.finalizar))
+
+    def test_erro_no_upload_esvazia_a_fila_ate_o_fim(self):
+        drive = _DriveFalso(falhar_apos=3)
+        pipeline = self._pipeline(drive)
+        self._sem_travar(self._enfileirar, pipeline, 20)
+        self.assertIsNone(self._sem_travar(pipeline.finalizar))
+        self.assertIn("quota esgotada", pipeline.erro)
+        self.assertEqual(len(drive.enviados), 3)
+        self.assertTrue(pipeline.fila.empty())
+
+    def test_workers_padrao_sem_drive_importado(self):
+        pipeline = self._pipeline(erro=OSError("sem credenciais"), max_workers=None)
+        self._sem_travar(pipeline.finalizar)
+        self.assertEqual(pipeline._workers(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
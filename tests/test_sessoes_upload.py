@@ -0,0 +1,151 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import httplib2
+
+from classes.drive_xml import Drive
+from classes.executor_drive import ExecutorDrive
+from classes.sessoes_upload import SessoesUpload, VALIDADE_SESSAO
+
+
+class _Http:
+    """
+    Devolve as respostas configuradas, uma por request(), e guarda os pedidos.
+    """
+
+    def __init__(self, respostas):
+        self.respostas = list(respostas)
+        self.pedidos = []
+
+    def request(self, uri, metodo, headers=None, body=None):
+        self.pedidos.append((uri, metodo, headers))
+        status, cabecalhos, corpo = self.respostas.pop(0)
+        return httplib2.Response({'status': str(status), **cabecalhos}), corpo
+
+
+class _RequisicaoUpload:
+    """
+    Imita o HttpRequest de um upload retomável: next_chunk() envia o resto
+    do arquivo de uma vez, a partir de 'resumable_progress'.
+    """
+
+    def __init__(self, http, tamanho):
+        self.http = http
+        self.resumable = SimpleNamespace(size=lambda: tamanho)
+        self.resumable_uri = None
+        self.resumable_progress = 0
+        self.blocos = []
+
+    def postproc(self, resp, conteudo):
+        return json.loads(conteudo)
+
+    def next_chunk(self):
+        self.blocos.append(self.resumable_progress)
+        if self.resumable_uri is None:
+            self.resumable_uri = 'uri-nova'
+        return None, {'id': 'novo'}
+
+
+class TestSessoesUpload(unittest.TestCase):
+
+    def setUp(self):
+        self.raiz = Path(tempfile.mkdtemp())
+        self.arquivo = self.raiz / "grande.zip"
+        self.arquivo.write_bytes(b'x' * 200)
+        self.sessoes = SessoesUpload(self.raiz / "sessoes_upload.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.raiz, ignore_errors=True)
+
+    def test_sessao_expirada_e_ignorada(self):
+        chave = self.sessoes.chave(self.arquivo, 'pasta')
+        self.sessoes.set(chave, 'uri-1')
+        self.assertEqual(self.sessoes.get(chave), 'uri-1')
+        agora = self.sessoes.dados[chave]['criada'] + VALIDADE_SESSAO + 1
+        with mock.patch('classes.sessoes_upload.time.time', return_value=agora):
+            self.assertIsNone(self.sessoes.get(chave))
+
+    def test_sessoes_sobrevivem_a_reabertura(self):
+        chave = self.sessoes.chave(self.arquivo, 'pasta')
+        self.sessoes.set(chave, 'uri-1')
+        self.assertEqual(SessoesUpload(self.sessoes.caminho).get(chave), 'uri-1')
+
+    def test_arquivo_alterado_muda_a_chave(self):
+        chave = self.sessoes.chave(self.arquivo, 'pasta')
+        self.arquivo.write_bytes(b'y' * 300)
+        self.assertNotEqual(self.sessoes.chave(self.arquivo, 'pasta'), chave)
+
+
+class TestUploadRetomavel(unittest.TestCase):
+
+    def setUp(self):
+        self.raiz = Path(tempfile.mkdtemp())
+        self.arquivo = self.raiz / "grande.zip"
+        self.arquivo.write_bytes(b'x' * 200)
+        self.requisicoes = []
+        self.respostas = []
+
+    def tearDown(self):
+        shutil.rmtree(self.raiz, ignore_errors=True)
+
+    def _drive(self):
+        # Sem autenticação: só o que o upload retomável usa
+        drive = Drive.__new__(Drive)
+        drive.target_folder_id = 'pasta'
+        drive.sessoes = SessoesUpload(self.raiz / "sessoes_upload.json")
+        drive.executor = ExecutorDrive(tentativas=1)
+
+        def requisicao_upload(service, local_file, pasta_id, media, drive_id=None):
+            requisicao = _RequisicaoUpload(_Http(self.respostas), 200)
+            self.requisicoes.append(requisicao)
+            return requisicao
+
+        drive._requisicao_upload = requisicao_upload
+        return drive
+
+    def _com_sessao_salva(self, drive):
+        chave = drive.sessoes.chave(self.arquivo, 'pasta')
+        drive.sessoes.set(chave, 'uri-salva')
+        return chave
+
+    def test_retoma_do_byte_confirmado_pelo_servidor(self):
+        drive = self._drive()
+        chave = self._com_sessao_salva(drive)
+        self.respostas.append((308, {'range': 'bytes=0-99'}, b''))
+        self.assertEqual(drive._upload_retomavel(self.arquivo, None), {'id': 'novo'})
+        requisicao = self.requisicoes[0]
+        uri, metodo, cabecalhos = requisicao.http.pedidos[0]
+        self.assertEqual((uri, metodo), ('uri-salva', 'PUT'))
+        self.assertEqual(cabecalhos['Content-Range'], 'bytes */200')
+        self.assertEqual(requisicao.blocos, [100])
+        self.assertIsNone(drive.sessoes.get(chave))
+
+    def test_sessao_ja_concluida_nao_reenvia(self):
+        drive = self._drive()
+        self._com_sessao_salva(drive)
+        self.respostas.append((200, {}, b'{"id": "enviado-antes"}'))
+        self.assertEqual(drive._upload_retomavel(self.arquivo, None), {'id': 'enviado-antes'})
+        self.assertEqual(self.requisicoes[0].blocos, [])
+
+    def test_sessao_expirada_no_servidor_reinicia_do_zero(self):
+        for status in (404, 410):
+            with self.subTest(status=status):
+                self.requisicoes.clear()
+                drive = self._drive()
+                chave = self._com_sessao_salva(drive)
+                self.respostas.append((status, {}, b'{"error": {"message": "expirada"}}'))
+                self.assertEqual(drive._upload_retomavel(self.arquivo, None), {'id': 'novo'})
+                self.assertEqual(len(self.requisicoes), 2)
+                self.assertEqual(self.requisicoes[0].blocos, [])
+                self.assertEqual(self.requisicoes[1].blocos, [0])
+                self.assertEqual(len(self.requisicoes[1].http.pedidos), 0)
+                self.assertIsNone(drive.sessoes.get(chave))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,118 +1,239 @@
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import platform
 import subprocess
 import zipfile
-import requests
-import os
-
-
-def verificar_chrome_driver():
-    # URL que você deseja acessar
-    url = "https://googlechromelabs.github.io/chrome-for-testing/known-good-versions-with-downloads.json"
-
-    # Faz uma solicitação GET à URL
-    response = requests.get(url)
-
-    if response.status_code == 200:
-        data = response.json()
-
-        # Versão que você está procurando
-        target_version = get_chrome_version()
+from pathlib import Path
 
-        def version_key(version):
-            # Converte a versão em uma lista de inteiros para comparação
-            return list(map(int, version.split('.')))
+# Metadados do Chrome for Testing: a última versão de cada build
+# (MAJOR.MINOR.BUILD) e, como alternativa, de cada versão principal
+URL_VERSOES_POR_BUILD = "https://googlechromelabs.github.io/chrome-for-testing/latest-patch-versions-per-build-with-downloads.json"
+URL_VERSOES_POR_MILESTONE = "https://googlechromelabs.github.io/chrome-for-testing/latest-versions-per-milestone-with-downloads.json"
 
-        # Filtra as versões disponíveis
-        versions = [v['version'] for v in data['versions']]
+# Cache dos metadados e dos drivers já extraídos (um por build e plataforma)
+PASTA_CHROMEDRIVER_PADRAO = Path(os.environ.get("CHROMEDRIVER_CACHE_DIR") or Path.home() / "XML- Robô Innovaro/chromedriver")
+# Por quanto tempo os metadados valem sem nova consulta (depois, só um GET condicional com ETag)
+VALIDADE_METADADOS = float(os.environ.get("CHROMEDRIVER_METADADOS_TTL_H", "24")) * 3600
+TIMEOUT_REDE = float(os.environ.get("CHROMEDRIVER_TIMEOUT", "30"))
 
-        # Encontra a versão mais próxima
-        closest_version = None
-        min_diff = float('inf')
+PADRAO_VERSAO = re.compile(r'(\d+)\.(\d+)\.(\d+)\.(\d+)')
 
-        for version in versions:
-            # Calcula a diferença em cada nível de versão
-            current_diff = sum(
-                abs(a - b) for a, b in zip(version_key(version), version_key(target_version)))
+# Executáveis do Chrome/Chromium procurados fora do Windows
+BINARIOS_CHROME = [
+    'google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser',
+    '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',
+]
 
-            if current_diff < min_diff:
-                min_diff = current_diff
-                closest_version = version
 
-        # Filtra as versões disponíveis
-        versions_info = data['versions']
+def verificar_chrome_driver():
+    """
+    Retorna o caminho de um chromedriver compatível com o Chrome instalado.
+    O driver fica em cache por build (MAJOR.MINOR.BUILD) e plataforma: se já
+    foi baixado, nenhuma chamada de rede é feita. Senão, a versão é achada
+    direto nos metadados por build (ou pela versão principal) e o .zip é
+    baixado e extraído uma única vez.
+    """
+    target_version = get_chrome_version()
+    if not target_version:
+        print("Versão do Chrome não encontrada. Não é possível escolher o chromedriver.")
+        return None
+
+    plataforma = plataforma_chrome()
+    build = '.'.join(target_version.split('.')[:3])
+    pasta_driver = PASTA_CHROMEDRIVER_PADRAO / build / plataforma
+
+    # Inicialização "quente": driver deste build já extraído
+    chromedriver_path = find_chromedriver(pasta_driver)
+    if chromedriver_path:
+        print(f"chromedriver {build} em cache: {chromedriver_path}")
+        return chromedriver_path
 
-        # Armazena versões que correspondem à versão desejada
-        matching_versions = []
+    registro = resolver_versao_driver(target_version)
+    if not registro:
+        print(f"Nenhum chromedriver publicado para o Chrome {target_version}.")
+        return None
+
+    url = get_url_by_platform(registro.get('downloads', {}).get('chromedriver', []), plataforma)
+    if not url:
+        print(f"Nenhum chromedriver {registro['version']} para a plataforma '{plataforma}'.")
+        return None
+
+    print(f"Baixando chromedriver {registro['version']} ({plataforma}) para o Chrome {target_version}...")
+    os.makedirs(pasta_driver.parent, exist_ok=True)
+    filename = pasta_driver.parent / f"chromedriver-{plataforma}.zip"
+    if not download_file(url, filename):
+        return None
+
+    # Extrai numa pasta temporária e só então publica: uma extração
+    # interrompida não deixa um driver pela metade no cache
+    temporaria = pasta_driver.with_name(pasta_driver.name + ".tmp")
+    shutil.rmtree(temporaria, ignore_errors=True)
+    unzip_file(filename, temporaria)
+    os.remove(filename)
+    shutil.rmtree(pasta_driver, ignore_errors=True)
+    os.replace(temporaria, pasta_driver)
+
+    chromedriver_path = find_chromedriver(pasta_driver)
+    if chromedriver_path:
+        if os.name != 'nt':
+            os.chmod(chromedriver_path, 0o755)
+        print(f"chromedriver encontrado em: {chromedriver_path}")
+    else:
+        print(f"{nome_executavel_driver()} não encontrado.")
+    return chromedriver_path
+
+
+def resolver_versao_driver(target_version):
+    """
+    Registro (versão e downloads) do chromedriver para a versão do Chrome:
+    busca exata pelo build nos metadados por build e, se o build ainda não
+    estiver lá, pela versão principal. Retorna None se não houver.
+    """
+    partes = target_version.split('.')
+    build = '.'.join(partes[:3])
+
+    dados = carregar_metadados(URL_VERSOES_POR_BUILD)
+    registro = (dados or {}).get('builds', {}).get(build)
+    if registro:
+        return registro
+
+    dados = carregar_metadados(URL_VERSOES_POR_MILESTONE)
+    return (dados or {}).get('milestones', {}).get(partes[0])
+
+
+def carregar_metadados(url, pasta=None):
+    """
+    JSON de metadados com cache em disco. Dentro da validade não há
+    chamada de rede; depois, um GET condicional (If-None-Match) só baixa
+    o arquivo se ele mudou. Sem rede, o cache vencido ainda é usado.
+    """
+    pasta = Path(pasta or PASTA_CHROMEDRIVER_PADRAO)
+    caminho = pasta / f"metadados_{url.rsplit('/', 1)[-1]}"
+    cache = None
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"Cache de metadados do chromedriver ignorado ({caminho}): {e}")
 
-        for version_info in versions_info:
-            version = version_info['version']
+    if cache and time.time() - cache.get('obtido', 0) < VALIDADE_METADADOS:
+        return cache['dados']
 
-            # Verifica se a versão corresponde à versão desejada
-            if version == closest_version:
-                matching_versions.append(version_info)
+    # Importado aqui: com o driver em cache, o requests nem é carregado
+    import requests
 
-        # Exibe todos os registros encontrados
-        if matching_versions:
-            print("Registros encontrados:")
-            for match in matching_versions:
-                download_chrome_driver = match['downloads']['chromedriver']
-        else:
-            print("Nenhum registro encontrado.")
+    headers = {'If-None-Match': cache['etag']} if cache and cache.get('etag') else {}
+    try:
+        response = requests.get(url, headers=headers, timeout=TIMEOUT_REDE)
+    except requests.RequestException as e:
+        print(f"Falha ao acessar a URL: {e}")
+        return cache['dados'] if cache else None
+
+    if response.status_code == 304 and cache:
+        cache['obtido'] = time.time()
+    elif response.status_code == 200:
+        cache = {'etag': response.headers.get('ETag'), 'obtido': time.time(), 'dados': response.json()}
+    else:
+        print(f"Falha ao acessar a URL: {response.status_code}")
+        return cache['dados'] if cache else None
 
-        def get_url_by_platform(data, platform):
-            for item in data:
-                if item['platform'] == platform:
-                    return item['url']
-            return None
+    try:
+        os.makedirs(pasta, exist_ok=True)
+        temporario = caminho.with_name(caminho.name + ".tmp")
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+        os.replace(temporario, caminho)
+    except OSError as e:
+        print(f"Não foi possível salvar o cache de metadados do chromedriver: {e}")
+    return cache['dados']
+
+
+def get_url_by_platform(data, platform):
+    for item in data:
+        if item['platform'] == platform:
+            return item['url']
+    return None
 
-        # Exemplo de uso:
-        url = get_url_by_platform(download_chrome_driver, 'win32')
-        filename = 'chromedriver-win32.zip'
-        download_file(url, filename)
 
-        extract_to = 'chromedriver_extracted'
-        unzip_file(filename, extract_to)
+def plataforma_chrome():
+    """
+    Nome da plataforma no Chrome for Testing para esta máquina.
+    """
+    maquina = platform.machine().lower()
+    if sys.platform.startswith('win'):
+        return 'win64' if maquina.endswith('64') else 'win32'
+    if sys.platform == 'darwin':
+        return 'mac-arm64' if maquina in ('arm64', 'aarch64') else 'mac-x64'
+    return 'linux64'
 
-        chromedriver_path = find_chromedriver(extract_to)
-        if chromedriver_path:
-            print(f"chromedriver.exe encontrado em: {chromedriver_path}")
-        else:
-            print("chromedriver.exe não encontrado.")
 
-        return chromedriver_path
+def nome_executavel_driver():
+    return 'chromedriver.exe' if os.name == 'nt' else 'chromedriver'
 
-    else:
-        print(f"Falha ao acessar a URL: {response.status_code}")
 
 def download_file(url, filename):
-    response = requests.get(url)
+    import requests
+
+    response = requests.get(url, timeout=TIMEOUT_REDE)
     if response.status_code == 200:
         with open(filename, 'wb') as file:
             file.write(response.content)
         print(f"Download concluído: {filename}")
-    else:
-        print(f"Falha no download: {response.status_code}")
+        return True
+    print(f"Falha no download: {response.status_code}")
+    return False
+
 
 def unzip_file(zip_path, extract_to='.'):
     with zipfile.ZipFile(zip_path, 'r') as zip_ref:
         zip_ref.extractall(extract_to)
         print(f"Arquivos extraídos para: {extract_to}")
 
+
 def find_chromedriver(extract_to='.'):
+    nome = nome_executavel_driver()
     for root, dirs, files in os.walk(extract_to):
-        if 'chromedriver.exe' in files:
-            return os.path.join(root, 'chromedriver.exe')
+        if nome in files:
+            return os.path.join(root, nome)
     return None
 
+
 def get_chrome_version():
-    try:
-        # Executa o comando para obter a versão do Chrome
-        version = subprocess.check_output(
-            ['reg', 'query', r'HKEY_CURRENT_USER\Software\Google\Chrome\BLBeacon',
-                '/v', 'version'],
-            stderr=subprocess.STDOUT
-        )
-        # Processa a saída para extrair a versão
-        version = version.decode().strip().split()[-1]
-        return version
-    except subprocess.CalledProcessError:
-        return "Chrome não está instalado."
+    """
+    Versão do Chrome instalado (ex: '124.0.6367.91'), ou None.
+    No Windows vem do registro; nos demais sistemas, de '<chrome> --version'
+    (CHROME_BINARY, se definido, é tentado primeiro).
+    """
+    if os.name == 'nt':
+        for chave in (r'HKEY_CURRENT_USER\Software\Google\Chrome\BLBeacon',
+                      r'HKEY_LOCAL_MACHINE\Software\Google\Chrome\BLBeacon'):
+            try:
+                # Executa o comando para obter a versão do Chrome
+                saida = subprocess.check_output(['reg', 'query', chave, '/v', 'version'], stderr=subprocess.STDOUT)
+            except (subprocess.CalledProcessError, OSError):
+                continue
+            achou = PADRAO_VERSAO.search(saida.decode(errors='ignore'))
+            if achou:
+                return achou.group(0)
+        return None
+
+    binarios = [os.environ.get("CHROME_BINARY")] + BINARIOS_CHROME
+    for binario in filter(None, binarios):
+        if not os.path.isabs(binario):
+            binario = shutil.which(binario)
+            if not binario:
+                continue
+        try:
+            saida = subprocess.check_output([binario, '--version'], stderr=subprocess.STDOUT, timeout=10)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError):
+            continue
+        achou = PADRAO_VERSAO.search(saida.decode(errors='ignore'))
+        if achou:
+            return achou.group(0)
+    return None